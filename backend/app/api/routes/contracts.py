@@ -2,19 +2,35 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, HttpUrl, validator, Field
 from typing import Dict, Any, Optional, List
 import os
-from app.services.solana_service import validate_contract_address, transfer_tranche
+import asyncio
+import math
+from app.services.solana_service import (
+    load_payment_contract,
+    load_payment_contracts,
+)
 from app.services.twitter_service import (
+    TwitterUnavailable,
     validate_twitter_handle,
     validate_post_url,
     get_post_metrics,
 )
-from app.services.llm_service import validate_text, verify_post_content
+from app.services.twitter_rate_limiter import RateLimited
+from app.services.account_mirror import account_mirror
+from app.services.claim_service import CLAIM_JOB
+from app.services.contract_cache import contract_cache
+from app.services.contract_indexer import index_contracts, list_owner_contracts
+from app.services.job_queue import JOB_QUEUED, enqueue_job
+from app.services.llm_service import validate_text
+from app.services.metrics_poller import metrics_poller
+from app.services.payout_batcher import payout_batcher
+from app.services.rpc_client import rpc_stats
 from app.services.db_service import (
     store_contract_data,
     get_contract,
-    update_contract_with_post,
+    get_contracts,
+    get_job,
+    get_onchain_contracts_by_owner,
 )
-import datetime
 
 router = APIRouter()
 
@@ -60,6 +76,23 @@ class ContractResponse(BaseModel):
     success: bool
     message: str
     reason: Optional[str] = None
+    tranches: Optional[List[Dict[str, Any]]] = None
+
+
+class ClaimJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class ClaimJobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    attempts: int
+    contract_address: str
+    result: Optional[ContractResponse] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
 
 
 class ContractInfoResponse(BaseModel):
@@ -69,10 +102,57 @@ class ContractInfoResponse(BaseModel):
     post_url: Optional[str] = None
     created_at: str
     status: str
+    # Tranches paid by the latest claim or milestone
     tranches_distributed: Optional[int] = 0
+    # All tranches paid so far, None for contracts claimed before it was stored
+    paid_tranches: Optional[int] = None
     metrics: Optional[Dict[str, Any]] = None
     number_of_tranches: int
     tranche_distribution: List[int]
+    on_chain: Optional[Dict[str, Any]] = None
+
+
+# Upper bound on the number of addresses accepted by /info/batch
+MAX_BATCH_INFO_ADDRESSES = 500
+
+
+class BatchContractInfoRequest(BaseModel):
+    contract_addresses: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_INFO_ADDRESSES,
+        description="Contract addresses to look up",
+    )
+
+
+class BatchContractInfoRecord(BaseModel):
+    contract_address: str
+    found: bool
+    info: Optional[ContractInfoResponse] = None
+    on_chain: Optional[Dict[str, Any]] = None
+
+
+class BatchContractInfoResponse(BaseModel):
+    contracts: List[BatchContractInfoRecord]
+
+
+def to_contract_info(contract: Dict[str, Any]) -> ContractInfoResponse:
+    """Format a stored contract document as a ContractInfoResponse."""
+    return ContractInfoResponse(
+        contract_address=contract["contract_address"],
+        twitter_handle=contract["twitter_handle"],
+        verification_text=contract["verification_text"],
+        created_at=(
+            contract["created_at"].isoformat() if "created_at" in contract else ""
+        ),
+        status=contract["status"],
+        post_url=contract.get("post_url"),
+        tranches_distributed=contract.get("tranches_distributed", 0),
+        paid_tranches=contract.get("paid_tranches"),
+        metrics=contract.get("metrics"),
+        number_of_tranches=contract.get("number_of_tranches", 0),
+        tranche_distribution=contract.get("tranche_distribution", []),
+    )
 
 
 @router.post("/new_contract", response_model=ContractResponse)
@@ -90,16 +170,16 @@ async def create_new_contract(contract_data: NewContractRequest):
     """
     try:
         # Validate contract address on Solana testnet
-        if not await validate_contract_address(contract_data.contract_address):
+        if not await load_payment_contract(contract_data.contract_address):
             return ContractResponse(success=False, message="Invalid contract address")
 
         # Validate that text is parseable by LLM
         if not validate_text(contract_data.verification_text):
             return ContractResponse(success=False, message="Text validation failed")
 
-        # # Validate Twitter handle
-        # if not await validate_twitter_handle(contract_data.twitter_handle):
-        #     return ContractResponse(success=False, message="Invalid Twitter handle")
+        # Validate Twitter handle, usually answered from the user cache
+        if not await validate_twitter_handle(contract_data.twitter_handle):
+            return ContractResponse(success=False, message="Invalid Twitter handle")
 
         # Validate tranche distribution
         if len(contract_data.tranche_distribution) != contract_data.number_of_tranches:
@@ -129,148 +209,77 @@ async def create_new_contract(contract_data: NewContractRequest):
 
         return ContractResponse(success=True, message="Contract created successfully")
 
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except TwitterUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
 # Implement /claim endpoint
-@router.post("/claim", response_model=ContractResponse)
+@router.post("/claim", response_model=ClaimJobResponse, status_code=202)
 async def claim_contract(claim_data: ClaimRequest):
     """
     Claims a contract by providing a Twitter post URL that fulfills the contract requirements.
 
-    Validates:
-    1. Contract exists in database
-    2. Post URL is valid and accessible
-    3. Post is authored by the expected Twitter handle
-    4. Post content matches verification text requirements
-    5. Post has enough likes to qualify for tranches
-
-    Then calls distribute_tranche on the contract for each qualified tranche
+    The claim is accepted into the durable payout queue and verified and paid by a
+    background worker, see claim_service.process_claim. Poll /claim/{job_id} for
+    the outcome.
     """
     try:
-        # Get contract data from database
-        contract = await get_contract(claim_data.contract_address)
-        if not contract:
-            return ContractResponse(success=False, message="Contract not found")
-
-        # Check if contract is already claimed
-        if contract.get("status") == "claimed":
-            return ContractResponse(
-                success=False,
-                message="Contract has already been claimed",
-                reason="already_claimed",
-            )
-
-        # Get contract details
-        twitter_handle = contract["twitter_handle"]
-        verification_text = contract["verification_text"]
-
-        # Validate post URL
-        post_info = await validate_post_url(claim_data.post_url)
-        if not post_info:
-            return ContractResponse(
-                success=False, message="Invalid post URL or api timeout"
-            )
-
-        # Check if the post author matches the expected Twitter handle
-        if post_info["author_handle"].lower() != twitter_handle.lower().strip("@"):
-            return ContractResponse(
-                success=False,
-                message=f"Post not authored by the expected influencer: {twitter_handle}",
-                reason="wrong_author",
-            )
-
-        # Verify post content against verification text requirements using LLM
-        content_valid = await verify_post_content(post_info["text"], verification_text)
-        if not content_valid:
-            return ContractResponse(
-                success=False,
-                message="Post content does not match verification requirements",
-                reason="content_mismatch",
-            )
-
-        # # Get post metrics
-        # metrics = await get_post_metrics(claim_data.post_url)
-        # if not metrics:
-        #     return ContractResponse(
-        #         success=False, message="Failed to retrieve post metrics"
-        #     )
-        metrics = post_info["public_metrics"]
-
-        # Use the custom tranche distribution specified in the contract
-        number_of_tranches = contract.get("number_of_tranches", 0)
-        tranche_distribution = contract.get("tranche_distribution", [])
-
-        if not number_of_tranches or not tranche_distribution:
-            return ContractResponse(
-                success=False,
-                message="Contract does not have valid tranche configuration",
-                reason="invalid_tranches",
-            )
-
-        # Calculate how many tranches the post qualifies for based on likes
-        qualified_tranches = 0
-        like_count = metrics.get("like_count", 0)
-
-        for i, threshold in enumerate(tranche_distribution):
-            if like_count >= threshold:
-                qualified_tranches += 1
-
-        contract_pre_claim_data = await validate_contract_address(
-            claim_data.contract_address, get_tranches=True
+        job_id = await enqueue_job(
+            CLAIM_JOB,
+            {
+                "contract_address": claim_data.contract_address,
+                "post_url": str(claim_data.post_url),
+            },
         )
-        paid_tranches = contract_pre_claim_data["paid_tranches"]
-
-        qualified_tranches = qualified_tranches - paid_tranches
-
-        if qualified_tranches < 0:
-            qualified_tranches = 0
+        if not job_id:
+            raise HTTPException(status_code=503, detail="Failed to queue claim")
 
-        if qualified_tranches == 0:
-            return ContractResponse(
-                success=False,
-                message=f"Post does not have enough likes to qualify for any tranche. "
-                f"Current likes: {like_count}",
-                reason="insufficient_likes",
-            )
+        return ClaimJobResponse(job_id=job_id, status=JOB_QUEUED)
 
-        # Call distribute_tranche for each qualified tranche
-        distributed_count = 0
-        for i in range(qualified_tranches):
-            tranche_result = await transfer_tranche(claim_data.contract_address)
-            if tranche_result:
-                distributed_count += 1
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-        # Update contract in database with post URL and metrics
-        contract_data_post_claim = await validate_contract_address(
-            claim_data.contract_address, get_tranches=True
-        )
-        # if paid_tranches <= number of treches that status is partially_claimed
-        if (
-            contract_pre_claim_data["paid_tranches"] + distributed_count
-            < contract_data_post_claim["tranche_count"]
-        ):
-            status = "partially_claimed"
-        else:
-            status = "claimed"
-
-        current_time = datetime.datetime.now().isoformat()
-        update_data = {
-            "post_url": str(claim_data.post_url),
-            "metrics": metrics,
-            "status": status,
-            "tranches_distributed": distributed_count,
-            "claimed_at": current_time,  # Store the actual current time
-        }
 
-        await update_contract_with_post(claim_data.contract_address, update_data)
+@router.get("/claim/{job_id}", response_model=ClaimJobStatusResponse)
+async def get_claim_status(job_id: str):
+    """
+    Retrieves the state of a queued claim.
 
-        return ContractResponse(
-            success=True,
-            message=f"Successfully claimed contract and distributed {distributed_count} tranches",
+    Returns:
+    The job status, attempt count and, once finished, the claim result or last error
+    """
+    try:
+        job = await get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return ClaimJobStatusResponse(
+            job_id=job["_id"],
+            status=job["status"],
+            attempts=job["attempts"],
+            contract_address=job["payload"]["contract_address"],
+            result=ContractResponse(**job["result"]) if job.get("result") else None,
+            error=job.get("error"),
+            created_at=job["created_at"].isoformat(),
+            updated_at=job["updated_at"].isoformat(),
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -290,21 +299,11 @@ async def get_contract_info(contract_address: str):
         if not contract:
             raise HTTPException(status_code=404, detail="Contract not found")
 
-        # Format the response
-        response = ContractInfoResponse(
-            contract_address=contract["contract_address"],
-            twitter_handle=contract["twitter_handle"],
-            verification_text=contract["verification_text"],
-            created_at=(
-                contract["created_at"].isoformat() if "created_at" in contract else ""
-            ),
-            status=contract["status"],
-            post_url=contract.get("post_url"),
-            tranches_distributed=contract.get("tranches_distributed", 0),
-            metrics=contract.get("metrics"),
-            number_of_tranches=contract.get("number_of_tranches", 0),
-            tranche_distribution=contract.get("tranche_distribution", []),
-        )
+        # Format the response, with live state when the account mirror has it
+        response = to_contract_info(contract)
+        snapshot = account_mirror.get(contract_address)
+        if snapshot is not None:
+            response.on_chain = snapshot.to_dict()
 
         return response
 
@@ -314,6 +313,104 @@ async def get_contract_info(contract_address: str):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/info/batch", response_model=BatchContractInfoResponse)
+async def get_contract_info_batch(request: BatchContractInfoRequest):
+    """
+    Retrieves metadata and live on-chain state for many contracts at once.
+
+    Stored contracts are loaded with a single database query and the on-chain
+    accounts with getMultipleAccounts, 100 addresses per RPC call.
+
+    Returns:
+    One record per requested address, in request order
+    """
+    try:
+        addresses = list(dict.fromkeys(request.contract_addresses))
+
+        contracts, snapshots = await asyncio.gather(
+            get_contracts(addresses), load_payment_contracts(addresses)
+        )
+        contracts_by_address = {
+            contract["contract_address"]: contract for contract in contracts
+        }
+
+        records = []
+        for address in addresses:
+            contract = contracts_by_address.get(address)
+            snapshot = snapshots.get(address)
+            records.append(
+                BatchContractInfoRecord(
+                    contract_address=address,
+                    found=contract is not None,
+                    info=to_contract_info(contract) if contract else None,
+                    on_chain=snapshot.to_dict() if snapshot else None,
+                )
+            )
+
+        return BatchContractInfoResponse(contracts=records)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/owner/{owner}/contracts")
+async def get_owner_contracts(owner: str, refresh: bool = False, summary: bool = False):
+    """
+    Lists every contract created by an owner.
+
+    By default the indexed on-chain state is read from the database; refresh=true
+    re-indexes the owner's contracts first with one getProgramAccounts call.
+    summary=true skips the database and returns only the fixed account prefix
+    straight from the chain.
+    """
+    try:
+        if summary:
+            return {"owner": owner, "contracts": await list_owner_contracts(owner)}
+
+        if refresh:
+            await index_contracts(owner)
+
+        return {
+            "owner": owner,
+            "contracts": await get_onchain_contracts_by_owner(owner),
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the decoded contract state cache.
+    """
+    return contract_cache.stats()
+
+
+@router.get("/rpc/stats")
+async def get_rpc_stats():
+    """
+    Health scores of the configured Solana RPC endpoints.
+    """
+    return rpc_stats()
+
+
+@router.get("/payouts/stats")
+async def get_payout_stats():
+    """
+    Counters of the cross-contract payout batcher.
+    """
+    return payout_batcher.stats()
+
+
+@router.get("/payouts/poller")
+async def get_poller_stats():
+    """
+    Counters of the background metrics poller.
+    """
+    return metrics_poller.stats()
+
+
 # Implement /health endpoint
 @router.get("/health")
 async def health_check():
@@ -328,12 +425,6 @@ async def debug_info():
     """
     Provides debug information.
     """
-    out = await validate_contract_address(
-        "CrjUPjNTV7CR5eUCL8x3FxEXJd7gxMZ8x73bXTkMWMap", get_tranches=True
-    )
-
-    print(f"Validation output: {out}")
-
     return {
         "name": "Solana Contract API",
         "version": "1.0",
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
-from app.api.routes import contracts
+from app.api.routes import contracts, twitter
 
 # Create main API router
 api_router = APIRouter()
 
 # Include contract routes
 api_router.include_router(contracts.router, tags=["Contract Operations"])
+
+# Include Twitter verification routes
+api_router.include_router(
+    twitter.router, prefix="/verify/twitter", tags=["Twitter Verification"]
+)
@@ -1,15 +1,24 @@
+import math
+
+import tweepy
 from fastapi import APIRouter, Depends, HTTPException, status
+from loguru import logger
 
 from app.schemas.twitter import MetricsRequest, MetricsResponse
-from app.services.twitter_service import TwitterService
+from app.services.twitter_rate_limiter import RateLimited
+from app.services.twitter_service import (
+    TwitterService,
+    TwitterUnavailable,
+    twitter_service,
+)
 
 # Create Twitter router
 router = APIRouter()
 
 
 def get_twitter_service():
-    """Dependency to get the Twitter service."""
-    return TwitterService()
+    """Dependency to get the shared Twitter service."""
+    return twitter_service
 
 
 @router.post("/metrics", response_model=MetricsResponse)
@@ -29,7 +38,7 @@ async def verify_tweet_metrics(
 
     try:
         # Get metrics for each tweet
-        metrics = twitter_service.get_tweet_metrics(request.tweet_ids)
+        metrics = await twitter_service.fetch_tweet_metrics(request.tweet_ids)
 
         if not metrics:
             return MetricsResponse(
@@ -46,11 +55,47 @@ async def verify_tweet_metrics(
             total_metrics=total_metrics,
         )
 
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    except TwitterUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))},
+        )
+
+    except tweepy.BadRequest as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     except Exception as e:
-        # Log the error (in a production app, use a proper logger)
-        print(f"Error verifying tweet metrics: {str(e)}")
+        logger.error(f"Error verifying tweet metrics: {str(e)}")
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to verify tweet metrics: {str(e)}",
         )
+
+
+@router.get("/stats")
+async def twitter_stats(
+    twitter_service: TwitterService = Depends(get_twitter_service),
+):
+    """
+    Tweet and user cache and lookup batching counters, and the learned rate limits.
+    """
+    return {
+        "cache": twitter_service.cache.stats(),
+        "users": twitter_service.users.stats(),
+        "batching": {
+            "posts": twitter_service.post_batcher.stats(),
+            "metrics": twitter_service.metrics_batcher.stats(),
+            "user_ids": twitter_service.user_id_batcher.stats(),
+            "usernames": twitter_service.username_batcher.stats(),
+        },
+        "rate_limits": twitter_service.rate_limiter.stats(),
+    }
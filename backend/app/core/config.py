@@ -1,4 +1,5 @@
 import os
+from typing import List
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -19,10 +20,134 @@ class Settings(BaseModel):
     TWITTER_ACCESS_TOKEN: str = os.getenv("TWITTER_ACCESS_TOKEN", "")
     TWITTER_ACCESS_SECRET: str = os.getenv("TWITTER_ACCESS_SECRET", "")
     TWITTER_BEARER_TOKEN: str = os.getenv("TWITTER_BEARER_TOKEN", "")
+    # Threads running the blocking tweepy calls
+    TWITTER_MAX_WORKERS: int = int(os.getenv("TWITTER_MAX_WORKERS", "4"))
+    # Requests per 15 minute window assumed until the API reports the real limit
+    TWITTER_RATE_LIMIT_DEFAULT: int = int(
+        os.getenv("TWITTER_RATE_LIMIT_DEFAULT", "300")
+    )
+    # Longest wait for rate limit quota before failing with a retry-after hint
+    TWITTER_MAX_WAIT: float = float(os.getenv("TWITTER_MAX_WAIT", "30"))
+
+    # Tweet lookup cache: author and text rarely expire, metrics go stale quickly
+    TWEET_CACHE_SIZE: int = int(os.getenv("TWEET_CACHE_SIZE", "10000"))
+    TWEET_CONTENT_TTL: float = float(os.getenv("TWEET_CONTENT_TTL", "86400"))
+    TWEET_METRICS_TTL: float = float(os.getenv("TWEET_METRICS_TTL", "60"))
+    # Seconds concurrent tweet lookups wait to share one get_tweets call
+    TWEET_BATCH_WINDOW: float = float(os.getenv("TWEET_BATCH_WINDOW", "0.01"))
+    # Twitter user id <-> username cache, in memory and in Mongo
+    TWITTER_USER_CACHE_SIZE: int = int(os.getenv("TWITTER_USER_CACHE_SIZE", "50000"))
+    TWITTER_USER_TTL: float = float(os.getenv("TWITTER_USER_TTL", "604800"))
+    # Seconds a handle the API reported as missing stays rejected
+    TWITTER_USER_NEGATIVE_TTL: float = float(
+        os.getenv("TWITTER_USER_NEGATIVE_TTL", "300")
+    )
 
     # Groq API credentials
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
 
+    # Solana RPC settings
+    SOLANA_RPC_URL: str = os.getenv("SOLANA_RPC_URL", "https://api.testnet.sonic.game")
+    RPC_MAX_CONNECTIONS: int = int(os.getenv("RPC_MAX_CONNECTIONS", "100"))
+    RPC_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("RPC_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    RPC_KEEPALIVE_EXPIRY: float = float(os.getenv("RPC_KEEPALIVE_EXPIRY", "30"))
+    RPC_TIMEOUT: float = float(os.getenv("RPC_TIMEOUT", "10"))
+    RPC_CONNECT_TIMEOUT: float = float(os.getenv("RPC_CONNECT_TIMEOUT", "5"))
+
+    # Extra endpoints for hedged reads and write fan-out, comma separated
+    SOLANA_RPC_FALLBACK_URLS: List[str] = [
+        url.strip()
+        for url in os.getenv("SOLANA_RPC_FALLBACK_URLS", "").split(",")
+        if url.strip()
+    ]
+    RPC_HEDGE_MIN_DELAY: float = float(os.getenv("RPC_HEDGE_MIN_DELAY", "0.05"))
+    RPC_HEDGE_MAX_DELAY: float = float(os.getenv("RPC_HEDGE_MAX_DELAY", "2"))
+    RPC_WRITE_FANOUT: int = int(os.getenv("RPC_WRITE_FANOUT", "2"))
+
+    # Concurrent RPC calls are merged into JSON-RPC batches of up to this size,
+    # 1 disables coalescing
+    RPC_BATCH_MAX_SIZE: int = int(os.getenv("RPC_BATCH_MAX_SIZE", "50"))
+
+    SOLANA_WS_URL: str = os.getenv("SOLANA_WS_URL", "")
+
+    # Live account mirror over a programSubscribe websocket
+    ACCOUNT_MIRROR_ENABLED: bool = (
+        os.getenv("ACCOUNT_MIRROR_ENABLED", "False") == "True"
+    )
+    ACCOUNT_MIRROR_PERSIST: bool = (
+        os.getenv("ACCOUNT_MIRROR_PERSIST", "False") == "True"
+    )
+
+    # Decoded PaymentContract cache
+    CONTRACT_CACHE_SIZE: int = int(os.getenv("CONTRACT_CACHE_SIZE", "10000"))
+    CONTRACT_CACHE_TTL: float = float(os.getenv("CONTRACT_CACHE_TTL", "30"))
+
+    # Background blockhash prefetching for payout transactions
+    BLOCKHASH_REFRESH_INTERVAL: float = float(
+        os.getenv("BLOCKHASH_REFRESH_INTERVAL", "5")
+    )
+    BLOCKHASH_MAX_AGE: float = float(os.getenv("BLOCKHASH_MAX_AGE", "30"))
+
+    # Compute budget and priority fees of payout transactions
+    PRIORITY_FEE_PERCENTILE: float = float(os.getenv("PRIORITY_FEE_PERCENTILE", "75"))
+    PRIORITY_FEE_WINDOW: int = int(os.getenv("PRIORITY_FEE_WINDOW", "300"))
+    PRIORITY_FEE_SAMPLE_INTERVAL: float = float(
+        os.getenv("PRIORITY_FEE_SAMPLE_INTERVAL", "10")
+    )
+    # Micro-lamports per compute unit
+    PRIORITY_FEE_MIN: int = int(os.getenv("PRIORITY_FEE_MIN", "0"))
+    PRIORITY_FEE_MAX: int = int(os.getenv("PRIORITY_FEE_MAX", "1000000"))
+    # Cap on the priority fee of a single transaction, in lamports
+    PRIORITY_FEE_MAX_LAMPORTS: int = int(
+        os.getenv("PRIORITY_FEE_MAX_LAMPORTS", "100000")
+    )
+    COMPUTE_UNIT_MARGIN: float = float(os.getenv("COMPUTE_UNIT_MARGIN", "1.2"))
+    COMPUTE_UNITS_PER_TRANCHE: int = int(
+        os.getenv("COMPUTE_UNITS_PER_TRANCHE", "30000")
+    )
+
+    # Batched tracking of sent payout transactions
+    CONFIRMATION_COMMITMENT: str = os.getenv("CONFIRMATION_COMMITMENT", "confirmed")
+    CONFIRMATION_POLL_INTERVAL: float = float(
+        os.getenv("CONFIRMATION_POLL_INTERVAL", "0.5")
+    )
+    CONFIRMATION_REBROADCAST_INTERVAL: float = float(
+        os.getenv("CONFIRMATION_REBROADCAST_INTERVAL", "2")
+    )
+
+    # Durable payout job queue
+    PAYOUT_WORKERS: int = int(os.getenv("PAYOUT_WORKERS", "16"))
+    PAYOUT_JOB_MAX_ATTEMPTS: int = int(os.getenv("PAYOUT_JOB_MAX_ATTEMPTS", "3"))
+    PAYOUT_JOB_LEASE: float = float(os.getenv("PAYOUT_JOB_LEASE", "300"))
+    PAYOUT_JOB_POLL_INTERVAL: float = float(os.getenv("PAYOUT_JOB_POLL_INTERVAL", "1"))
+    PAYOUT_JOB_RETRY_DELAY: float = float(os.getenv("PAYOUT_JOB_RETRY_DELAY", "2"))
+
+    # One payout per contract at a time; the Mongo lease spans API processes
+    CLAIM_LEASE_ENABLED: bool = os.getenv("CLAIM_LEASE_ENABLED", "False") == "True"
+    CLAIM_LEASE_TTL: float = float(os.getenv("CLAIM_LEASE_TTL", "60"))
+    CLAIM_LEASE_WAIT: float = float(os.getenv("CLAIM_LEASE_WAIT", "300"))
+
+    # Cross-contract payout batching into v0 transactions
+    PAYOUT_BATCH_ENABLED: bool = os.getenv("PAYOUT_BATCH_ENABLED", "False") == "True"
+    PAYOUT_BATCH_WINDOW: float = float(os.getenv("PAYOUT_BATCH_WINDOW", "0.05"))
+    # Address lookup table of the payout wallet, created on first use if empty
+    PAYOUT_LOOKUP_TABLE: str = os.getenv("PAYOUT_LOOKUP_TABLE", "")
+    # Payouts an account must appear in before it is added to the lookup table;
+    # until then it is batched as a static account key
+    PAYOUT_LOOKUP_MIN_USES: int = int(os.getenv("PAYOUT_LOOKUP_MIN_USES", "2"))
+
+    # Background polling of partially claimed posts, paying new milestones
+    METRICS_POLLER_ENABLED: bool = (
+        os.getenv("METRICS_POLLER_ENABLED", "False") == "True"
+    )
+    METRICS_POLL_INTERVAL: float = float(os.getenv("METRICS_POLL_INTERVAL", "60"))
+    # Longest interval for posts whose likes stopped growing
+    METRICS_POLL_MAX_INTERVAL: float = float(
+        os.getenv("METRICS_POLL_MAX_INTERVAL", "3600")
+    )
+
 
 # Create settings instance
 settings = Settings()
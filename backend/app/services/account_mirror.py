@@ -0,0 +1,171 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from solana.rpc.commitment import Commitment, Confirmed
+from solana.rpc.websocket_api import connect
+from solders.rpc.responses import ProgramNotification
+
+from app.core.config import settings
+from app.services.db_service import upsert_onchain_contracts
+from app.services.solana_service import (
+    PROGRAM_ID,
+    PaymentContractSnapshot,
+    load_program_snapshot,
+    program_account_filters,
+    snapshot_from_account,
+)
+
+Resync = Callable[[], Awaitable[Tuple[int, List[PaymentContractSnapshot]]]]
+Persist = Callable[[List[PaymentContractSnapshot]], Awaitable[None]]
+
+
+class AccountMirror:
+    """
+    In-process mirror of every PaymentContract account.
+
+    A programSubscribe websocket on PROGRAM_ID pushes each account update, which is
+    decoded and applied to the mirror. After every (re)connect the mirror is
+    resynced from a bulk getProgramAccounts snapshot so updates missed while
+    disconnected are not lost, and accounts closed meanwhile are dropped.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        resync: Resync = load_program_snapshot,
+        persist: Optional[Persist] = None,
+        commitment: Commitment = Confirmed,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.ws_url = ws_url
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._resync = resync
+        self._persist = persist
+        self._snapshots: Dict[str, PaymentContractSnapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.synced = asyncio.Event()
+        self.updates = 0
+        self.reconnects = 0
+
+    def get(self, address: str) -> Optional[PaymentContractSnapshot]:
+        """Return the mirrored snapshot, or None if unknown or not yet synced."""
+        if not self.synced.is_set():
+            return None
+        return self._snapshots.get(address)
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def apply(self, snapshot: PaymentContractSnapshot) -> bool:
+        """Apply a snapshot unless a newer slot is already mirrored."""
+        current = self._snapshots.get(snapshot.address)
+        if current is not None and current.slot > snapshot.slot:
+            return False
+        self._snapshots[snapshot.address] = snapshot
+        return True
+
+    def remove(self, address: str, slot: int) -> None:
+        """Drop a closed account unless a newer snapshot is already mirrored."""
+        current = self._snapshots.get(address)
+        if current is not None and current.slot <= slot:
+            del self._snapshots[address]
+
+    async def start(self) -> None:
+        """Start the background subscriber."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background subscriber."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.synced.clear()
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Account mirror disconnected: {str(e)}")
+
+            if self.synced.is_set():
+                # The last session worked, so start backing off from scratch
+                delay = self.reconnect_delay
+
+            # Updates are missed from here until the next resync
+            self.synced.clear()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self) -> None:
+        async with connect(self.ws_url) as websocket:
+            await websocket.program_subscribe(
+                PROGRAM_ID,
+                commitment=self.commitment,
+                encoding="base64",
+                filters=program_account_filters(),
+            )
+            # Wait for the subscription id before taking the snapshot, so every
+            # change after the snapshot is also delivered as a notification
+            await websocket.recv()
+
+            slot, snapshots = await self._resync()
+            for snapshot in snapshots:
+                self.apply(snapshot)
+            # Accounts missing from the scan were closed while we were away
+            scanned = {snapshot.address for snapshot in snapshots}
+            for address in [a for a in self._snapshots if a not in scanned]:
+                self.remove(address, slot)
+            if self._persist is not None:
+                await self._persist(snapshots)
+            self.synced.set()
+            logger.info(f"Account mirror synced {len(snapshots)} contracts")
+
+            while True:
+                messages = await websocket.recv()
+                for message in messages:
+                    if isinstance(message, ProgramNotification):
+                        await self._handle(message)
+
+    async def _handle(self, notification: ProgramNotification) -> None:
+        slot = notification.result.context.slot
+        keyed_account = notification.result.value
+        address = str(keyed_account.pubkey)
+
+        snapshot = snapshot_from_account(address, keyed_account.account, slot)
+        self.updates += 1
+        if snapshot is None:
+            # Closed or no longer a PaymentContract
+            self.remove(address, slot)
+            return
+
+        if self.apply(snapshot) and self._persist is not None:
+            await self._persist([snapshot])
+
+
+def _default_ws_url() -> str:
+    return settings.SOLANA_WS_URL or settings.SOLANA_RPC_URL.replace("http", "ws", 1)
+
+
+async def _persist_to_db(snapshots: List[PaymentContractSnapshot]) -> None:
+    await upsert_onchain_contracts([snapshot.to_dict() for snapshot in snapshots])
+
+
+# Create a singleton instance, only started when ACCOUNT_MIRROR_ENABLED is set
+account_mirror = AccountMirror(
+    ws_url=_default_ws_url(),
+    persist=_persist_to_db if settings.ACCOUNT_MIRROR_PERSIST else None,
+)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+from loguru import logger
+from solders.hash import Hash
+
+from app.core.config import settings
+from app.services.rpc_client import get_rpc_client
+
+
+class CachedBlockhash(NamedTuple):
+    blockhash: Hash
+    last_valid_block_height: int
+    fetched_at: float
+
+
+async def fetch_latest_blockhash() -> CachedBlockhash:
+    """Fetch the latest blockhash through the shared RPC client."""
+    response = await get_rpc_client().get_latest_blockhash()
+    return CachedBlockhash(
+        blockhash=response.value.blockhash,
+        last_valid_block_height=response.value.last_valid_block_height,
+        fetched_at=time.monotonic(),
+    )
+
+
+class BlockhashPrefetcher:
+    """
+    Keeps a recent blockhash ready for payout transactions.
+
+    A background task refreshes the blockhash every `refresh_interval` seconds.
+    A blockhash stays valid for roughly 150 blocks (about a minute), so `get`
+    refreshes on demand once the cached value is older than `max_age`, which
+    covers startup and a stalled background task.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[CachedBlockhash]] = fetch_latest_blockhash,
+        refresh_interval: float = 5.0,
+        max_age: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._fetch = fetch
+        self._clock = clock
+        self._cached: Optional[CachedBlockhash] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._cached is not None
+            and self._clock() - self._cached.fetched_at < self.max_age
+        )
+
+    async def get(self) -> CachedBlockhash:
+        """Return a blockhash that is safe to sign with, refreshing if needed."""
+        if self._is_fresh():
+            return self._cached
+        return await self.refresh()
+
+    async def refresh(self) -> CachedBlockhash:
+        """Fetch a new blockhash, sharing one request between concurrent callers."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        inflight = self._inflight
+        try:
+            return await asyncio.shield(inflight)
+        finally:
+            if self._inflight is inflight and inflight.done():
+                self._inflight = None
+
+    async def _refresh(self) -> CachedBlockhash:
+        cached = await self._fetch()
+        self._cached = cached._replace(fetched_at=self._clock())
+        self.refreshes += 1
+        return self._cached
+
+    def invalidate(self) -> None:
+        """Drop the cached blockhash, e.g. after a BlockhashNotFound error."""
+        self._cached = None
+
+    async def start(self) -> None:
+        """Start the background refresh task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error refreshing blockhash: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Create a singleton instance of the blockhash prefetcher
+blockhash_prefetcher = BlockhashPrefetcher(
+    refresh_interval=settings.BLOCKHASH_REFRESH_INTERVAL,
+    max_age=settings.BLOCKHASH_MAX_AGE,
+)
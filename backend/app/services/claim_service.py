@@ -0,0 +1,283 @@
+import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.services.db_service import get_contract, update_contract_with_post
+from app.services.llm_service import verify_post_content
+from app.services.singleflight import KeyedLock, KeyedSingleflight, LeasedLock
+from app.services.solana_service import load_payment_contract, transfer_tranches
+from app.services.twitter_service import validate_post_url
+
+# Job kinds in the payout queue: claims, and milestones found by the metrics poller
+CLAIM_JOB = "claim"
+MILESTONE_JOB = "milestone"
+
+
+class TrancheTransferError(Exception):
+    """Raised when some qualified tranches could not be paid, so the claim is retried."""
+
+
+def claim_result(
+    success: bool,
+    message: str,
+    reason: Optional[str] = None,
+    tranches: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Build a claim outcome in the shape of the /claim ContractResponse."""
+    return {
+        "success": success,
+        "message": message,
+        "reason": reason,
+        "tranches": tranches,
+    }
+
+
+async def process_claim(contract_address: str, post_url: str) -> Dict[str, Any]:
+    """
+    Verify a claim and distribute every tranche the post qualifies for.
+
+    Validates:
+    1. Contract exists in database
+    2. Post URL is valid and accessible
+    3. Post is authored by the expected Twitter handle
+    4. Post content matches verification text requirements
+    5. Post has enough likes to qualify for tranches
+
+    Rejected claims are returned as an unsuccessful result. Transient failures raise,
+    so the payout queue retries the claim; the retry re-reads paid_tranches from the
+    chain and only pays what is still outstanding.
+
+    Args:
+        contract_address: The contract address
+        post_url: The Twitter post URL
+
+    Returns:
+        Dict[str, Any]: success, message, reason and per-tranche results
+    """
+    # Get contract data from database
+    contract = await get_contract(contract_address)
+    if not contract:
+        return claim_result(False, "Contract not found")
+
+    # Check if contract is already claimed
+    if contract.get("status") == "claimed":
+        return claim_result(
+            False, "Contract has already been claimed", reason="already_claimed"
+        )
+
+    # Get contract details
+    twitter_handle = contract["twitter_handle"]
+    verification_text = contract["verification_text"]
+
+    # Validate post URL; author and text may come from the cache, likes are fresh.
+    # Rate limits and Twitter outages raise, so the claim is retried.
+    post_info = await validate_post_url(post_url, refresh_metrics=True)
+    if not post_info:
+        return claim_result(False, "Invalid post URL or tweet not found")
+
+    # Check if the post author matches the expected Twitter handle
+    if post_info["author_handle"].lower() != twitter_handle.lower().strip("@"):
+        return claim_result(
+            False,
+            f"Post not authored by the expected influencer: {twitter_handle}",
+            reason="wrong_author",
+        )
+
+    # Verify post content against verification text requirements using LLM
+    content_valid = await verify_post_content(post_info["text"], verification_text)
+    if not content_valid:
+        return claim_result(
+            False,
+            "Post content does not match verification requirements",
+            reason="content_mismatch",
+        )
+
+    return await pay_qualified_tranches(contract, post_url, post_info["public_metrics"])
+
+
+async def pay_qualified_tranches(
+    contract: Dict[str, Any], post_url: str, metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Distribute every unpaid tranche a verified post qualifies for.
+
+    Args:
+        contract: The contract document
+        post_url: The verified Twitter post URL
+        metrics: public_metrics of the post
+
+    Returns:
+        Dict[str, Any]: success, message, reason and per-tranche results
+
+    Raises:
+        TrancheTransferError: If some qualified tranches could not be paid
+    """
+    contract_address = contract["contract_address"]
+
+    # Use the custom tranche distribution specified in the contract
+    number_of_tranches = contract.get("number_of_tranches", 0)
+    tranche_distribution = contract.get("tranche_distribution", [])
+
+    if not number_of_tranches or not tranche_distribution:
+        return claim_result(
+            False,
+            "Contract does not have valid tranche configuration",
+            reason="invalid_tranches",
+        )
+
+    # Calculate how many tranches the post qualifies for based on likes
+    like_count = metrics.get("like_count", 0)
+    qualified_tranches = sum(
+        1 for threshold in tranche_distribution if like_count >= threshold
+    )
+
+    # Always read the account: a cached or mirrored paid_tranches may predate a
+    # payout made by this or another process
+    contract_snapshot = await load_payment_contract(contract_address, fresh=True)
+    if not contract_snapshot:
+        return claim_result(
+            False,
+            "Unable to load contract state from the chain",
+            reason="invalid_contract",
+        )
+    paid_tranches = contract_snapshot.paid_tranches
+
+    qualified_tranches = max(qualified_tranches - paid_tranches, 0)
+    if qualified_tranches == 0:
+        return claim_result(
+            False,
+            f"Post does not have enough likes to qualify for any tranche. "
+            f"Current likes: {like_count}",
+            reason="insufficient_likes",
+        )
+
+    # Distribute all qualified tranches in as few transactions as possible
+    tranche_results = await transfer_tranches(
+        contract_address, qualified_tranches, contract_snapshot
+    )
+    distributed_count = sum(1 for result in tranche_results if result["success"])
+
+    # Update contract in database with post URL and metrics.
+    # tranche_count never changes on-chain, so the snapshot is still valid here.
+    if paid_tranches + distributed_count < contract_snapshot.tranche_count:
+        status = "partially_claimed"
+    else:
+        status = "claimed"
+
+    current_time = datetime.datetime.now().isoformat()
+    update_data = {
+        "post_url": str(post_url),
+        "metrics": metrics,
+        "status": status,
+        # Tranches paid by this claim or milestone
+        "tranches_distributed": distributed_count,
+        # All tranches paid so far, which the metrics poller compares against
+        "paid_tranches": paid_tranches + distributed_count,
+        "claimed_at": current_time,  # Store the actual current time
+    }
+
+    await update_contract_with_post(contract_address, update_data)
+
+    if distributed_count < qualified_tranches:
+        errors = {result["error"] for result in tranche_results if result["error"]}
+        errors = errors or {"no_transaction_sent"}
+        logger.warning(
+            f"Paid {distributed_count} of {qualified_tranches} tranches of "
+            f"{contract_address}: {errors}"
+        )
+        raise TrancheTransferError(
+            f"Paid {distributed_count} of {qualified_tranches} qualified tranches: "
+            + ", ".join(sorted(errors))
+        )
+
+    return claim_result(
+        True,
+        f"Successfully claimed contract and distributed {distributed_count} tranches",
+        tranches=tranche_results,
+    )
+
+
+async def process_milestone(
+    contract_address: str, post_url: str, metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Pay the tranches a post verified by an earlier claim has grown into.
+
+    The post content and author were verified when the contract was first
+    claimed, so only the metrics read by the poller are checked again.
+
+    Args:
+        contract_address: The contract address
+        post_url: The post URL the metrics were read from
+        metrics: public_metrics of the post
+
+    Returns:
+        Dict[str, Any]: success, message, reason and per-tranche results
+    """
+    contract = await get_contract(contract_address)
+    if not contract:
+        return claim_result(False, "Contract not found")
+
+    # The contract was claimed in full or with another post since the job was queued
+    verified = contract.get("status") == "partially_claimed"
+    if not verified or contract.get("post_url") != str(post_url):
+        return claim_result(
+            False, "Contract has no verified post to pay out", reason="not_verified"
+        )
+
+    return await pay_qualified_tranches(contract, post_url, metrics)
+
+
+async def handle_claim_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a queued claim job.
+
+    Jobs on the same contract take turns on contract_locks, so no two of them
+    read the same paid_tranches and pay twice; jobs on different contracts run in
+    parallel. Only identical claims, same contract and post, share one execution
+    through claim_flights; any other claim runs its own checks.
+    """
+    contract_address = payload["contract_address"]
+    post_url = payload["post_url"]
+
+    async def run() -> Dict[str, Any]:
+        async with contract_locks.hold(contract_address):
+            return await process_claim(contract_address, post_url)
+
+    return await claim_flights.do(f"{CLAIM_JOB}:{contract_address}:{post_url}", run)
+
+
+async def handle_milestone_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a queued milestone payout.
+
+    Milestones take turns with claims on contract_locks. Only milestones of
+    the same contract, post and like count share one execution.
+    """
+    contract_address = payload["contract_address"]
+    post_url = payload["post_url"]
+    metrics = payload["metrics"]
+
+    async def run() -> Dict[str, Any]:
+        async with contract_locks.hold(contract_address):
+            return await process_milestone(contract_address, post_url, metrics)
+
+    like_count = metrics.get("like_count", 0)
+    return await claim_flights.do(
+        f"{MILESTONE_JOB}:{contract_address}:{post_url}:{like_count}", run
+    )
+
+
+# Create singleton instances: identical claims in flight share one execution,
+# and payouts are serialized per contract, through Mongo leases when several
+# processes pay out
+claim_flights = KeyedSingleflight()
+if settings.CLAIM_LEASE_ENABLED:
+    contract_locks = LeasedLock(
+        "claim",
+        ttl_seconds=settings.CLAIM_LEASE_TTL,
+        wait_timeout=settings.CLAIM_LEASE_WAIT,
+    )
+else:
+    contract_locks = KeyedLock()
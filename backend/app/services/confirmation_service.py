@@ -0,0 +1,286 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from loguru import logger
+from solana.rpc.commitment import Commitment, Confirmed, Finalized, Processed
+from solana.rpc.types import TxOpts
+from solana.rpc.websocket_api import connect
+from solders.rpc.responses import SignatureNotification
+from solders.signature import Signature
+
+from app.core.config import settings
+from app.services.rpc_client import get_rpc_client
+
+# getSignatureStatuses accepts at most 256 signatures per call
+MAX_SIGNATURES_PER_CALL = 256
+
+# Same ordering as int(TransactionConfirmationStatus)
+_COMMITMENT_LEVELS = {Processed: 0, Confirmed: 1, Finalized: 2}
+
+Callback = Callable[[Dict[str, Any]], None]
+
+
+class _PendingTransaction:
+    def __init__(
+        self,
+        raw_transaction: bytes,
+        last_valid_block_height: int,
+        future: asyncio.Future,
+        sent_at: float,
+    ):
+        self.raw_transaction = raw_transaction
+        self.last_valid_block_height = last_valid_block_height
+        self.future = future
+        self.last_sent_at = sent_at
+        self.callbacks: List[Callback] = []
+
+
+class ConfirmationTracker:
+    """
+    Tracks submitted transactions until they reach the target commitment.
+
+    Payouts are sent without waiting for confirmation and handed to the tracker,
+    which checks every outstanding signature with one getSignatureStatuses call
+    per poll, or is notified through signatureSubscribe when a websocket URL is
+    configured. Transactions are rebroadcast while their blockhash is still valid
+    and resolved as expired once the chain has moved past last_valid_block_height.
+
+    Outcomes are dicts with the signature, a status of confirmed, failed or
+    expired, the slot and the transaction error, if any.
+    """
+
+    def __init__(
+        self,
+        commitment: Commitment = Confirmed,
+        poll_interval: float = 0.5,
+        rebroadcast_interval: float = 2.0,
+        ws_url: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.commitment = commitment
+        self.poll_interval = poll_interval
+        self.rebroadcast_interval = rebroadcast_interval
+        self.ws_url = ws_url
+        self._clock = clock
+        self._pending: Dict[Signature, _PendingTransaction] = {}
+        self._poll_task: Optional[asyncio.Task] = None
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws = None
+        self._subscribe_tasks: Set[asyncio.Task] = set()
+        self.confirmed = 0
+        self.failed = 0
+        self.expired = 0
+        self.rebroadcasts = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(
+        self,
+        signature: Signature,
+        raw_transaction: bytes,
+        last_valid_block_height: int,
+        callback: Optional[Callback] = None,
+    ) -> asyncio.Future:
+        """
+        Start tracking a transaction that was just sent.
+
+        Args:
+            signature: The transaction signature
+            raw_transaction: The signed transaction, used for rebroadcasts
+            last_valid_block_height: Block height after which the blockhash expires
+            callback: Called with the outcome once the transaction is resolved
+
+        Returns:
+            asyncio.Future: Resolved with the outcome
+        """
+        pending = self._pending.get(signature)
+        if pending is None:
+            future = asyncio.get_running_loop().create_future()
+            pending = _PendingTransaction(
+                raw_transaction, last_valid_block_height, future, self._clock()
+            )
+            self._pending[signature] = pending
+            if self._ws is not None:
+                task = asyncio.create_task(self._ws_subscribe(signature))
+                self._subscribe_tasks.add(task)
+                task.add_done_callback(self._subscribe_tasks.discard)
+
+        if callback is not None:
+            pending.callbacks.append(callback)
+
+        # Outside of the app lifespan (scripts) the poller starts on first use
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        return pending.future
+
+    async def start(self) -> None:
+        """Start polling and, when configured, the signatureSubscribe websocket."""
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+        if self.ws_url and self._ws_task is None:
+            self._ws_task = asyncio.create_task(self._ws_loop())
+
+    async def stop(self) -> None:
+        """Stop tracking. Outstanding futures are left unresolved."""
+        tasks = [task for task in (self._poll_task, self._ws_task) if task]
+        tasks.extend(self._subscribe_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._poll_task = None
+        self._ws_task = None
+
+    def _resolve(
+        self,
+        signature: Signature,
+        status: str,
+        slot: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        pending = self._pending.pop(signature, None)
+        if pending is None:
+            return
+
+        outcome = {
+            "signature": str(signature),
+            "status": status,
+            "slot": slot,
+            "error": error,
+        }
+        if status == "confirmed":
+            self.confirmed += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            self.expired += 1
+
+        if not pending.future.done():
+            pending.future.set_result(outcome)
+        for callback in pending.callbacks:
+            try:
+                callback(outcome)
+            except Exception as e:
+                logger.error(f"Error in confirmation callback: {str(e)}")
+
+    async def poll_once(self) -> None:
+        """Check every outstanding signature, then rebroadcast or expire the rest."""
+        if not self._pending:
+            return
+
+        client = get_rpc_client()
+        signatures = list(self._pending)
+        chunks = [
+            signatures[start : start + MAX_SIGNATURES_PER_CALL]
+            for start in range(0, len(signatures), MAX_SIGNATURES_PER_CALL)
+        ]
+        # Issued together so the RPC session sends them as one JSON-RPC batch
+        *responses, height = await asyncio.gather(
+            *(client.get_signature_statuses(chunk) for chunk in chunks),
+            client.get_block_height(self.commitment),
+        )
+        for chunk, response in zip(chunks, responses):
+            for signature, status in zip(chunk, response.value):
+                if status is None:
+                    continue
+                if status.err is not None:
+                    self._resolve(signature, "failed", status.slot, str(status.err))
+                elif (
+                    status.confirmation_status is not None
+                    and int(status.confirmation_status)
+                    >= _COMMITMENT_LEVELS[self.commitment]
+                ):
+                    self._resolve(signature, "confirmed", status.slot)
+
+        if not self._pending:
+            return
+
+        block_height = height.value
+        now = self._clock()
+        for signature, pending in list(self._pending.items()):
+            if block_height > pending.last_valid_block_height:
+                self._resolve(signature, "expired", error="blockhash_expired")
+            elif now - pending.last_sent_at >= self.rebroadcast_interval:
+                pending.last_sent_at = now
+                self.rebroadcasts += 1
+                try:
+                    await client.send_raw_transaction(
+                        pending.raw_transaction,
+                        opts=TxOpts(
+                            skip_preflight=True, skip_confirmation=True, max_retries=0
+                        ),
+                    )
+                except Exception as e:
+                    logger.warning(f"Error rebroadcasting {signature}: {str(e)}")
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error polling signature statuses: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _ws_subscribe(self, signature: Signature) -> None:
+        websocket = self._ws
+        if websocket is None:
+            return
+        try:
+            await websocket.signature_subscribe(signature, commitment=self.commitment)
+        except Exception as e:
+            # Polling still covers the signature
+            logger.warning(f"Error subscribing to {signature}: {str(e)}")
+
+    async def _ws_loop(self) -> None:
+        while True:
+            try:
+                async with connect(self.ws_url) as websocket:
+                    self._ws = websocket
+                    for signature in list(self._pending):
+                        await self._ws_subscribe(signature)
+
+                    while True:
+                        for message in await websocket.recv():
+                            if isinstance(message, SignatureNotification):
+                                self._handle_notification(websocket, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Signature websocket disconnected: {str(e)}")
+            finally:
+                self._ws = None
+            await asyncio.sleep(self.poll_interval)
+
+    def _handle_notification(self, websocket, message: SignatureNotification) -> None:
+        # Signature subscriptions end with their first notification
+        request = websocket.subscriptions.pop(message.subscription, None)
+        if request is None:
+            return
+        err = message.result.value.err
+        self._resolve(
+            request.signature,
+            "failed" if err is not None else "confirmed",
+            message.result.context.slot,
+            str(err) if err is not None else None,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return outcome counters and the number of outstanding signatures."""
+        return {
+            "pending": len(self._pending),
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "rebroadcasts": self.rebroadcasts,
+        }
+
+
+# Create a singleton instance of the confirmation tracker
+confirmation_tracker = ConfirmationTracker(
+    commitment=settings.CONFIRMATION_COMMITMENT,
+    poll_interval=settings.CONFIRMATION_POLL_INTERVAL,
+    rebroadcast_interval=settings.CONFIRMATION_REBROADCAST_INTERVAL,
+    ws_url=settings.SOLANA_WS_URL or None,
+)
@@ -0,0 +1,130 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class ContractCache:
+    """
+    Bounded LRU cache of decoded PaymentContract snapshots.
+
+    Entries are keyed by contract address and stamped with the slot they were read
+    at, so an older read never overwrites a newer one. Entries expire after a TTL
+    and are invalidated explicitly when we change the account ourselves. Readers
+    take begin_read() before the RPC call and pass it to put(), so a read that was
+    already in flight when the account was invalidated is not cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # address -> (snapshot, slot, stored_at)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        # address -> time of the last invalidation, oldest first
+        self._invalidated_at: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, address: str) -> Optional[Any]:
+        """Return the cached snapshot for an address, or None on a miss."""
+        entry = self._entries.get(address)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        snapshot, _, stored_at = entry
+        if self._clock() - stored_at > self.ttl_seconds:
+            del self._entries[address]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(address)
+        self.hits += 1
+        return snapshot
+
+    def begin_read(self) -> float:
+        """Return the token to pass to put() for a read starting now."""
+        return self._clock()
+
+    def put(
+        self,
+        address: str,
+        snapshot: Any,
+        slot: int,
+        read_started: Optional[float] = None,
+    ) -> None:
+        """
+        Store a snapshot unless a newer slot is already cached.
+
+        With read_started, the snapshot is also dropped if the address was
+        invalidated after the read began, or if the read is older than the TTL.
+        """
+        if self.max_entries <= 0:
+            return
+
+        if read_started is not None:
+            if self._clock() - read_started > self.ttl_seconds:
+                return
+            invalidated_at = self._invalidated_at.get(address)
+            if invalidated_at is not None and read_started <= invalidated_at:
+                return
+
+        entry = self._entries.get(address)
+        if entry is not None and entry[1] > slot:
+            return
+
+        self._entries[address] = (snapshot, slot, self._clock())
+        self._entries.move_to_end(address)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, address: str) -> None:
+        """Drop the cached snapshot for an address and fence reads in flight."""
+        now = self._clock()
+        self._invalidated_at.pop(address, None)
+        self._invalidated_at[address] = now
+        # Reads older than the TTL are never cached, so older marks can go
+        while self._invalidated_at:
+            oldest, invalidated_at = next(iter(self._invalidated_at.items()))
+            if now - invalidated_at <= self.ttl_seconds:
+                break
+            del self._invalidated_at[oldest]
+
+        if self._entries.pop(address, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._invalidated_at.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Create a singleton instance of the contract cache
+contract_cache = ContractCache(
+    max_entries=settings.CONTRACT_CACHE_SIZE,
+    ttl_seconds=settings.CONTRACT_CACHE_TTL,
+)
@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from solana.rpc.types import DataSliceOpts
+
+from app.services.contract_cache import contract_cache
+from app.services.db_service import ensure_onchain_indexes, upsert_onchain_contracts
+from app.services.payment_contract_decoder import (
+    HEADER_SIZE,
+    decode_payment_contract_header,
+)
+from app.services.rpc_client import get_rpc_client
+from app.services.solana_service import (
+    PROGRAM_ID,
+    load_program_contracts,
+    program_account_filters,
+)
+
+# Indexes are created on first use rather than at startup
+_indexes_ready = False
+
+
+async def list_owner_contracts(owner: str) -> List[Dict[str, Any]]:
+    """
+    List every contract created by an owner with a single getProgramAccounts call.
+
+    Only the fixed-size account prefix is requested through dataSlice, so the
+    response carries no recipients and no paid_tranches.
+
+    Args:
+        owner: The owner public key
+
+    Returns:
+        List of contract summaries with address, owner, amounts and counts
+    """
+    response = await get_rpc_client().get_program_accounts(
+        PROGRAM_ID,
+        encoding="base64",
+        data_slice=DataSliceOpts(offset=0, length=HEADER_SIZE),
+        filters=program_account_filters(owner),
+    )
+
+    summaries = []
+    for keyed_account in response.value:
+        try:
+            header = decode_payment_contract_header(keyed_account.account.data)
+        except Exception as e:
+            logger.error(f"Error decoding contract {keyed_account.pubkey}: {str(e)}")
+            continue
+
+        summaries.append(
+            {
+                "address": str(keyed_account.pubkey),
+                "owner": str(header.owner),
+                "total_amount": header.total_amount,
+                "tranche_count": header.tranche_count,
+                "recipient_count": header.recipient_count,
+            }
+        )
+    return summaries
+
+
+async def index_contracts(owner: Optional[str] = None) -> int:
+    """
+    Bulk load PaymentContract accounts and upsert them into onchain_contracts.
+
+    Args:
+        owner: Only index contracts created by this owner, all contracts if None
+
+    Returns:
+        int: Number of documents inserted or modified
+    """
+    global _indexes_ready
+
+    if not _indexes_ready:
+        await ensure_onchain_indexes()
+        _indexes_ready = True
+
+    read_started = contract_cache.begin_read()
+    snapshots = await load_program_contracts(owner)
+    for snapshot in snapshots:
+        contract_cache.put(snapshot.address, snapshot, snapshot.slot, read_started)
+
+    written = await upsert_onchain_contracts(
+        [snapshot.to_dict() for snapshot in snapshots]
+    )
+    logger.info(
+        f"Indexed {len(snapshots)} contracts"
+        + (f" for owner {owner}" if owner else "")
+        + f", {written} written"
+    )
+    return written
@@ -1,8 +1,10 @@
 import motor.motor_asyncio
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from loguru import logger
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # MongoDB connection string - in production, use environment variables
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
@@ -85,6 +87,51 @@ async def get_contract(contract_address: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+async def get_contracts(contract_addresses: List[str]) -> List[Dict[str, Any]]:
+    """
+    Retrieve several contracts from MongoDB with a single query.
+
+    Args:
+        contract_addresses: The Solana contract addresses
+
+    Returns:
+        List of the contracts that were found, in no particular order
+    """
+    try:
+        cursor = db.contracts.find({"contract_address": {"$in": contract_addresses}})
+        return await cursor.to_list(length=None)
+
+    except Exception as e:
+        logger.error(f"Database error while retrieving contracts: {str(e)}")
+        return []
+
+
+async def get_partially_claimed_contracts() -> List[Dict[str, Any]]:
+    """
+    Retrieve every contract with a verified post and tranches left to pay.
+
+    Returns:
+        List of contracts with the fields the metrics poller needs
+    """
+    try:
+        cursor = db.contracts.find(
+            {"status": "partially_claimed", "post_url": {"$exists": True}},
+            {
+                "_id": 0,
+                "contract_address": 1,
+                "post_url": 1,
+                "tranche_distribution": 1,
+                "tranches_distributed": 1,
+                "paid_tranches": 1,
+            },
+        )
+        return await cursor.to_list(length=None)
+
+    except Exception as e:
+        logger.error(f"Database error while retrieving claimed contracts: {str(e)}")
+        return []
+
+
 async def update_contract_with_post(
     contract_address: str, update_data: Dict[str, Any]
 ) -> bool:
@@ -115,3 +162,402 @@ async def update_contract_with_post(
     except Exception as e:
         logger.error(f"Database error while updating contract with post: {str(e)}")
         return False
+
+
+async def upsert_onchain_contracts(snapshots: List[Dict[str, Any]]) -> int:
+    """
+    Upsert decoded on-chain contract state into the onchain_contracts collection.
+
+    A document is only replaced when the incoming snapshot is not older than the
+    stored one.
+
+    Args:
+        snapshots: Contract snapshots with at least "address" and "slot" keys
+
+    Returns:
+        int: Number of documents inserted or modified
+    """
+    if not snapshots:
+        return 0
+
+    try:
+        operations = [
+            UpdateOne(
+                {"address": snapshot["address"], "slot": {"$lte": snapshot["slot"]}},
+                {"$set": dict(snapshot, updated_at=datetime.utcnow())},
+                upsert=True,
+            )
+            for snapshot in snapshots
+        ]
+        result = await db.onchain_contracts.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    except BulkWriteError as e:
+        # A newer stored slot makes the upsert collide on the unique address index,
+        # which is exactly the stale write we want to drop
+        details = e.details
+        unexpected = [
+            error for error in details.get("writeErrors", []) if error["code"] != 11000
+        ]
+        if unexpected:
+            logger.error(
+                f"Database error while upserting on-chain contracts: {unexpected}"
+            )
+        return details.get("nUpserted", 0) + details.get("nModified", 0)
+
+    except Exception as e:
+        logger.error(f"Database error while upserting on-chain contracts: {str(e)}")
+        return 0
+
+
+async def ensure_onchain_indexes() -> None:
+    """Create the indexes used by the onchain_contracts collection."""
+    try:
+        await db.onchain_contracts.create_index([("address", ASCENDING)], unique=True)
+        await db.onchain_contracts.create_index([("owner", ASCENDING)])
+    except Exception as e:
+        logger.error(f"Database error while creating on-chain indexes: {str(e)}")
+
+
+async def get_onchain_contracts_by_owner(owner: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve the indexed on-chain state of every contract created by an owner.
+
+    Args:
+        owner: The owner public key
+
+    Returns:
+        List of on-chain contract documents without the Mongo _id
+    """
+    try:
+        cursor = db.onchain_contracts.find({"owner": owner}, {"_id": 0})
+        return await cursor.to_list(length=None)
+
+    except Exception as e:
+        logger.error(f"Database error while retrieving on-chain contracts: {str(e)}")
+        return []
+
+
+async def get_twitter_users(
+    ids: Optional[List[str]] = None,
+    usernames: Optional[List[str]] = None,
+    max_age: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve cached Twitter users by id or by username.
+
+    Args:
+        ids: Twitter user ids
+        usernames: Usernames, matched case-insensitively
+        max_age: Ignore entries not refreshed within this many seconds
+
+    Returns:
+        List of user documents with "id" and "username", without the Mongo _id
+    """
+    clauses = []
+    if ids:
+        clauses.append({"id": {"$in": list(ids)}})
+    if usernames:
+        clauses.append(
+            {"username_lower": {"$in": [username.lower() for username in usernames]}}
+        )
+    if not clauses:
+        return []
+
+    query: Dict[str, Any] = {"$or": clauses}
+    if max_age is not None:
+        query["updated_at"] = {"$gte": datetime.utcnow() - timedelta(seconds=max_age)}
+
+    try:
+        # Oldest first, so a handle that moved to another account resolves to the newest
+        cursor = db.twitter_users.find(query, {"_id": 0}).sort("updated_at", ASCENDING)
+        return await cursor.to_list(length=None)
+
+    except Exception as e:
+        logger.error(f"Database error while retrieving Twitter users: {str(e)}")
+        return []
+
+
+async def upsert_twitter_users(users: List[Dict[str, Any]]) -> int:
+    """
+    Store Twitter id <-> username pairs in the twitter_users collection.
+
+    Args:
+        users: Users with "id" and "username" keys
+
+    Returns:
+        int: Number of documents inserted or modified
+    """
+    if not users:
+        return 0
+
+    try:
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"id": user["id"]},
+                {
+                    "$set": {
+                        "id": user["id"],
+                        "username": user["username"],
+                        "username_lower": user["username"].lower(),
+                        "updated_at": now,
+                    }
+                },
+                upsert=True,
+            )
+            for user in users
+        ]
+        result = await db.twitter_users.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    except Exception as e:
+        logger.error(f"Database error while storing Twitter users: {str(e)}")
+        return 0
+
+
+async def ensure_twitter_user_indexes() -> None:
+    """Create the indexes used by the twitter_users collection."""
+    try:
+        await db.twitter_users.create_index([("id", ASCENDING)], unique=True)
+        # Not unique, a handle can move to another account
+        await db.twitter_users.create_index([("username_lower", ASCENDING)])
+    except Exception as e:
+        logger.error(f"Database error while creating Twitter user indexes: {str(e)}")
+
+
+async def insert_job(job: Dict[str, Any]) -> bool:
+    """
+    Insert a new job into the payout_jobs collection.
+
+    Args:
+        job: The job document, keyed by its job id in _id
+
+    Returns:
+        bool: True if the job was stored
+    """
+    try:
+        await db.payout_jobs.insert_one(job)
+        return True
+
+    except Exception as e:
+        logger.error(f"Database error while storing job: {str(e)}")
+        return False
+
+
+async def claim_next_job(
+    worker_id: str, lease_seconds: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Atomically lease the oldest runnable job to a worker.
+
+    A job is runnable when it is queued and its retry delay has passed, or when it
+    is running under a lease that expired because its worker died.
+
+    Args:
+        worker_id: The id of the worker taking the job
+        lease_seconds: How long the job is reserved for the worker
+
+    Returns:
+        The leased job document with its attempt counter incremented, or None
+    """
+    now = datetime.utcnow()
+    try:
+        return await db.payout_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {"status": "running", "locked_until": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "locked_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    except Exception as e:
+        logger.error(f"Database error while claiming job: {str(e)}")
+        return None
+
+
+async def update_job(job_id: str, worker_id: str, update_data: Dict[str, Any]) -> bool:
+    """
+    Update a leased job, only if the worker still holds its lease.
+
+    Args:
+        job_id: The job id
+        worker_id: The id of the worker holding the lease
+        update_data: Fields to set on the job
+
+    Returns:
+        bool: True if the job was updated
+    """
+    try:
+        result = await db.payout_jobs.update_one(
+            {"_id": job_id, "worker_id": worker_id},
+            {"$set": dict(update_data, updated_at=datetime.utcnow())},
+        )
+        return result.modified_count > 0
+
+    except Exception as e:
+        logger.error(f"Database error while updating job: {str(e)}")
+        return False
+
+
+async def renew_job(job_id: str, worker_id: str, lease_seconds: float) -> bool:
+    """
+    Extend the lease of a running job, only if the worker still holds it.
+
+    Args:
+        job_id: The job id
+        worker_id: The id of the worker holding the lease
+        lease_seconds: How long the job stays reserved from now
+
+    Returns:
+        bool: True if the lease was extended
+    """
+    now = datetime.utcnow()
+    try:
+        result = await db.payout_jobs.update_one(
+            {"_id": job_id, "worker_id": worker_id, "status": "running"},
+            {
+                "$set": {
+                    "locked_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                }
+            },
+        )
+        return result.matched_count > 0
+
+    except Exception as e:
+        logger.error(f"Database error while renewing job: {str(e)}")
+        return False
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve a job from the payout_jobs collection.
+
+    Args:
+        job_id: The job id
+
+    Returns:
+        The job document or None if not found
+    """
+    try:
+        return await db.payout_jobs.find_one({"_id": job_id})
+
+    except Exception as e:
+        logger.error(f"Database error while retrieving job: {str(e)}")
+        return None
+
+
+async def ensure_job_indexes() -> None:
+    """Create the indexes used to lease jobs from the payout_jobs collection."""
+    try:
+        await db.payout_jobs.create_index(
+            [("status", ASCENDING), ("available_at", ASCENDING)]
+        )
+        await db.payout_jobs.create_index(
+            [("status", ASCENDING), ("locked_until", ASCENDING)]
+        )
+    except Exception as e:
+        logger.error(f"Database error while creating job indexes: {str(e)}")
+
+
+async def acquire_lease(key: str, holder: str, ttl_seconds: float) -> bool:
+    """
+    Take the lease on a key unless another holder has a lease that has not expired.
+
+    Args:
+        key: The leased key
+        holder: The id of the process taking the lease
+        ttl_seconds: How long the lease lasts unless renewed
+
+    Returns:
+        bool: True if the lease was acquired
+    """
+    now = datetime.utcnow()
+    try:
+        await db.leases.find_one_and_update(
+            {
+                "_id": key,
+                "$or": [{"holder": None}, {"expires_at": {"$lt": now}}],
+            },
+            {
+                "$set": {
+                    "holder": holder,
+                    "acquired_at": now,
+                    "expires_at": now + timedelta(seconds=ttl_seconds),
+                }
+            },
+            upsert=True,
+        )
+        return True
+
+    except DuplicateKeyError:
+        # The key exists but did not match the filter, so someone else holds it
+        return False
+
+    except Exception as e:
+        logger.error(f"Database error while acquiring lease {key}: {str(e)}")
+        return False
+
+
+async def renew_lease(key: str, holder: str, ttl_seconds: float) -> bool:
+    """
+    Extend a lease that is still held.
+
+    Returns:
+        bool: True if the holder still had the lease
+    """
+    try:
+        result = await db.leases.update_one(
+            {"_id": key, "holder": holder},
+            {
+                "$set": {
+                    "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)
+                }
+            },
+        )
+        return result.matched_count > 0
+
+    except Exception as e:
+        logger.error(f"Database error while renewing lease {key}: {str(e)}")
+        return False
+
+
+async def release_lease(key: str, holder: str) -> bool:
+    """
+    Release a lease so another process can take it.
+
+    Args:
+        key: The leased key
+        holder: The id of the process holding the lease
+
+    Returns:
+        bool: True if the holder still had the lease
+    """
+    try:
+        update = await db.leases.update_one(
+            {"_id": key, "holder": holder},
+            {
+                "$set": {
+                    "holder": None,
+                    "released_at": datetime.utcnow(),
+                }
+            },
+        )
+        return update.matched_count > 0
+
+    except Exception as e:
+        logger.error(f"Database error while releasing lease {key}: {str(e)}")
+        return False
@@ -1,17 +1,14 @@
 #!/usr/bin/env python3
-import os
 import sys
 import asyncio
-import json
 from pathlib import Path
 import base58
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
-from solana.rpc.async_api import AsyncClient
-from solana.transaction import Transaction
-from anchorpy import Provider
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from solana.rpc.types import TxOpts
+from solana.transaction import Transaction, PACKET_DATA_SIZE
 import base64
-import requests
 from loguru import logger
 
 # Add the backend directory to the path so we can import modules from there
@@ -24,9 +21,15 @@ from app.contract_client.instructions.distribute_tranche import (
     distribute_tranche,
     DistributeTrancheAccounts,
 )
+from app.services.payment_contract_decoder import decode_payment_contract
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.fee_planner import COMPUTE_BUDGET_PLACEHOLDER, fee_planner
+from app.services.rpc_client import close_rpc_client, rpc_post
+from app.services.signer_service import signer_service
 
-# Default RPC URL (testnet)
-SOLANA_RPC_URL = "https://api.testnet.sonic.game"
+# Return from sendTransaction right away, confirmation_tracker waits for the commitment
+SEND_OPTIONS = TxOpts(skip_confirmation=True, preflight_commitment="processed")
 
 
 async def get_contract_data(payment_contract_address: str) -> dict:
@@ -43,8 +46,8 @@ async def get_contract_data(payment_contract_address: str) -> dict:
             "params": [payment_contract_address, {"encoding": "base64"}],
         }
 
-        # Make RPC request
-        response = requests.post(SOLANA_RPC_URL, json=payload)
+        # Make RPC request over the shared keep-alive session
+        response = await rpc_post(payload)
         if response.status_code != 200:
             logger.error(f"RPC request failed with status code: {response.status_code}")
             return None
@@ -62,61 +65,8 @@ async def get_contract_data(payment_contract_address: str) -> dict:
         account_data_b64 = result["result"]["value"]["data"][0]
         account_data = base64.b64decode(account_data_b64)
 
-        # Account data structure for PaymentContract:
-        # 1. Discriminator (8 bytes)
-        # 2. Owner (32 bytes) - Pubkey
-        # 3. Total amount (8 bytes) - u64
-        # 4. Tranche count (8 bytes) - u64
-        # 5. Recipients vector (4 bytes for length + n*32 bytes for pubkeys)
-        # 6. Paid tranches (8 bytes) - u64
-
-        # Skip 8-byte discriminator
-        offset = 8
-
-        # Extract owner pubkey (32 bytes)
-        owner_bytes = account_data[offset : offset + 32]
-        owner = str(Pubkey(owner_bytes))
-        offset += 32
-
-        # Extract total_amount (u64/8 bytes)
-        total_amount = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract tranche_count (u64/8 bytes)
-        tranche_count = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract recipients vector
-        # First 4 bytes indicate vector length
-        recipients_len = int.from_bytes(
-            account_data[offset : offset + 4], byteorder="little"
-        )
-        offset += 4
-
-        recipients = []
-        for _ in range(recipients_len):
-            recipient_bytes = account_data[offset : offset + 32]
-            recipient = str(Pubkey(recipient_bytes))
-            recipients.append(recipient)
-            offset += 32
-
-        # Extract paid_tranches (u64/8 bytes)
-        paid_tranches = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-
-        # Construct and return the parsed data
-        contract_data = {
-            "owner": owner,
-            "total_amount": total_amount,
-            "tranche_count": tranche_count,
-            "recipients": recipients,
-            "paid_tranches": paid_tranches,
-        }
+        # Decode with the shared PaymentContract decoder
+        contract_data = decode_payment_contract(account_data).to_dict()
 
         return contract_data
 
@@ -125,101 +75,217 @@ async def get_contract_data(payment_contract_address: str) -> dict:
         return None
 
 
-async def main(payment_contract_address: str):
+def build_tranche_instructions(
+    contract_pubkey: Pubkey,
+    contract_data: Dict[str, Any],
+    count: int,
+    signer: Pubkey,
+) -> Tuple[List[int], List[Instruction]]:
     """
-    Main function to distribute a tranche for a given payment contract.
+    Build one distribute_tranche instruction for each of the next `count` tranches.
+
+    Returns:
+        The tranche indices and their instructions, both empty if all are paid
     """
-    print(f"Payment contract address: {payment_contract_address}")
+    paid_tranches = contract_data["paid_tranches"]
+    last_tranche = min(
+        paid_tranches + count,
+        contract_data["tranche_count"],
+        len(contract_data["recipients"]),
+    )
+    tranche_indices = list(range(paid_tranches, last_tranche))
+    instructions = [
+        distribute_tranche(
+            DistributeTrancheAccounts(
+                contract=contract_pubkey,
+                recipient=Pubkey.from_string(contract_data["recipients"][index]),
+                owner=signer,
+            ),
+            PROGRAM_ID,
+        )
+        for index in tranche_indices
+    ]
+    return tranche_indices, instructions
+
+
+def tranche_result(
+    contract_data: Dict[str, Any],
+    index: int,
+    signature: Optional[str],
+    error: Optional[str],
+) -> Dict[str, Any]:
+    """The outcome of one tranche, in the shape returned by distribute_tranches."""
+    return {
+        "tranche_index": index,
+        "recipient": contract_data["recipients"][index],
+        "success": error is None,
+        "signature": signature,
+        "error": error,
+    }
+
+
+def pack_instructions(
+    instructions: List[Instruction],
+    fee_payer: Pubkey,
+    prefix: Sequence[Instruction] = (),
+) -> List[List[Instruction]]:
+    """
+    Split instructions into as few transactions as fit the packet size limit.
 
-    # Get wallet secret from environment variables
-    wallet_secret_str = os.getenv("WALLET_SECRET")
-    if not wallet_secret_str:
-        print("Error: WALLET_SECRET environment variable is not set")
-        return False
+    Instructions keep their order, so tranche i is always sent before tranche i + 1.
+    Room is reserved in every transaction for the `prefix` instructions.
+    """
+    chunks: List[List[Instruction]] = []
+    current: List[Instruction] = []
 
-    try:
-        # Parse the wallet secret (array format)
-        try:
-            wallet_secret_array = json.loads(wallet_secret_str)
-            secret_key = bytes(wallet_secret_array)
-            keypair = Keypair.from_bytes(secret_key)
-        except json.JSONDecodeError:
-            # Try base58 format if JSON parsing fails
-            keypair = Keypair.from_base58_string(wallet_secret_str)
+    for instruction in instructions:
+        candidate = current + [instruction]
+        transaction = Transaction(
+            fee_payer=fee_payer, instructions=[*prefix, *candidate]
+        )
+        size = len(bytes(transaction.to_solders()))
+        if size > PACKET_DATA_SIZE and current:
+            chunks.append(current)
+            current = [instruction]
+        else:
+            current = candidate
 
-        print(f"Using wallet: {keypair.pubkey()}")
+    if current:
+        chunks.append(current)
 
-        # Connect to Solana network
-        client = AsyncClient(SOLANA_RPC_URL)
+    return chunks
 
-        # Create an anchorpy Provider with our keypair and client
-        provider = Provider(client, keypair)
 
-        # Convert payment contract address to PublicKey
-        contract_pubkey = Pubkey.from_string(payment_contract_address)
+async def distribute_tranches(
+    payment_contract_address: str,
+    count: int,
+    contract_data: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Distribute the next `count` tranches of a payment contract.
 
-        # Get contract data to find current recipient using our local function
-        # instead of importing from solana_service
-        contract_data = await get_contract_data(payment_contract_address)
-        if not contract_data:
-            print("Error: Invalid contract or unable to fetch contract data")
-            await client.close()
-            return False
-
-        # Check if all tranches are paid
-        if contract_data["paid_tranches"] >= contract_data["tranche_count"]:
-            print("Error: All tranches have already been paid")
-            await client.close()
-            return False
-
-        # Get current recipient
-        current_recipient_index = contract_data["paid_tranches"]
-        if current_recipient_index >= len(contract_data["recipients"]):
-            print("Error: Recipient index out of bounds")
-            await client.close()
-            return False
-
-        current_recipient = Pubkey.from_string(
-            contract_data["recipients"][current_recipient_index]
-        )
+    One distribute_tranche instruction is built per tranche for
+    recipients[paid_tranches..paid_tranches + count] and the instructions are packed
+    into as few signed transactions as fit the size limit. The account is only read
+    when `contract_data` is not supplied by the caller.
 
-        print(f"Current recipient: {current_recipient}")
-        print(
-            f"Paid tranches: {contract_data['paid_tranches']} of {contract_data['tranche_count']}"
-        )
+    Returns:
+        One result per tranche with its index, recipient, signature and success flag
+    """
+    results: List[Dict[str, Any]] = []
+    if count <= 0:
+        return results
 
-        # Prepare the accounts for the instruction
-        accounts = DistributeTrancheAccounts(
-            contract=contract_pubkey,
-            recipient=current_recipient,
-            owner=keypair.pubkey(),
-        )
+    try:
+        keypair = signer_service.keypair
+    except ValueError as e:
+        logger.error(f"Error loading payout wallet: {str(e)}")
+        return results
 
-        # Create the distribute_tranche instruction
-        instruction = distribute_tranche(accounts, PROGRAM_ID)
+    try:
+        provider = signer_service.provider
+        contract_pubkey = Pubkey.from_string(payment_contract_address)
 
-        # Create a transaction and add the instruction
-        transaction = Transaction().add(instruction)
-        blockhash_resp = await client.get_latest_blockhash()
-        transaction.recent_blockhash = blockhash_resp.value.blockhash
-        transaction.sign(keypair)
+        if contract_data is None:
+            contract_data = await get_contract_data(payment_contract_address)
+        if not contract_data:
+            logger.error("Invalid contract or unable to fetch contract data")
+            return results
 
-        # Send and confirm the transaction using the provider
-        # The provider will handle signing with the keypair
-        signature = await provider.send(transaction)
+        tranche_indices, instructions = build_tranche_instructions(
+            contract_pubkey, contract_data, count, keypair.pubkey()
+        )
+        if not instructions:
+            logger.error("All tranches have already been paid")
+            return results
+
+        # Send every chunk before waiting, then collect all confirmations at once.
+        # Chunks that land out of order fail on-chain and are retried by the caller.
+        position = 0
+        failed = False
+        sends: List[Tuple[List[int], Optional[str], Optional[str]]] = []
+        confirmations: List[asyncio.Future] = []
+        chunks = pack_instructions(
+            instructions, keypair.pubkey(), COMPUTE_BUDGET_PLACEHOLDER
+        )
+        for chunk in chunks:
+            chunk_indices = tranche_indices[position : position + len(chunk)]
+            position += len(chunk)
+
+            if failed:
+                # The program pays tranches strictly in order, so nothing after a
+                # transaction that could not be sent can succeed.
+                sends.append((chunk_indices, None, "previous_transaction_failed"))
+                continue
+
+            try:
+                cached = await blockhash_prefetcher.get()
+                compute_budget = await fee_planner.plan(
+                    chunk,
+                    keypair.pubkey(),
+                    [contract_pubkey, keypair.pubkey()],
+                    cached.blockhash,
+                )
+                transaction = Transaction(fee_payer=keypair.pubkey())
+                transaction.add(*compute_budget, *chunk)
+                transaction.recent_blockhash = cached.blockhash
+                transaction.sign(keypair)
+                sent = await provider.send(transaction, opts=SEND_OPTIONS)
+                confirmations.append(
+                    confirmation_tracker.track(
+                        sent, transaction.serialize(), cached.last_valid_block_height
+                    )
+                )
+                sends.append((chunk_indices, str(sent), None))
+            except Exception as e:
+                failed = True
+                error = str(e)
+                if "BlockhashNotFound" in error:
+                    blockhash_prefetcher.invalidate()
+                logger.error(
+                    f"Error sending tranches {chunk_indices} of "
+                    f"{payment_contract_address}: {error}"
+                )
+                sends.append((chunk_indices, None, error))
+
+        outcomes = iter(await asyncio.gather(*confirmations))
+        for chunk_indices, signature, error in sends:
+            if signature is not None:
+                outcome = next(outcomes)
+                if outcome["status"] == "confirmed":
+                    logger.info(
+                        f"Distributed tranches {chunk_indices} of "
+                        f"{payment_contract_address}: {signature}"
+                    )
+                else:
+                    error = f"Transaction {outcome['status']}: {outcome['error']}"
+                    logger.error(
+                        f"Error distributing tranches {chunk_indices} of "
+                        f"{payment_contract_address}: {error}"
+                    )
+            for index in chunk_indices:
+                results.append(tranche_result(contract_data, index, signature, error))
+
+        return results
+    except Exception as e:
+        logger.error(f"Error executing distribute_tranche: {str(e)}")
+        return results
 
-        # Close the client connection
-        await client.close()
 
-        print(f"Transaction successful! Signature: {signature}")
-        return True
-    except Exception as e:
-        print(f"Error executing distribute_tranche: {str(e)}")
-        import traceback
+async def main(payment_contract_address: str):
+    """
+    Main function to distribute a tranche for a given payment contract.
+    """
+    print(f"Payment contract address: {payment_contract_address}")
 
-        traceback.print_exc()
+    results = await distribute_tranches(payment_contract_address, 1)
+    if not results or not results[0]["success"]:
+        print("Error executing distribute_tranche")
         return False
 
+    print(f"Transaction successful! Signature: {results[0]['signature']}")
+    return True
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -227,4 +293,11 @@ if __name__ == "__main__":
         sys.exit(1)
 
     payment_contract_address = sys.argv[1]
-    asyncio.run(main(payment_contract_address))
+
+    async def run():
+        try:
+            await main(payment_contract_address)
+        finally:
+            await close_rpc_client()
+
+    asyncio.run(run())
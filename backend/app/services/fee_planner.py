@@ -0,0 +1,209 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, FrozenSet, List, Optional
+from loguru import logger
+from solana.transaction import Transaction
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.pubkey import Pubkey
+
+from app.core.config import settings
+from app.services.rpc_client import get_rpc_client, rpc_post
+
+# Hard per-transaction compute limit of the runtime
+MAX_COMPUTE_UNITS = 1_400_000
+
+# Compute used by the two ComputeBudget instructions themselves
+COMPUTE_BUDGET_OVERHEAD = 300
+
+# Same size as the real instructions, used to reserve room when packing
+COMPUTE_BUDGET_PLACEHOLDER = [set_compute_unit_limit(0), set_compute_unit_price(0)]
+
+
+def percentile(values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class _FeeWindow:
+    """Rolling prioritization fee samples of one set of writable accounts."""
+
+    def __init__(self, size: int, sampled_at: float):
+        self.fees: Deque[int] = deque(maxlen=size)
+        self.sampled_at = sampled_at
+
+
+class FeePlanner:
+    """
+    Plans the ComputeBudget instructions prepended to payout transactions.
+
+    The compute unit price is a rolling percentile of getRecentPrioritizationFees
+    samples for the accounts a payout writes, clamped to the configured floor and
+    caps. Each set of writable accounts has its own window and sampling time, up
+    to `max_tracked` sets, least recently used dropped first. The compute unit
+    limit comes from a simulated per-instruction figure with a safety margin, so
+    we do not pay priority fees on the default 200k units.
+    """
+
+    def __init__(
+        self,
+        fee_percentile: float = 75,
+        window: int = 300,
+        sample_interval: float = 10.0,
+        min_price: int = 0,
+        max_price: int = 1_000_000,
+        max_fee_lamports: int = 100_000,
+        compute_margin: float = 1.2,
+        default_units_per_instruction: int = 30_000,
+        resimulate_interval: float = 600.0,
+        max_tracked: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.fee_percentile = fee_percentile
+        self.window = window
+        self.max_tracked = max_tracked
+        self.sample_interval = sample_interval
+        self.min_price = min_price
+        self.max_price = max_price
+        self.max_fee_lamports = max_fee_lamports
+        self.compute_margin = compute_margin
+        self.default_units_per_instruction = default_units_per_instruction
+        self.resimulate_interval = resimulate_interval
+        self._clock = clock
+        self._windows: OrderedDict[FrozenSet[str], _FeeWindow] = OrderedDict()
+        self._units_per_instruction: Optional[int] = None
+        self._simulated_at: Optional[float] = None
+
+    @staticmethod
+    def _key(accounts: List[Pubkey]) -> FrozenSet[str]:
+        return frozenset(str(account) for account in accounts)
+
+    def _window(self, accounts: List[Pubkey]) -> Optional[_FeeWindow]:
+        key = self._key(accounts)
+        window = self._windows.get(key)
+        if window is not None:
+            self._windows.move_to_end(key)
+        return window
+
+    async def sample_fees(self, accounts: List[Pubkey]) -> None:
+        """Add the recent prioritization fees paid on `accounts` to their window."""
+        window = self._window(accounts)
+        if window is None:
+            window = _FeeWindow(self.window, self._clock())
+            self._windows[self._key(accounts)] = window
+            while len(self._windows) > self.max_tracked:
+                self._windows.popitem(last=False)
+
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getRecentPrioritizationFees",
+            "params": [[str(account) for account in accounts]],
+        }
+        window.sampled_at = self._clock()
+        try:
+            response = await rpc_post(payload)
+            result = response.json()
+            if "error" in result:
+                logger.warning(f"RPC error sampling priority fees: {result['error']}")
+                return
+            window.fees.extend(entry["prioritizationFee"] for entry in result["result"])
+        except Exception as e:
+            logger.warning(f"Error sampling priority fees: {str(e)}")
+
+    def compute_unit_price(
+        self, accounts: List[Pubkey], compute_unit_limit: int
+    ) -> int:
+        """The priority fee in micro-lamports per compute unit, within the caps."""
+        window = self._window(accounts)
+        fees = list(window.fees) if window is not None else []
+        price = percentile(fees, self.fee_percentile) if fees else 0
+        price = min(max(price, self.min_price), self.max_price)
+
+        # Keep price * limit under the per-transaction priority fee cap
+        max_for_limit = self.max_fee_lamports * 1_000_000 // max(compute_unit_limit, 1)
+        return min(price, max_for_limit)
+
+    async def simulate_units(
+        self, instructions: List[Instruction], fee_payer: Pubkey, blockhash: Hash
+    ) -> Optional[int]:
+        """Simulate the instructions and return the compute units they consumed."""
+        transaction = Transaction(
+            fee_payer=fee_payer, instructions=instructions, recent_blockhash=blockhash
+        )
+        try:
+            response = await get_rpc_client().simulate_transaction(
+                transaction.to_solders()
+            )
+        except Exception as e:
+            logger.warning(f"Error simulating payout transaction: {str(e)}")
+            return None
+
+        if response.value.err is not None or not response.value.units_consumed:
+            logger.warning(f"Payout simulation failed: {response.value.err}")
+            return None
+        return response.value.units_consumed
+
+    async def compute_unit_limit(
+        self, instructions: List[Instruction], fee_payer: Pubkey, blockhash: Hash
+    ) -> int:
+        """The compute unit limit for the instructions, re-simulated periodically."""
+        now = self._clock()
+        if (
+            self._simulated_at is None
+            or now - self._simulated_at >= self.resimulate_interval
+        ):
+            self._simulated_at = now
+            units = await self.simulate_units(instructions, fee_payer, blockhash)
+            if units is not None:
+                self._units_per_instruction = math.ceil(units / len(instructions))
+
+        per_instruction = (
+            self._units_per_instruction or self.default_units_per_instruction
+        )
+        limit = math.ceil(per_instruction * len(instructions) * self.compute_margin)
+        return min(limit + COMPUTE_BUDGET_OVERHEAD, MAX_COMPUTE_UNITS)
+
+    async def plan(
+        self,
+        instructions: List[Instruction],
+        fee_payer: Pubkey,
+        accounts: List[Pubkey],
+        blockhash: Hash,
+    ) -> List[Instruction]:
+        """
+        Build the ComputeBudget instructions for a payout transaction.
+
+        Args:
+            instructions: The payout instructions of the transaction
+            fee_payer: The signer paying the fees
+            accounts: Writable accounts whose recent fees set the price
+            blockhash: Recent blockhash, used when simulating
+
+        Returns:
+            List[Instruction]: Compute unit limit and price instructions to prepend
+        """
+        window = self._window(accounts)
+        if window is None or self._clock() - window.sampled_at >= self.sample_interval:
+            await self.sample_fees(accounts)
+
+        limit = await self.compute_unit_limit(instructions, fee_payer, blockhash)
+        price = self.compute_unit_price(accounts, limit)
+        return [set_compute_unit_limit(limit), set_compute_unit_price(price)]
+
+
+# Create a singleton instance of the fee planner
+fee_planner = FeePlanner(
+    fee_percentile=settings.PRIORITY_FEE_PERCENTILE,
+    window=settings.PRIORITY_FEE_WINDOW,
+    sample_interval=settings.PRIORITY_FEE_SAMPLE_INTERVAL,
+    min_price=settings.PRIORITY_FEE_MIN,
+    max_price=settings.PRIORITY_FEE_MAX,
+    max_fee_lamports=settings.PRIORITY_FEE_MAX_LAMPORTS,
+    compute_margin=settings.COMPUTE_UNIT_MARGIN,
+    default_units_per_instruction=settings.COMPUTE_UNITS_PER_TRANCHE,
+)
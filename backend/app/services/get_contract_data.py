@@ -19,8 +19,11 @@ from anchorpy import Program, Provider, Wallet
 # from solana.keypair import
 from solders.keypair import Keypair
 
+from app.core.config import settings
+from app.services.payment_contract_decoder import decode_payment_contract
+
 # Constants
-SOLANA_TESTNET_RPC = "https://api.testnet.sonic.game"
+SOLANA_TESTNET_RPC = settings.SOLANA_RPC_URL
 IDL_PATH = (
     Path(__file__).parents[3]
     / "frontend"
@@ -173,61 +176,8 @@ def get_data_scratch(account_pubkey: str) -> Optional[Dict]:
         account_data_b64 = result["result"]["value"]["data"][0]
         account_data = base64.b64decode(account_data_b64)
 
-        # Account data structure for PaymentContract:
-        # 1. Discriminator (8 bytes) - [151, 55, 24, 165, 12, 206, 38, 31]
-        # 2. Owner (32 bytes) - Pubkey
-        # 3. Total amount (8 bytes) - u64
-        # 4. Tranche count (8 bytes) - u64
-        # 5. Recipients vector (4 bytes for length + n*32 bytes for pubkeys)
-        # 6. Paid tranches (8 bytes) - u64
-
-        # Skip 8-byte discriminator
-        offset = 8
-
-        # Extract owner pubkey (32 bytes)
-        owner_bytes = account_data[offset : offset + 32]
-        owner = str(PublicKey(owner_bytes))
-        offset += 32
-
-        # Extract total_amount (u64/8 bytes)
-        total_amount = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract tranche_count (u64/8 bytes)
-        tranche_count = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract recipients vector
-        # First 4 bytes indicate vector length
-        recipients_len = int.from_bytes(
-            account_data[offset : offset + 4], byteorder="little"
-        )
-        offset += 4
-
-        recipients = []
-        for _ in range(recipients_len):
-            recipient_bytes = account_data[offset : offset + 32]
-            recipient = str(PublicKey(recipient_bytes))
-            recipients.append(recipient)
-            offset += 32
-
-        # Extract paid_tranches (u64/8 bytes)
-        paid_tranches = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-
-        # Construct and return the parsed data
-        contract_data = {
-            "owner": owner,
-            "total_amount": total_amount,
-            "tranche_count": tranche_count,
-            "recipients": recipients,
-            "paid_tranches": paid_tranches,
-        }
+        # Decode with the shared PaymentContract decoder
+        contract_data = decode_payment_contract(account_data).to_dict()
 
         logger.info(
             f"Contract data retrieved using raw RPC: {json.dumps(contract_data, indent=2)}"
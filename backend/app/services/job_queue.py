@@ -0,0 +1,216 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+from app.core.config import settings
+from app.services.db_service import claim_next_job, insert_job, renew_job, update_job
+
+# Job states stored in the payout_jobs collection
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+async def enqueue_job(
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Store a new job in the durable queue.
+
+    Args:
+        kind: The handler that runs the job, e.g. "claim"
+        payload: Arguments passed to the handler
+        max_attempts: Attempts before the job is marked failed
+
+    Returns:
+        The job id, or None if the job could not be stored
+    """
+    now = datetime.utcnow()
+    job_id = uuid.uuid4().hex
+    job = {
+        "_id": job_id,
+        "kind": kind,
+        "payload": payload,
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.PAYOUT_JOB_MAX_ATTEMPTS,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "available_at": now,
+    }
+    if not await insert_job(job):
+        return None
+
+    payout_workers.notify()
+    return job_id
+
+
+class WorkerPool:
+    """
+    Pool of async workers draining the Mongo-backed job queue.
+
+    Each worker leases one job at a time, runs the handler registered for its kind
+    and stores the result. A job whose handler raises is requeued with exponential
+    backoff, or after the error's `retry_after` when that is longer, until it runs
+    out of attempts. Leases expire, so jobs held by a worker
+    that died are picked up again by another process. A running job's lease is
+    renewed every third of `lease_seconds`; if renewal fails the job may already
+    run elsewhere, so its handler is cancelled.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 300.0,
+        retry_delay: float = 2.0,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._prefix = uuid.uuid4().hex[:8]
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Register the handler for a job kind."""
+        self._handlers[kind] = handler
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was enqueued from this process."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the workers."""
+        if self._tasks:
+            return
+        for index in range(self.concurrency):
+            worker_id = f"{self._prefix}-{index}"
+            self._tasks.append(asyncio.create_task(self._run(worker_id)))
+
+    async def stop(self) -> None:
+        """Stop the workers. Jobs they were running are retried once leases expire."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, worker_id: str) -> None:
+        while True:
+            try:
+                if await self.run_once(worker_id):
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker {worker_id} error: {str(e)}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self, worker_id: str) -> bool:
+        """
+        Lease and run a single job.
+
+        Returns:
+            bool: True if a job was processed, False if the queue was empty
+        """
+        job = await claim_next_job(worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        job_id = job["_id"]
+        if job["attempts"] > job["max_attempts"]:
+            # Leased again after its last worker died mid-run
+            await update_job(
+                job_id,
+                worker_id,
+                {"status": JOB_FAILED, "error": "lease_expired"},
+            )
+            return True
+
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            await update_job(
+                job_id,
+                worker_id,
+                {"status": JOB_FAILED, "error": f"unknown job kind: {job['kind']}"},
+            )
+            return True
+
+        task = asyncio.ensure_future(handler(job["payload"]))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                raise
+            # The job belongs to whichever worker leased it next
+            return True
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if job["attempts"] >= job["max_attempts"]:
+                logger.error(f"Job {job_id} failed after {job['attempts']} attempts")
+                await update_job(
+                    job_id, worker_id, {"status": JOB_FAILED, "error": error}
+                )
+            else:
+                delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+                # Rate limited calls say when it is worth trying again
+                delay = max(delay, getattr(e, "retry_after", 0))
+                logger.warning(f"Job {job_id} failed, retrying in {delay}s: {error}")
+                await update_job(
+                    job_id,
+                    worker_id,
+                    {
+                        "status": JOB_QUEUED,
+                        "error": error,
+                        "available_at": datetime.utcnow() + timedelta(seconds=delay),
+                    },
+                )
+            return True
+        finally:
+            if not heartbeat.done():
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+        await update_job(
+            job_id,
+            worker_id,
+            {"status": JOB_SUCCEEDED, "result": result, "error": None},
+        )
+        return True
+
+    async def _heartbeat(
+        self, job_id: str, worker_id: str, task: asyncio.Future
+    ) -> None:
+        """Renew a job's lease while its handler runs; cancel the handler once lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await renew_job(job_id, worker_id, self.lease_seconds):
+                logger.warning(f"Lost the lease of job {job_id}, cancelling it")
+                task.cancel()
+                return
+
+
+# Create a singleton instance of the payout worker pool
+payout_workers = WorkerPool(
+    concurrency=settings.PAYOUT_WORKERS,
+    poll_interval=settings.PAYOUT_JOB_POLL_INTERVAL,
+    lease_seconds=settings.PAYOUT_JOB_LEASE,
+    retry_delay=settings.PAYOUT_JOB_RETRY_DELAY,
+)
@@ -0,0 +1,282 @@
+import asyncio
+import struct
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence, Tuple
+from loguru import logger
+from solana.transaction import Transaction
+from solders.address_lookup_table_account import (
+    ID as LOOKUP_TABLE_PROGRAM_ID,
+    LOOKUP_TABLE_MAX_ADDRESSES,
+    AddressLookupTable,
+    AddressLookupTableAccount,
+    derive_lookup_table_address,
+)
+from solders.instruction import AccountMeta, Instruction
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+
+from app.core.config import settings
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.rpc_client import get_rpc_client
+from app.services.signer_service import signer_service
+
+# Address lookup table program instructions, bincode enum tags
+_CREATE_LOOKUP_TABLE = 0
+_EXTEND_LOOKUP_TABLE = 2
+_DEACTIVATE_LOOKUP_TABLE = 3
+_CLOSE_LOOKUP_TABLE = 4
+
+# A deactivated table can be closed once its deactivation slot has left the
+# SlotHashes sysvar
+DEACTIVATION_COOLDOWN_SLOTS = 513
+
+
+def create_lookup_table(
+    authority: Pubkey, payer: Pubkey, recent_slot: int
+) -> Tuple[Instruction, Pubkey]:
+    """Build a CreateLookupTable instruction and return it with the table address."""
+    address, bump = derive_lookup_table_address(authority, recent_slot)
+    data = struct.pack("<IQB", _CREATE_LOOKUP_TABLE, recent_slot, bump)
+    keys = [
+        AccountMeta(pubkey=address, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+        AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(LOOKUP_TABLE_PROGRAM_ID, data, keys), address
+
+
+def extend_lookup_table(
+    address: Pubkey, authority: Pubkey, payer: Pubkey, addresses: Sequence[Pubkey]
+) -> Instruction:
+    """Build an ExtendLookupTable instruction appending `addresses`."""
+    data = struct.pack("<IQ", _EXTEND_LOOKUP_TABLE, len(addresses)) + b"".join(
+        bytes(new_address) for new_address in addresses
+    )
+    keys = [
+        AccountMeta(pubkey=address, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+        AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+        AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(LOOKUP_TABLE_PROGRAM_ID, data, keys)
+
+
+def deactivate_lookup_table(address: Pubkey, authority: Pubkey) -> Instruction:
+    """Build a DeactivateLookupTable instruction, the first step of closing a table."""
+    keys = [
+        AccountMeta(pubkey=address, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+    ]
+    return Instruction(
+        LOOKUP_TABLE_PROGRAM_ID, struct.pack("<I", _DEACTIVATE_LOOKUP_TABLE), keys
+    )
+
+
+def close_lookup_table(
+    address: Pubkey, authority: Pubkey, recipient: Pubkey
+) -> Instruction:
+    """Build a CloseLookupTable instruction returning the rent to `recipient`."""
+    keys = [
+        AccountMeta(pubkey=address, is_signer=False, is_writable=True),
+        AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+        AccountMeta(pubkey=recipient, is_signer=False, is_writable=True),
+    ]
+    return Instruction(
+        LOOKUP_TABLE_PROGRAM_ID, struct.pack("<I", _CLOSE_LOOKUP_TABLE), keys
+    )
+
+
+class LookupTableManager:
+    """
+    Address lookup tables of the payout wallet.
+
+    Hold the contract and recipient accounts payouts keep writing to, so batched
+    v0 payout transactions reference them with a one byte index instead of 32
+    bytes. Only accounts seen in at least `min_uses` payouts are added: extending
+    a table costs a transaction and a slot wait that a one-off payout never earns
+    back. The signer and the program id cannot be loaded from a lookup table and
+    stay static keys.
+
+    The current table is created on first use unless an existing one is
+    configured. Once it is full it is deactivated and a new table takes over;
+    retired tables are closed to reclaim their rent after the cooldown.
+    """
+
+    def __init__(
+        self,
+        address: Optional[str] = None,
+        max_addresses: int = LOOKUP_TABLE_MAX_ADDRESSES,
+        extend_batch_size: int = 20,
+        poll_interval: float = 0.2,
+        min_uses: int = 2,
+        max_tracked: int = 10_000,
+        cooldown_slots: int = DEACTIVATION_COOLDOWN_SLOTS,
+    ):
+        self.address = Pubkey.from_string(address) if address else None
+        self.max_addresses = max_addresses
+        self.extend_batch_size = extend_batch_size
+        self.poll_interval = poll_interval
+        self.min_uses = min_uses
+        self.max_tracked = max_tracked
+        self.cooldown_slots = cooldown_slots
+        self.addresses: List[Pubkey] = []
+        self._known = set()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        # account -> payouts it appeared in, least recently seen first
+        self._uses: "OrderedDict[Pubkey, int]" = OrderedDict()
+        # (table, deactivation slot) of full tables waiting to be closed
+        self.retired: List[Tuple[Pubkey, int]] = []
+
+    def account(self) -> Optional[AddressLookupTableAccount]:
+        """The table in the form MessageV0.try_compile takes, None if not created."""
+        if self.address is None:
+            return None
+        return AddressLookupTableAccount(key=self.address, addresses=self.addresses)
+
+    def observe(self, addresses: Iterable[Pubkey]) -> None:
+        """Count one payout using the given accounts."""
+        for address in dict.fromkeys(addresses):
+            self._uses[address] = self._uses.pop(address, 0) + 1
+        while len(self._uses) > self.max_tracked:
+            self._uses.popitem(last=False)
+
+    def recurring(self, address: Pubkey) -> bool:
+        """Whether an account was seen in enough payouts to be worth a table slot."""
+        return self._uses.get(address, 0) >= self.min_uses
+
+    async def ensure(
+        self, addresses: Sequence[Pubkey]
+    ) -> Optional[AddressLookupTableAccount]:
+        """
+        Add the recurring accounts missing from the table and wait until usable.
+
+        Failures are logged and the table is returned as it is, payouts then use
+        static keys for the accounts that could not be added.
+
+        Args:
+            addresses: Accounts about to be used in a payout
+
+        Returns:
+            Optional[AddressLookupTableAccount]: The table, None if it does not exist
+        """
+        async with self._lock:
+            try:
+                recurring = [
+                    address
+                    for address in dict.fromkeys(addresses)
+                    if self.recurring(address)
+                ]
+                if recurring:
+                    await self._prepare()
+                    missing = [
+                        address for address in recurring if address not in self._known
+                    ]
+                    room = self.max_addresses - len(self.addresses)
+                    if len(missing) > room and self.addresses:
+                        await self._rollover()
+                        room = self.max_addresses
+                    if missing and room > 0:
+                        await self._extend(missing[:room])
+            except Exception as e:
+                logger.warning(f"Error updating payout lookup table: {str(e)}")
+
+            if self.retired:
+                try:
+                    await self._close_retired()
+                except Exception as e:
+                    logger.warning(f"Error closing payout lookup tables: {str(e)}")
+            return self.account()
+
+    async def _prepare(self) -> None:
+        if self.address is None:
+            await self._create()
+        elif not self._loaded:
+            response = await get_rpc_client().get_account_info(self.address)
+            if response.value is None:
+                raise ValueError(f"Lookup table {self.address} not found")
+            table = AddressLookupTable.deserialize(response.value.data)
+            self.addresses = list(table.addresses)
+            self._known = set(self.addresses)
+            self._loaded = True
+
+    async def _rollover(self) -> None:
+        # Transactions already compiled against the full table stay valid
+        # through the cooldown, so it is deactivated right away
+        signer = signer_service.pubkey
+        outcome = await self._send([deactivate_lookup_table(self.address, signer)])
+        deactivated_at = outcome["slot"] or (await get_rpc_client().get_slot()).value
+        self.retired.append((self.address, deactivated_at))
+        logger.info(f"Retired full payout lookup table {self.address}")
+
+        self.address = None
+        self.addresses = []
+        self._known = set()
+        await self._create()
+
+    async def _close_retired(self) -> None:
+        signer = signer_service.pubkey
+        slot = (await get_rpc_client().get_slot()).value
+        for address, deactivated_at in list(self.retired):
+            if slot <= deactivated_at + self.cooldown_slots:
+                continue
+            await self._send([close_lookup_table(address, signer, signer)])
+            self.retired.remove((address, deactivated_at))
+            logger.info(f"Closed retired payout lookup table {address}")
+
+    async def _create(self) -> None:
+        signer = signer_service.pubkey
+        recent_slot = (await get_rpc_client().get_slot()).value
+        instruction, address = create_lookup_table(signer, signer, recent_slot)
+        await self._send([instruction])
+        self.address = address
+        self._loaded = True
+        logger.info(
+            f"Created payout lookup table {address}, "
+            "set PAYOUT_LOOKUP_TABLE to reuse it"
+        )
+
+    async def _extend(self, addresses: List[Pubkey]) -> None:
+        signer = signer_service.pubkey
+        last_slot = 0
+        for start in range(0, len(addresses), self.extend_batch_size):
+            chunk = addresses[start : start + self.extend_batch_size]
+            outcome = await self._send(
+                [extend_lookup_table(self.address, signer, signer, chunk)]
+            )
+            last_slot = max(last_slot, outcome["slot"] or 0)
+            self.addresses.extend(chunk)
+            self._known.update(chunk)
+
+        # Addresses become usable in the slot after the one that added them
+        client = get_rpc_client()
+        while (await client.get_slot()).value <= last_slot:
+            await asyncio.sleep(self.poll_interval)
+
+    async def _send(self, instructions: List[Instruction]) -> dict:
+        # Import only when needed to avoid circular imports
+        from app.services.distribute_tranche_service import SEND_OPTIONS
+
+        keypair = signer_service.keypair
+        cached = await blockhash_prefetcher.get()
+        transaction = Transaction(fee_payer=keypair.pubkey())
+        transaction.add(*instructions)
+        transaction.recent_blockhash = cached.blockhash
+        transaction.sign(keypair)
+
+        raw = transaction.serialize()
+        response = await get_rpc_client().send_raw_transaction(raw, opts=SEND_OPTIONS)
+        outcome = await confirmation_tracker.track(
+            response.value, raw, cached.last_valid_block_height
+        )
+        if outcome["status"] != "confirmed":
+            raise Exception(f"Transaction {outcome['status']}: {outcome['error']}")
+        return outcome
+
+
+# Create a singleton instance of the lookup table manager
+lookup_table_manager = LookupTableManager(
+    settings.PAYOUT_LOOKUP_TABLE or None, min_uses=settings.PAYOUT_LOOKUP_MIN_USES
+)
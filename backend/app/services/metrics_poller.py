@@ -0,0 +1,260 @@
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from app.core.config import settings
+from app.services.claim_service import MILESTONE_JOB
+from app.services.db_service import get_partially_claimed_contracts
+from app.services.job_queue import enqueue_job
+from app.services.solana_service import load_payment_contracts
+from app.services.tweet_batcher import MAX_TWEETS_PER_LOOKUP
+from app.services.twitter_service import twitter_service
+
+# Looks up the public_metrics of a list of tweet ids, None for unreadable tweets
+MetricsLookup = Callable[[List[str]], Awaitable[Dict[str, Optional[Dict[str, Any]]]]]
+
+
+class _PostSchedule:
+    def __init__(self, interval: float, due_at: float):
+        self.interval = interval
+        self.due_at = due_at
+        self.like_count: Optional[int] = None
+
+
+class MetricsPoller:
+    """
+    Pays tranches automatically as the engagement of claimed posts grows.
+
+    Every `min_interval` seconds the partially claimed contracts are read and
+    the metrics of their posts that are due are fetched with metrics-only
+    get_tweets calls of up to `batch_size` ids. When the like count crosses
+    more thresholds of tranche_distribution than the contract has paid_tranches,
+    a milestone job is queued. It pays through the payout queue without
+    verifying the post content again.
+
+    A post is polled every `min_interval` seconds while its likes grow. Every
+    poll without growth doubles its interval up to `max_interval`, and new
+    likes reset it. Several processes polling at once only cost quota, since
+    the payout re-reads the paid tranches from the chain.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        batch_size: int = MAX_TWEETS_PER_LOOKUP,
+        lookup: Optional[MetricsLookup] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self._lookup = lookup or functools.partial(
+            twitter_service.run, "/2/tweets", twitter_service.lookup_public_metrics
+        )
+        self._clock = clock
+        self._schedules: Dict[str, _PostSchedule] = {}
+        # contract address -> (qualified tranches queued, when)
+        self._queued: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.calls = 0
+        self.jobs_queued = 0
+
+    async def start(self) -> None:
+        """Start the background poller."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background poller."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Metrics poll failed: {str(e)}")
+            await asyncio.sleep(self.min_interval)
+
+    async def poll_once(self) -> int:
+        """
+        Fetch the metrics of every post that is due and queue the crossed milestones.
+
+        Returns:
+            int: Number of milestone jobs queued
+        """
+        self.polls += 1
+        contracts_by_tweet: Dict[str, List[Dict[str, Any]]] = {}
+        for contract in await get_partially_claimed_contracts():
+            tweet_id = twitter_service.extract_tweet_id_from_url(contract["post_url"])
+            if tweet_id:
+                contracts_by_tweet.setdefault(tweet_id, []).append(contract)
+
+        # Forget posts whose contracts were paid in full
+        for tweet_id in set(self._schedules) - set(contracts_by_tweet):
+            del self._schedules[tweet_id]
+        addresses = {
+            contract["contract_address"]
+            for contracts in contracts_by_tweet.values()
+            for contract in contracts
+        }
+        for address in set(self._queued) - addresses:
+            del self._queued[address]
+
+        now = self._clock()
+        due = [
+            tweet_id
+            for tweet_id in contracts_by_tweet
+            if self._schedule(tweet_id, now).due_at <= now
+        ]
+
+        queued = 0
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start : start + self.batch_size]
+            try:
+                results = await self._lookup(batch)
+            except Exception as e:
+                # Rate limited or failed, the rest stays due for the next poll
+                logger.warning(f"Metrics poll stopped after {start} posts: {str(e)}")
+                break
+            self.calls += 1
+
+            milestones = []
+            for tweet_id in batch:
+                metrics = results.get(tweet_id)
+                self._reschedule(tweet_id, metrics)
+                if metrics is None:
+                    continue
+                milestones += [
+                    (contract, metrics) for contract in contracts_by_tweet[tweet_id]
+                ]
+
+            await self._load_paid_tranches(milestones)
+            for contract, metrics in milestones:
+                if await self._queue_milestone(contract, metrics):
+                    queued += 1
+
+        self.jobs_queued += queued
+        return queued
+
+    def _schedule(self, tweet_id: str, now: float) -> _PostSchedule:
+        schedule = self._schedules.get(tweet_id)
+        if schedule is None:
+            schedule = _PostSchedule(self.min_interval, now)
+            self._schedules[tweet_id] = schedule
+        return schedule
+
+    def _reschedule(self, tweet_id: str, metrics: Optional[Dict[str, Any]]) -> None:
+        schedule = self._schedules[tweet_id]
+        like_count = metrics.get("like_count", 0) if metrics is not None else None
+        growing = like_count is not None and (
+            schedule.like_count is None or like_count > schedule.like_count
+        )
+        if growing:
+            schedule.interval = self.min_interval
+            schedule.like_count = like_count
+        else:
+            # Unchanged, or unreadable right now: look again later
+            schedule.interval = min(schedule.interval * 2, self.max_interval)
+        schedule.due_at = self._clock() + schedule.interval
+
+    @staticmethod
+    def _qualified(contract: Dict[str, Any], metrics: Dict[str, Any]) -> int:
+        like_count = metrics.get("like_count", 0)
+        return sum(
+            1
+            for threshold in contract.get("tranche_distribution", [])
+            if like_count >= threshold
+        )
+
+    async def _load_paid_tranches(
+        self, milestones: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> None:
+        # Contracts claimed before paid_tranches was stored only have
+        # tranches_distributed, the tranches of their last claim. That is a
+        # lower bound, so only posts past it need the count from the chain.
+        legacy = {
+            contract["contract_address"]: contract
+            for contract, metrics in milestones
+            if contract.get("paid_tranches") is None
+            and self._qualified(contract, metrics)
+            > contract.get("tranches_distributed", 0)
+        }
+        if not legacy:
+            return
+
+        snapshots = await load_payment_contracts(list(legacy))
+        for address, contract in legacy.items():
+            snapshot = snapshots.get(address)
+            if snapshot is not None:
+                contract["paid_tranches"] = snapshot.paid_tranches
+
+    async def _queue_milestone(
+        self, contract: Dict[str, Any], metrics: Dict[str, Any]
+    ) -> bool:
+        like_count = metrics.get("like_count", 0)
+        qualified = self._qualified(contract, metrics)
+        paid = contract.get("paid_tranches")
+        if paid is None:
+            paid = contract.get("tranches_distributed", 0)
+        if qualified <= paid:
+            return False
+
+        address = contract["contract_address"]
+        # Not again while the last job may still be pending, unless it got stuck
+        previous, queued_at = self._queued.get(address, (0, 0.0))
+        now = self._clock()
+        if qualified <= previous and now - queued_at < self.max_interval:
+            return False
+
+        job_id = await enqueue_job(
+            MILESTONE_JOB,
+            {
+                "contract_address": address,
+                "post_url": contract["post_url"],
+                "metrics": metrics,
+            },
+        )
+        if not job_id:
+            return False
+
+        logger.info(
+            f"Queued milestone payout of {address}: {like_count} likes "
+            f"qualify for {qualified} tranches"
+        )
+        self._queued[address] = (qualified, now)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return poll counters and how many posts are backed off."""
+        return {
+            "posts": len(self._schedules),
+            "backed_off": sum(
+                1
+                for schedule in self._schedules.values()
+                if schedule.interval > self.min_interval
+            ),
+            "polls": self.polls,
+            "calls": self.calls,
+            "jobs_queued": self.jobs_queued,
+        }
+
+
+# Create a singleton instance of the metrics poller
+metrics_poller = MetricsPoller(
+    min_interval=settings.METRICS_POLL_INTERVAL,
+    max_interval=settings.METRICS_POLL_MAX_INTERVAL,
+)
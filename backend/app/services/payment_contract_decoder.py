@@ -0,0 +1,200 @@
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+from anchorpy.error import AccountInvalidDiscriminator
+from solders.pubkey import Pubkey
+
+from app.contract_client.accounts import PaymentContract
+
+# Account data structure for PaymentContract:
+# 1. Discriminator (8 bytes) - [151, 55, 24, 165, 12, 206, 38, 31]
+# 2. Owner (32 bytes) - Pubkey
+# 3. Total amount (8 bytes) - u64
+# 4. Tranche count (8 bytes) - u64
+# 5. Recipients vector (4 bytes for length + n*32 bytes for pubkeys)
+# 6. Paid tranches (8 bytes) - u64
+DISCRIMINATOR = PaymentContract.discriminator
+PUBKEY_SIZE = 32
+
+_HEADER = struct.Struct("<8s32sQQI")
+_U64 = struct.Struct("<Q")
+
+HEADER_SIZE = _HEADER.size
+OWNER_OFFSET = 8
+MIN_ACCOUNT_SIZE = HEADER_SIZE + _U64.size
+
+
+class DecodedPaymentContract:
+    """
+    PaymentContract view over raw account bytes.
+
+    Scalars are unpacked eagerly; the owner and recipients stay as slices of the
+    underlying buffer and are only turned into Pubkey objects when accessed.
+    """
+
+    __slots__ = (
+        "total_amount",
+        "tranche_count",
+        "paid_tranches",
+        "_owner",
+        "_recipients_view",
+        "_recipients",
+    )
+
+    def __init__(
+        self,
+        owner: memoryview,
+        total_amount: int,
+        tranche_count: int,
+        recipients_view: memoryview,
+        paid_tranches: int,
+    ):
+        self._owner = owner
+        self.total_amount = total_amount
+        self.tranche_count = tranche_count
+        self._recipients_view = recipients_view
+        self.paid_tranches = paid_tranches
+        self._recipients: Optional[List[Pubkey]] = None
+
+    @property
+    def owner(self) -> Pubkey:
+        return Pubkey(bytes(self._owner))
+
+    @property
+    def recipient_count(self) -> int:
+        return len(self._recipients_view) // PUBKEY_SIZE
+
+    def recipient(self, index: int) -> Pubkey:
+        """Decode a single recipient without materialising the whole vector."""
+        if not 0 <= index < self.recipient_count:
+            raise IndexError("recipient index out of range")
+        start = index * PUBKEY_SIZE
+        return Pubkey(bytes(self._recipients_view[start : start + PUBKEY_SIZE]))
+
+    @property
+    def recipients(self) -> List[Pubkey]:
+        if self._recipients is None:
+            self._recipients = [
+                self.recipient(index) for index in range(self.recipient_count)
+            ]
+        return self._recipients
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the contract in the dict format used by the services."""
+        return {
+            "owner": str(self.owner),
+            "total_amount": self.total_amount,
+            "tranche_count": self.tranche_count,
+            "recipients": [str(recipient) for recipient in self.recipients],
+            "paid_tranches": self.paid_tranches,
+        }
+
+
+def decode_payment_contract(
+    data: Union[bytes, bytearray, memoryview],
+) -> DecodedPaymentContract:
+    """
+    Decode PaymentContract account data without copying the buffer.
+
+    Args:
+        data: Raw account data, including the 8 byte discriminator
+
+    Returns:
+        DecodedPaymentContract: The decoded contract
+
+    Raises:
+        AccountInvalidDiscriminator: If the data is not a PaymentContract account
+        ValueError: If the data is truncated
+    """
+    view = memoryview(data)
+    if len(view) < MIN_ACCOUNT_SIZE:
+        raise ValueError(f"Account data too short: {len(view)} bytes")
+
+    discriminator, _, total_amount, tranche_count, recipients_len = _HEADER.unpack_from(
+        view
+    )
+    if discriminator != DISCRIMINATOR:
+        raise AccountInvalidDiscriminator(
+            "The discriminator for this account is invalid"
+        )
+
+    recipients_end = HEADER_SIZE + recipients_len * PUBKEY_SIZE
+    if len(view) < recipients_end + _U64.size:
+        raise ValueError(
+            f"Account data too short for {recipients_len} recipients: "
+            f"{len(view)} bytes"
+        )
+
+    (paid_tranches,) = _U64.unpack_from(view, recipients_end)
+
+    return DecodedPaymentContract(
+        owner=view[OWNER_OFFSET : OWNER_OFFSET + PUBKEY_SIZE],
+        total_amount=total_amount,
+        tranche_count=tranche_count,
+        recipients_view=view[HEADER_SIZE:recipients_end],
+        paid_tranches=paid_tranches,
+    )
+
+
+class PaymentContractHeader(NamedTuple):
+    """Fixed-size prefix of a PaymentContract account."""
+
+    owner: Pubkey
+    total_amount: int
+    tranche_count: int
+    recipient_count: int
+
+
+def decode_payment_contract_header(
+    data: Union[bytes, bytearray, memoryview],
+) -> PaymentContractHeader:
+    """
+    Decode only the fixed-size prefix of a PaymentContract account.
+
+    Works on a dataSlice of the first HEADER_SIZE bytes, which is enough for
+    everything except the recipients and paid_tranches.
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise ValueError(f"Account data too short: {len(view)} bytes")
+
+    (
+        discriminator,
+        owner,
+        total_amount,
+        tranche_count,
+        recipients_len,
+    ) = _HEADER.unpack_from(view)
+    if discriminator != DISCRIMINATOR:
+        raise AccountInvalidDiscriminator(
+            "The discriminator for this account is invalid"
+        )
+
+    return PaymentContractHeader(
+        owner=Pubkey(owner),
+        total_amount=total_amount,
+        tranche_count=tranche_count,
+        recipient_count=recipients_len,
+    )
+
+
+def encode_payment_contract(
+    owner: Pubkey,
+    total_amount: int,
+    tranche_count: int,
+    recipients: Sequence[Pubkey],
+    paid_tranches: int,
+) -> bytes:
+    """Encode PaymentContract account data, the inverse of decode_payment_contract."""
+    return b"".join(
+        [
+            _HEADER.pack(
+                DISCRIMINATOR,
+                bytes(owner),
+                total_amount,
+                tranche_count,
+                len(recipients),
+            ),
+            *(bytes(recipient) for recipient in recipients),
+            _U64.pack(paid_tranches),
+        ]
+    )
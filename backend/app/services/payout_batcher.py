@@ -0,0 +1,323 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from loguru import logger
+from solana.transaction import PACKET_DATA_SIZE
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from app.core.config import settings
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.fee_planner import COMPUTE_BUDGET_PLACEHOLDER, fee_planner
+from app.services.lookup_table_service import LookupTableManager, lookup_table_manager
+from app.services.rpc_client import get_rpc_client
+from app.services.signer_service import signer_service
+
+
+class _PayoutRequest:
+    def __init__(
+        self,
+        contract_address: str,
+        count: int,
+        contract_data: Dict[str, Any],
+        tranche_indices: List[int],
+        instructions: List[Instruction],
+        future: asyncio.Future,
+    ):
+        self.contract_address = contract_address
+        self.contract_pubkey = Pubkey.from_string(contract_address)
+        self.count = count
+        self.contract_data = contract_data
+        self.tranche_indices = tranche_indices
+        self.instructions = instructions
+        self.future = future
+
+    def accounts(self) -> List[Pubkey]:
+        return [self.contract_pubkey] + [
+            Pubkey.from_string(self.contract_data["recipients"][index])
+            for index in self.tranche_indices
+        ]
+
+    def resolve(self, signature: Optional[str], error: Optional[str]) -> None:
+        # Import only when needed to avoid circular imports
+        from app.services.distribute_tranche_service import tranche_result
+
+        if not self.future.done():
+            self.future.set_result(
+                [
+                    tranche_result(self.contract_data, index, signature, error)
+                    for index in self.tranche_indices
+                ]
+            )
+
+
+class PayoutBatcher:
+    """
+    Packs the payouts of many contracts into shared v0 transactions.
+
+    Payout requests arriving within `window` seconds of each other are collected
+    and their distribute_tranche instructions packed, whole contract by whole
+    contract, into as few v0 transactions as fit the packet size limit. The
+    contract and recipient accounts of recurring payouts are loaded through the
+    payout wallet's address lookup table, so each costs one byte instead of 32 and
+    far more tranches fit in a transaction than in a legacy one. Accounts the
+    table does not hold yet, such as those of a contract's first payout, share
+    the same transactions as static account keys. Every caller gets back the
+    results of its own tranches only.
+
+    If a shared transaction fails, each of its contracts is retried on its own
+    through distribute_tranches, so one bad contract cannot fail the others.
+    Contracts too large to share a transaction go through distribute_tranches
+    directly.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.05,
+        lookup_tables: Optional[LookupTableManager] = None,
+    ):
+        self.window = window
+        self.lookup_tables = lookup_tables or lookup_table_manager
+        self._queue: List[_PayoutRequest] = []
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self.transactions = 0
+        self.contracts = 0
+        self.fallbacks = 0
+        # Contracts batched with static keys, not yet in the lookup table
+        self.static_contracts = 0
+
+    async def submit(
+        self,
+        contract_address: str,
+        count: int,
+        contract_data: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Distribute the next `count` tranches of a contract in the next batch.
+
+        Args:
+            contract_address: The contract address
+            count: Number of tranches to distribute
+            contract_data: Already decoded contract state, saves re-reading the account
+
+        Returns:
+            List[Dict[str, Any]]: One result per tranche, in the shape returned by
+            distribute_tranche_service.distribute_tranches
+        """
+        # Import only when needed to avoid circular imports
+        from app.services.distribute_tranche_service import (
+            build_tranche_instructions,
+            get_contract_data,
+        )
+
+        if count <= 0:
+            return []
+
+        try:
+            signer = signer_service.pubkey
+        except ValueError as e:
+            logger.error(f"Error loading payout wallet: {str(e)}")
+            return []
+
+        if contract_data is None:
+            contract_data = await get_contract_data(contract_address)
+        if not contract_data:
+            logger.error("Invalid contract or unable to fetch contract data")
+            return []
+
+        tranche_indices, instructions = build_tranche_instructions(
+            Pubkey.from_string(contract_address), contract_data, count, signer
+        )
+        if not instructions:
+            logger.error("All tranches have already been paid")
+            return []
+
+        loop = asyncio.get_running_loop()
+        request = _PayoutRequest(
+            contract_address,
+            count,
+            contract_data,
+            tranche_indices,
+            instructions,
+            loop.create_future(),
+        )
+        self._queue.append(request)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_later(self.window, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        self._scheduled = False
+        requests, self._queue = self._queue, []
+        if requests:
+            task = asyncio.ensure_future(self._send_all(requests))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_all(self, requests: List[_PayoutRequest]) -> None:
+        try:
+            signer = signer_service.pubkey
+            for request in requests:
+                self.lookup_tables.observe(request.accounts())
+
+            # Only recurring accounts are added to the table, the others are
+            # compiled into the same messages as static keys
+            lookup_table = await self.lookup_tables.ensure(
+                [account for request in requests for account in request.accounts()]
+            )
+            lookup_tables = [lookup_table] if lookup_table else []
+            self.static_contracts += sum(
+                1
+                for request in requests
+                if not self.lookup_tables.recurring(request.contract_pubkey)
+            )
+
+            groups: List[List[_PayoutRequest]] = []
+            oversized: List[_PayoutRequest] = []
+            for request in requests:
+                if self._fits([request], signer, lookup_tables):
+                    # First fit keeps transactions full without reordering a contract
+                    for group in groups:
+                        if self._fits(group + [request], signer, lookup_tables):
+                            group.append(request)
+                            break
+                    else:
+                        groups.append([request])
+                else:
+                    oversized.append(request)
+
+            await asyncio.gather(
+                *(self._send_group(group, lookup_tables) for group in groups),
+                *(self._send_alone(request) for request in oversized),
+            )
+        except Exception as e:
+            logger.error(f"Error sending payout batch: {str(e)}")
+            for request in requests:
+                request.resolve(None, str(e))
+
+    def _fits(
+        self,
+        group: List[_PayoutRequest],
+        signer: Pubkey,
+        lookup_tables: List[AddressLookupTableAccount],
+    ) -> bool:
+        instructions = [
+            *COMPUTE_BUDGET_PLACEHOLDER,
+            *(instruction for request in group for instruction in request.instructions),
+        ]
+        try:
+            message = MessageV0.try_compile(
+                signer, instructions, lookup_tables, Hash.default()
+            )
+        except Exception:
+            return False
+        transaction = VersionedTransaction.populate(message, [Signature.default()])
+        return len(bytes(transaction)) <= PACKET_DATA_SIZE
+
+    async def _send_group(
+        self,
+        group: List[_PayoutRequest],
+        lookup_tables: List[AddressLookupTableAccount],
+    ) -> None:
+        keypair = signer_service.keypair
+        instructions = [
+            instruction for request in group for instruction in request.instructions
+        ]
+        addresses = [request.contract_address for request in group]
+        signature = None
+        try:
+            cached = await blockhash_prefetcher.get()
+            compute_budget = await fee_planner.plan(
+                instructions,
+                keypair.pubkey(),
+                [request.contract_pubkey for request in group] + [keypair.pubkey()],
+                cached.blockhash,
+            )
+            message = MessageV0.try_compile(
+                keypair.pubkey(),
+                [*compute_budget, *instructions],
+                lookup_tables,
+                cached.blockhash,
+            )
+            transaction = VersionedTransaction(message, [keypair])
+            raw = bytes(transaction)
+
+            # Import only when needed to avoid circular imports
+            from app.services.distribute_tranche_service import SEND_OPTIONS
+
+            response = await get_rpc_client().send_raw_transaction(
+                raw, opts=SEND_OPTIONS
+            )
+            signature = str(response.value)
+            outcome = await confirmation_tracker.track(
+                response.value, raw, cached.last_valid_block_height
+            )
+            if outcome["status"] != "confirmed":
+                raise Exception(f"Transaction {outcome['status']}: {outcome['error']}")
+        except Exception as e:
+            error = str(e)
+            if "BlockhashNotFound" in error:
+                blockhash_prefetcher.invalidate()
+            if len(group) == 1:
+                logger.error(f"Error distributing tranches of {addresses[0]}: {error}")
+                group[0].resolve(signature, error)
+                return
+
+            logger.warning(
+                f"Batched payout of {len(group)} contracts failed, "
+                f"retrying them one by one: {error}"
+            )
+            await asyncio.gather(*(self._send_alone(request) for request in group))
+            return
+
+        self.transactions += 1
+        self.contracts += len(group)
+        logger.info(
+            f"Distributed {len(instructions)} tranches of {len(group)} contracts: "
+            f"{signature}"
+        )
+        for request in group:
+            request.resolve(signature, None)
+
+    async def _send_alone(self, request: _PayoutRequest) -> None:
+        # Import only when needed to avoid circular imports
+        from app.services.distribute_tranche_service import distribute_tranches
+
+        self.fallbacks += 1
+        try:
+            results = await distribute_tranches(
+                request.contract_address, request.count, request.contract_data
+            )
+        except Exception as e:
+            request.resolve(None, str(e))
+            return
+        if not request.future.done():
+            request.future.set_result(results)
+
+    async def stop(self) -> None:
+        """Wait for the batches already being sent."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "transactions": self.transactions,
+            "contracts": self.contracts,
+            "fallbacks": self.fallbacks,
+            "static_contracts": self.static_contracts,
+            "lookup_table": (
+                str(self.lookup_tables.address) if self.lookup_tables.address else None
+            ),
+            "lookup_table_addresses": len(self.lookup_tables.addresses),
+            "retired_lookup_tables": len(self.lookup_tables.retired),
+        }
+
+
+# Create a singleton instance of the payout batcher
+payout_batcher = PayoutBatcher(window=settings.PAYOUT_BATCH_WINDOW)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+import httpx
+from loguru import logger
+
+from app.services.rpc_router import WRITE_METHODS
+
+
+class RpcError(Exception):
+    """A JSON-RPC error object returned for one request."""
+
+    def __init__(self, error: Dict[str, Any]):
+        self.code = error.get("code")
+        self.message = error.get("message", "")
+        super().__init__(f"RPC error {self.code}: {self.message}")
+
+
+class RpcBatch:
+    """
+    Builder for an explicit JSON-RPC batch, sent as a single POST.
+
+    Example:
+        batch = RpcBatch()
+        batch.add("getAccountInfo", [address, {"encoding": "base64"}])
+        batch.add("getLatestBlockhash", parser=GetLatestBlockhashResp)
+        account, blockhash = await batch.execute()
+
+    With a solders response class as `parser` the result is parsed like the
+    AsyncClient method would, otherwise the raw JSON `result` is returned.
+    """
+
+    def __init__(self):
+        self._requests: List[Tuple[str, List[Any], Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def add(
+        self, method: str, params: Optional[List[Any]] = None, parser: Any = None
+    ) -> int:
+        """Queue a request and return its position in the results."""
+        self._requests.append((method, params or [], parser))
+        return len(self._requests) - 1
+
+    async def execute(self, return_exceptions: bool = False) -> List[Any]:
+        """
+        Send the batch and return one result per request, in order.
+
+        Args:
+            return_exceptions: Put RpcError objects in the results instead of
+                raising the first one
+
+        Returns:
+            List[Any]: Parsed results in the order the requests were added
+        """
+        if not self._requests:
+            return []
+
+        # Import only when needed to avoid circular imports
+        from app.services.rpc_client import rpc_post
+
+        payload = [
+            {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+            for index, (method, params, _) in enumerate(self._requests)
+        ]
+        response = await rpc_post(payload)
+        response.raise_for_status()
+        items = {item.get("id"): item for item in response.json()}
+
+        results = []
+        for index, (_, _, parser) in enumerate(self._requests):
+            item = items.get(index)
+            if item is None:
+                result = RpcError({"message": "missing response"})
+            elif "error" in item:
+                result = RpcError(item["error"])
+            elif parser is not None:
+                result = parser.from_json(json.dumps(item))
+            else:
+                result = item["result"]
+
+            if isinstance(result, RpcError) and not return_exceptions:
+                raise result
+            results.append(result)
+        return results
+
+
+class CoalescingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport merging concurrent JSON-RPC calls into batch requests.
+
+    Single read requests issued in the same event loop tick are queued and sent
+    as one JSON-RPC batch array on the next tick, so independent calls such as
+    account reads for several contracts plus a blockhash cost one POST. Request
+    ids are rewritten for the batch and restored in each caller's response.
+    Writes, explicit batches and non JSON-RPC bodies pass straight through. If the
+    endpoint rejects the batch, the calls are retried one by one.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_batch_size: int = 50):
+        self.max_batch_size = max_batch_size
+        self._transport = transport
+        self._queue: List[Tuple[httpx.Request, Dict[str, Any], asyncio.Future]] = []
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.coalesced = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or payload.get("method") in WRITE_METHODS:
+            return await self._transport.handle_async_request(request)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((request, payload, future))
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        self._scheduled = False
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.ensure_future(
+                self._send(queue[start : start + self.max_batch_size])
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, entries: List[Tuple[httpx.Request, Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        try:
+            if len(entries) == 1:
+                responses = [await self._transport.handle_async_request(entries[0][0])]
+            else:
+                responses = await self._send_batch(entries)
+        except Exception as e:
+            for _, _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), response in zip(entries, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def _send_batch(
+        self, entries: List[Tuple[httpx.Request, Dict[str, Any], asyncio.Future]]
+    ) -> List[httpx.Response]:
+        first = entries[0][0]
+        batch = [
+            dict(payload, id=index) for index, (_, payload, _) in enumerate(entries)
+        ]
+        headers = [
+            (name, value)
+            for name, value in first.headers.raw
+            if name.lower() != b"content-length"
+        ]
+        request = httpx.Request(
+            first.method,
+            first.url,
+            headers=headers,
+            content=json.dumps(batch).encode(),
+            extensions=first.extensions,
+        )
+
+        response = await self._transport.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+
+        items = None
+        if response.status_code == 200:
+            try:
+                items = response.json()
+            except ValueError:
+                pass
+        by_id = (
+            {item.get("id"): item for item in items if isinstance(item, dict)}
+            if isinstance(items, list)
+            else {}
+        )
+        if len(by_id) != len(entries) or any(
+            index not in by_id for index in range(len(entries))
+        ):
+            logger.warning(
+                f"RPC batch rejected with HTTP {response.status_code}, "
+                "sending requests individually"
+            )
+            return list(
+                await asyncio.gather(
+                    *(
+                        self._transport.handle_async_request(entry[0])
+                        for entry in entries
+                    )
+                )
+            )
+
+        self.batches += 1
+        self.coalesced += len(entries)
+        return [
+            httpx.Response(
+                200,
+                headers={"content-type": "application/json"},
+                content=json.dumps(dict(by_id[index], id=payload.get("id"))).encode(),
+            )
+            for index, (_, payload, _) in enumerate(entries)
+        ]
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"batches": self.batches, "coalesced_requests": self.coalesced}
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional, Union
+import httpx
+from loguru import logger
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.providers.async_http import AsyncHTTPProvider
+
+from app.core.config import settings
+from app.services.rpc_batch import CoalescingTransport
+from app.services.rpc_router import RpcRouter
+
+# Process-wide RPC client and the keep-alive session it shares with raw requests
+_client: Optional[AsyncClient] = None
+_session: Optional[httpx.AsyncClient] = None
+# Routes the session's requests over the configured endpoints
+_router: Optional[RpcRouter] = None
+# Merges concurrent calls into JSON-RPC batches
+_coalescer: Optional[CoalescingTransport] = None
+
+
+class _PooledHTTPProvider(AsyncHTTPProvider):
+    """HTTP provider that sends over a session it is given instead of its own."""
+
+    def __init__(self, endpoint: str, session: httpx.AsyncClient, timeout: float):
+        # Skip AsyncHTTPProvider.__init__, which would open a private session
+        super(AsyncHTTPProvider, self).__init__(endpoint, timeout=timeout)
+        self.session = session
+
+
+class _PooledAsyncClient(AsyncClient):
+    """Solana RPC client built around the shared pooled session."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        session: httpx.AsyncClient,
+        timeout: float,
+        commitment: Optional[Commitment] = None,
+    ):
+        super(AsyncClient, self).__init__(commitment)
+        self._provider = _PooledHTTPProvider(endpoint, session, timeout)
+
+
+def _build_session() -> httpx.AsyncClient:
+    """Create the pooled HTTP session used for every Solana RPC call."""
+    global _router, _coalescer
+
+    _router = RpcRouter(
+        [settings.SOLANA_RPC_URL, *settings.SOLANA_RPC_FALLBACK_URLS],
+        transport=httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.RPC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.RPC_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.RPC_KEEPALIVE_EXPIRY,
+            )
+        ),
+        hedge_min_delay=settings.RPC_HEDGE_MIN_DELAY,
+        hedge_max_delay=settings.RPC_HEDGE_MAX_DELAY,
+        write_fanout=settings.RPC_WRITE_FANOUT,
+    )
+    transport: httpx.AsyncBaseTransport = _router
+    _coalescer = None
+    if settings.RPC_BATCH_MAX_SIZE > 1:
+        _coalescer = CoalescingTransport(
+            _router, max_batch_size=settings.RPC_BATCH_MAX_SIZE
+        )
+        transport = _coalescer
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            settings.RPC_TIMEOUT, connect=settings.RPC_CONNECT_TIMEOUT
+        ),
+    )
+
+
+def get_rpc_client() -> AsyncClient:
+    """
+    Get the shared Solana RPC client.
+
+    Outside of the app lifespan (scripts, tests) the client is created lazily.
+    """
+    global _client, _session
+
+    if _client is None:
+        _session = _build_session()
+        _client = _PooledAsyncClient(
+            settings.SOLANA_RPC_URL, _session, timeout=settings.RPC_TIMEOUT
+        )
+
+    return _client
+
+
+async def start_rpc_client() -> AsyncClient:
+    """Create the shared Solana RPC client. Called from the FastAPI lifespan."""
+    client = get_rpc_client()
+    logger.info(f"Solana RPC client started for {settings.SOLANA_RPC_URL}")
+    return client
+
+
+async def close_rpc_client() -> None:
+    """Close the shared Solana RPC client. Called from the FastAPI lifespan."""
+    global _client, _session, _router, _coalescer
+
+    if _client is None:
+        return
+
+    # Closing the session closes its transports, which cancel their background
+    # batch flushes and write fan-outs
+    await _client.close()
+    _client = None
+    _session = None
+    _router = None
+    _coalescer = None
+    logger.info("Solana RPC client closed")
+
+
+async def rpc_post(
+    payload: Union[Dict[str, Any], List[Dict[str, Any]]]
+) -> httpx.Response:
+    """
+    Send a raw JSON-RPC payload over the shared keep-alive session.
+
+    Args:
+        payload: The JSON-RPC request body, or a list of them for a batch
+
+    Returns:
+        httpx.Response: The raw HTTP response
+    """
+    client = get_rpc_client()
+    return await _session.post(client._provider.endpoint_uri, json=payload)
+
+
+def rpc_stats() -> Dict[str, Any]:
+    """Per-endpoint health of the RPC router, empty before the first request."""
+    if _router is None:
+        return {}
+    stats = _router.stats()
+    if _coalescer is not None:
+        stats["batching"] = _coalescer.stats()
+    return stats
@@ -0,0 +1,298 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+import httpx
+from loguru import logger
+
+# Methods that change chain state and are sent to several endpoints at once
+WRITE_METHODS = {"sendTransaction", "requestAirdrop"}
+
+
+class RpcEndpointError(Exception):
+    """Raised when an endpoint answers with a rate limit or server error."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class RpcEndpoint:
+    """Health of a single RPC endpoint, tracked as EWMAs of latency and errors."""
+
+    def __init__(self, url: str, alpha: float = 0.2, window: int = 200):
+        self.url = url
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.failures = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Fold one request into the latency and error-rate averages."""
+        self.requests += 1
+        if not ok:
+            self.failures += 1
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok:
+            self._latencies.append(latency)
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.alpha * (latency - self.latency)
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile over the recent successful requests."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(pct / 100 * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def score(self) -> float:
+        """Expected cost of a request, lower is better. Untried endpoints go first."""
+        if self.requests == 0:
+            return 0.0
+        # An endpoint that has only failed so far is charged a nominal second
+        latency = self.latency if self.latency is not None else 1.0
+        return latency / max(1.0 - self.error_rate, 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "p95": self.latency_percentile(95),
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class RpcRouter(httpx.AsyncBaseTransport):
+    """
+    httpx transport spreading JSON-RPC requests over several endpoints.
+
+    Installed under the shared RPC session, so every AsyncClient call and raw
+    rpc_post goes through it. Endpoints are ranked by health score. Reads go to the
+    best endpoint and are hedged: if no answer arrives within that endpoint's p95
+    latency the next endpoint is asked too and the first good answer wins. Writes
+    fan out to the `write_fanout` best endpoints and the first one accepted wins.
+    Rate limits, server errors and connection errors fail over to the next
+    endpoint. JSON-RPC error bodies count against an endpoint's health too.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        alpha: float = 0.2,
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 2.0,
+        min_hedge_samples: int = 20,
+        write_fanout: int = 2,
+    ):
+        if not urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [RpcEndpoint(url, alpha) for url in urls]
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.min_hedge_samples = min_hedge_samples
+        self.write_fanout = write_fanout
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._background: Set[asyncio.Task] = set()
+        self.hedges = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[RpcEndpoint]:
+        """Endpoints from healthiest to least healthy."""
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score)
+
+    def hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        """How long to wait on `endpoint` before hedging to the next one."""
+        if len(endpoint._latencies) < self.min_hedge_samples:
+            return self.hedge_max_delay
+        p95 = endpoint.latency_percentile(95)
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    @staticmethod
+    def has_rpc_error(response: httpx.Response) -> bool:
+        """Whether a JSON-RPC response, or any response of a batch, is an error."""
+        # Decode a copy, the caller still reads the original stream
+        probe = httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream
+        )
+        try:
+            probe.read()
+            payload = probe.json()
+        except ValueError:
+            return False
+        responses = payload if isinstance(payload, list) else [payload]
+        return any(
+            isinstance(response, dict) and "error" in response for response in responses
+        )
+
+    @staticmethod
+    def is_write(body: bytes) -> bool:
+        """Whether a JSON-RPC request or batch contains a state changing method."""
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        requests = payload if isinstance(payload, list) else [payload]
+        return any(
+            isinstance(request, dict) and request.get("method") in WRITE_METHODS
+            for request in requests
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        endpoints = self.ranked()
+        if self.is_write(body):
+            return await self._fan_out(request, body, endpoints[: self.write_fanout])
+        return await self._hedged(request, body, endpoints)
+
+    async def _send(
+        self, endpoint: RpcEndpoint, request: httpx.Request, body: bytes
+    ) -> httpx.Response:
+        headers = [
+            (name, value)
+            for name, value in request.headers.raw
+            if name.lower() not in (b"host", b"content-length")
+        ]
+        forwarded = httpx.Request(
+            request.method,
+            endpoint.url,
+            headers=headers,
+            content=body,
+            extensions=request.extensions,
+        )
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            response = await self._transport.handle_async_request(forwarded)
+            try:
+                # Keep the encoded bytes, the outer client decodes them
+                content = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            endpoint.record(loop.time() - started, ok=False)
+            raise
+
+        ok = response.status_code < 500 and response.status_code != 429
+        result = httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(content),
+            extensions=response.extensions,
+        )
+        endpoint.record(loop.time() - started, ok=ok and not self.has_rpc_error(result))
+        if not ok:
+            raise RpcEndpointError(result)
+        return result
+
+    async def _hedged(
+        self, request: httpx.Request, body: bytes, endpoints: List[RpcEndpoint]
+    ) -> httpx.Response:
+        remaining = list(endpoints)
+        pending: Set[asyncio.Task] = set()
+        last_error: Optional[Exception] = None
+
+        def launch() -> None:
+            endpoint = remaining.pop(0)
+            pending.add(asyncio.ensure_future(self._send(endpoint, request, body)))
+
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay(endpoints[0]) if remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The request is slower than usual, ask the next endpoint too
+                    self.hedges += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        last_error = e
+
+                if remaining:
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return self._failure(last_error)
+
+    async def _fan_out(
+        self, request: httpx.Request, body: bytes, endpoints: List[RpcEndpoint]
+    ) -> httpx.Response:
+        pending = {
+            asyncio.ensure_future(self._send(endpoint, request, body))
+            for endpoint in endpoints
+        }
+        last_error: Optional[Exception] = None
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                try:
+                    response = task.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if self.has_rpc_error(response):
+                    # Rejected here, another endpoint may still accept it
+                    last_error = RpcEndpointError(response)
+                    continue
+
+                # Let the other copies finish delivering in the background
+                for other in pending:
+                    self._detach(other)
+                return response
+
+        return self._failure(last_error)
+
+    def _detach(self, task: asyncio.Task) -> None:
+        self._background.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._background.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.debug(f"Background RPC write failed: {task.exception()}")
+
+        task.add_done_callback(done)
+
+    @staticmethod
+    def _failure(error: Optional[Exception]) -> httpx.Response:
+        # Hand the last rate limit or server error back to the caller as is
+        if isinstance(error, RpcEndpointError):
+            return error.response
+        raise error
+
+    async def aclose(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-endpoint health and hedging counters."""
+        return {
+            "endpoints": [endpoint.stats() for endpoint in self.ranked()],
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+        }
@@ -0,0 +1,96 @@
+import os
+import json
+import base58
+from typing import Optional
+from anchorpy import Provider, Wallet
+from loguru import logger
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from app.services.rpc_client import get_rpc_client
+
+
+def parse_keypair(secret: str) -> Keypair:
+    """
+    Parse a payout wallet secret.
+
+    Accepts either a JSON byte array or a base58 encoded secret key.
+
+    Raises:
+        ValueError: If the secret is empty or not a valid 64 byte keypair
+    """
+    secret = secret.strip()
+    if not secret:
+        raise ValueError("WALLET_SECRET environment variable is not set")
+
+    try:
+        if secret.startswith("["):
+            secret_bytes = bytes(json.loads(secret))
+        else:
+            secret_bytes = base58.b58decode(secret)
+        if len(secret_bytes) != 64:
+            raise ValueError(f"expected 64 bytes, got {len(secret_bytes)}")
+        return Keypair.from_bytes(secret_bytes)
+    except Exception as e:
+        raise ValueError(f"WALLET_SECRET is not a valid keypair: {str(e)}") from e
+
+
+class SignerService:
+    """
+    Payout wallet loaded once and shared by every payout.
+
+    The secret is parsed and validated a single time, at startup when running the
+    API, and the keypair and anchorpy Provider are reused for every transaction.
+    """
+
+    def __init__(self):
+        self._keypair: Optional[Keypair] = None
+        self._provider: Optional[Provider] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._keypair is not None
+
+    def load(self, secret: Optional[str] = None) -> Keypair:
+        """
+        Parse the wallet secret and build the signer.
+
+        Args:
+            secret: The secret key, read from WALLET_SECRET if None
+
+        Returns:
+            Keypair: The payout keypair
+
+        Raises:
+            ValueError: If the secret is missing or malformed
+        """
+        if secret is None:
+            secret = os.getenv("WALLET_SECRET", "")
+        self._keypair = parse_keypair(secret)
+        self._provider = None
+        logger.info(f"Loaded payout wallet {self._keypair.pubkey()}")
+        return self._keypair
+
+    @property
+    def keypair(self) -> Keypair:
+        """The payout keypair, loaded on first use outside the API."""
+        if self._keypair is None:
+            self.load()
+        return self._keypair
+
+    @property
+    def pubkey(self) -> Pubkey:
+        return self.keypair.pubkey()
+
+    @property
+    def provider(self) -> Provider:
+        """The anchorpy Provider over the shared RPC client."""
+        client = get_rpc_client()
+        # Rebuild if the shared client was closed and recreated since
+        if self._provider is None or self._provider.connection is not client:
+            self._provider = Provider(client, Wallet(self.keypair))
+        return self._provider
+
+
+# Create a singleton instance of the signer service
+signer_service = SignerService()
@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+from loguru import logger
+
+from app.services.db_service import acquire_lease, release_lease, renew_lease
+
+
+class LeaseTimeoutError(Exception):
+    """Raised when a lease held by another process is not released in time."""
+
+
+class LeaseLostError(Exception):
+    """Raised in a holder whose lease could not be renewed and may be taken."""
+
+
+class KeyedSingleflight:
+    """
+    Runs at most one call per key at a time within this process.
+
+    A call made while another call for the same key is in flight does not run;
+    it waits for and shares the in-flight result, or its exception. Calls for
+    different keys run fully in parallel. An execution is cancelled once every
+    caller waiting for it was cancelled.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._callers: Dict[asyncio.Future, int] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` for a key, or join the call already in flight for it.
+
+        Args:
+            key: The key calls are deduplicated on; it must identify the work
+                completely, since every caller gets the same result
+            fn: Coroutine function doing the work
+
+        Returns:
+            The result of the single execution
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+
+        # A cancelled caller must not cancel the execution other callers share,
+        # but once every caller gave up no one is left to run it for
+        self._callers[future] = self._callers.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._callers[future] -= 1
+            if not self._callers[future]:
+                del self._callers[future]
+                future.cancel()
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+
+class KeyedLock:
+    """
+    Mutual exclusion per key within this process.
+
+    Unlike KeyedSingleflight, every holder runs its own work; holders of the same
+    key just take turns. Locks are dropped once no one holds or waits for them.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Hold the lock on a key for the duration of the block."""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+
+class LeasedLock(KeyedLock):
+    """
+    Per-key lock across processes, backed by a lease in the leases collection.
+
+    Holders in this process queue on the in-process lock first. The holder then
+    takes a Mongo lease on the key, waiting for other processes to release it,
+    and renews it until the block exits. A lease left by a dead process is taken
+    over once it expires. A holder whose lease cannot be renewed is cancelled
+    and raises LeaseLostError, since another process may hold the key by then.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float = 60.0,
+        wait_timeout: float = 300.0,
+        poll_interval: float = 0.5,
+    ):
+        super().__init__()
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.holder = uuid.uuid4().hex
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Hold the lock on a key in every process for the duration of the block."""
+        async with super().hold(key):
+            lease_key = f"{self.namespace}:{key}"
+            deadline = asyncio.get_running_loop().time() + self.wait_timeout
+
+            while not await acquire_lease(lease_key, self.holder, self.ttl_seconds):
+                if asyncio.get_running_loop().time() > deadline:
+                    raise LeaseTimeoutError(f"Timed out waiting for lease {lease_key}")
+                await asyncio.sleep(self.poll_interval)
+
+            holder = asyncio.current_task()
+            renewer = asyncio.create_task(self._renew(lease_key, holder))
+            try:
+                yield
+            except asyncio.CancelledError:
+                if not renewer.done() or renewer.cancelled():
+                    raise
+                # Cancelled by _renew: fail the holder instead, so it is retried
+                holder.uncancel()
+                raise LeaseLostError(f"Lost lease {lease_key} while still running")
+            finally:
+                renewer.cancel()
+                await asyncio.gather(renewer, return_exceptions=True)
+                await release_lease(lease_key, self.holder)
+
+    async def _renew(self, lease_key: str, holder: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            if not await renew_lease(lease_key, self.holder, self.ttl_seconds):
+                logger.warning(f"Lost lease {lease_key}, cancelling its holder")
+                holder.cancel()
+                return
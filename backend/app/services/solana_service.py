@@ -1,11 +1,12 @@
 import os
 import json
-from typing import Any, Dict, Optional
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from loguru import logger
 from construct import Struct, Int64ul, Int32ul, Bytes, Array, Container
 from base58 import b58encode
 from pathlib import Path
-import requests
 from solders.pubkey import Pubkey as PublicKey
 import base64
 
@@ -19,9 +20,18 @@ from anchorpy import Idl, Program
 
 # from solana.transaction import AccountMeta, TransactionInstruction
 from solana.rpc.commitment import Confirmed
+from solana.rpc.types import MemcmpOpts
+
+from app.core.config import settings
+from app.services.contract_cache import contract_cache
+from app.services.payment_contract_decoder import (
+    DISCRIMINATOR,
+    decode_payment_contract,
+)
+from app.services.rpc_client import get_rpc_client, rpc_post
 
 # Solana testnet RPC URL
-SOLANA_TESTNET_RPC = "https://api.testnet.sonic.game"
+SOLANA_TESTNET_RPC = settings.SOLANA_RPC_URL
 
 # Wallet secret for distributing tranches (in production, use secure storage)
 WALLET_SECRET = os.getenv("SOLANA_WALLET_SECRET", "")
@@ -58,6 +68,224 @@ def get_program_handle() -> Program:
 PROGRAM_ID = get_program_id()
 
 
+@dataclass
+class PaymentContractSnapshot:
+    """Decoded PaymentContract state together with the slot it was read at."""
+
+    address: str
+    owner: str
+    total_amount: int
+    tranche_count: int
+    recipients: List[str]
+    paid_tranches: int
+    slot: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# getMultipleAccounts accepts at most 100 addresses per call
+MULTIPLE_ACCOUNTS_CHUNK_SIZE = 100
+
+
+def snapshot_from_account(
+    address: str, account: Any, slot: int
+) -> Optional[PaymentContractSnapshot]:
+    """
+    Decode an RPC account into a snapshot.
+
+    Returns None if the account does not exist, is not owned by the program or
+    cannot be decoded.
+    """
+    if account is None:
+        logger.info(f"Address {address} not found on the Solana testnet")
+        return None
+
+    if account.owner != PROGRAM_ID:
+        logger.info(f"Address {address} is not owned by program {PROGRAM_ID}")
+        return None
+
+    try:
+        contract = decode_payment_contract(account.data)
+    except Exception as e:
+        logger.error(f"Error decoding payment contract {address}: {str(e)}")
+        return None
+
+    return PaymentContractSnapshot(
+        address=address,
+        owner=str(contract.owner),
+        total_amount=contract.total_amount,
+        tranche_count=contract.tranche_count,
+        recipients=[str(recipient) for recipient in contract.recipients],
+        paid_tranches=contract.paid_tranches,
+        slot=slot,
+    )
+
+
+async def load_payment_contract(
+    address: str, fresh: bool = False
+) -> Optional[PaymentContractSnapshot]:
+    """
+    Fetch and decode a PaymentContract account with a single RPC call.
+
+    Snapshots are served from the live account mirror or the contract cache when
+    possible.
+
+    Args:
+        address: The contract account address
+        fresh: Skip the mirror and cache and always read the account
+
+    Returns:
+        The decoded snapshot, or None if the account does not exist, is not owned
+        by the program or cannot be decoded
+    """
+    if not fresh:
+        # Import the mirror only when needed to avoid circular imports
+        from app.services.account_mirror import account_mirror
+
+        mirrored = account_mirror.get(address)
+        if mirrored is not None:
+            return mirrored
+
+        cached = contract_cache.get(address)
+        if cached is not None:
+            return cached
+
+    read_started = contract_cache.begin_read()
+    try:
+        response = await get_rpc_client().get_account_info(Pubkey.from_string(address))
+        snapshot = snapshot_from_account(address, response.value, response.context.slot)
+    except Exception as e:
+        logger.error(f"Error loading payment contract {address}: {str(e)}")
+        return None
+
+    if snapshot is not None:
+        contract_cache.put(address, snapshot, snapshot.slot, read_started)
+    return snapshot
+
+
+async def load_payment_contracts(
+    addresses: List[str],
+) -> Dict[str, Optional[PaymentContractSnapshot]]:
+    """
+    Fetch and decode many PaymentContract accounts with getMultipleAccounts.
+
+    Addresses are split into chunks of 100 and the chunks are requested
+    concurrently.
+
+    Args:
+        addresses: The contract account addresses
+
+    Returns:
+        Mapping of address to snapshot, None for accounts that could not be loaded
+    """
+    snapshots: Dict[str, Optional[PaymentContractSnapshot]] = {}
+    pubkeys: Dict[str, Pubkey] = {}
+    for address in dict.fromkeys(addresses):
+        cached = contract_cache.get(address)
+        if cached is not None:
+            snapshots[address] = cached
+            continue
+        try:
+            pubkeys[address] = Pubkey.from_string(address)
+        except ValueError:
+            logger.info(f"Address {address} is not a valid public key")
+            snapshots[address] = None
+
+    valid_addresses = list(pubkeys)
+    chunks = [
+        valid_addresses[i : i + MULTIPLE_ACCOUNTS_CHUNK_SIZE]
+        for i in range(0, len(valid_addresses), MULTIPLE_ACCOUNTS_CHUNK_SIZE)
+    ]
+
+    async def load_chunk(chunk: List[str]) -> None:
+        read_started = contract_cache.begin_read()
+        try:
+            response = await get_rpc_client().get_multiple_accounts(
+                [pubkeys[address] for address in chunk]
+            )
+        except Exception as e:
+            logger.error(f"Error loading payment contracts: {str(e)}")
+            snapshots.update({address: None for address in chunk})
+            return
+
+        for address, account in zip(chunk, response.value):
+            snapshot = snapshot_from_account(address, account, response.context.slot)
+            if snapshot is not None:
+                contract_cache.put(address, snapshot, snapshot.slot, read_started)
+            snapshots[address] = snapshot
+
+    await asyncio.gather(*(load_chunk(chunk) for chunk in chunks))
+    return snapshots
+
+
+# Offset of the owner pubkey, right after the 8 byte discriminator
+OWNER_FILTER_OFFSET = 8
+
+
+def program_account_filters(owner: Optional[str] = None) -> List[MemcmpOpts]:
+    """
+    Build getProgramAccounts filters matching PaymentContract accounts.
+
+    Args:
+        owner: Only match contracts created by this owner
+    """
+    filters = [MemcmpOpts(offset=0, bytes=b58encode(DISCRIMINATOR).decode())]
+    if owner is not None:
+        filters.append(MemcmpOpts(offset=OWNER_FILTER_OFFSET, bytes=owner))
+    return filters
+
+
+async def load_program_contracts(
+    owner: Optional[str] = None,
+) -> List[PaymentContractSnapshot]:
+    """
+    Fetch every PaymentContract account of the program with getProgramAccounts.
+
+    Args:
+        owner: Only load contracts created by this owner
+
+    Returns:
+        List of decoded snapshots
+    """
+    _, snapshots = await load_program_snapshot(owner)
+    return snapshots
+
+
+async def load_program_snapshot(
+    owner: Optional[str] = None,
+) -> Tuple[int, List[PaymentContractSnapshot]]:
+    """
+    Fetch every PaymentContract account along with the slot of the scan.
+
+    Accounts are filtered on the PaymentContract discriminator, and on the owner
+    when one is given. The response has no context, so snapshots are stamped with
+    the slot read just before the scan.
+
+    Args:
+        owner: Only load contracts created by this owner
+
+    Returns:
+        The scan slot and the decoded snapshots
+    """
+    client = get_rpc_client()
+    slot = (await client.get_slot()).value
+    response = await client.get_program_accounts(
+        PROGRAM_ID,
+        encoding="base64",
+        filters=program_account_filters(owner),
+    )
+
+    snapshots = []
+    for keyed_account in response.value:
+        snapshot = snapshot_from_account(
+            str(keyed_account.pubkey), keyed_account.account, slot
+        )
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return slot, snapshots
+
+
 async def validate_contract_address(address: str, get_tranches: bool = False) -> Any:
     """
     Validate that a contract address exists on the Solana testnet.
@@ -72,40 +300,22 @@ async def validate_contract_address(address: str, get_tranches: bool = False) ->
         Otherwise, returns True if the address is valid, False if not.
     """
     try:
-        # Create Solana client
-        client = AsyncClient(SOLANA_TESTNET_RPC)
-
-        # Convert address string to PublicKey object
-        public_key = Pubkey.from_string(address)
-
-        # Get account info
-        response = await client.get_account_info(public_key)
-
-        # Check if account exists
-        if not response.value:
-            logger.info(f"Address {address} not found on the Solana testnet")
-            await client.close()
+        # A single read both validates the account and decodes it
+        snapshot = await load_payment_contract(address)
+        if snapshot is None:
             return False
 
         # If we're just validating existence, return True here
         if not get_tranches:
-            await client.close()
             return True
 
-        # Call the function to parse contract data if needed
-        if get_tranches:
-            contract_data = get_payment_info(address)
-            await client.close()
-            return contract_data
-
-        await client.close()
-        return True
+        return snapshot.to_dict()
     except Exception as e:
         logger.error(f"Error validating Solana address: {str(e)}")
         return False
 
 
-def get_payment_info(account_pubkey: str) -> Optional[Dict]:
+async def get_payment_info(account_pubkey: str) -> Optional[Dict]:
     """
     Get contract data using raw REST commands to Solana RPC.
 
@@ -127,8 +337,8 @@ def get_payment_info(account_pubkey: str) -> Optional[Dict]:
             "params": [account_pubkey, {"encoding": "base64"}],
         }
 
-        # Make RPC request
-        response = requests.post(SOLANA_TESTNET_RPC, json=payload)
+        # Make RPC request over the shared keep-alive session
+        response = await rpc_post(payload)
         if response.status_code != 200:
             logger.error(f"RPC request failed with status code: {response.status_code}")
             return None
@@ -146,61 +356,8 @@ def get_payment_info(account_pubkey: str) -> Optional[Dict]:
         account_data_b64 = result["result"]["value"]["data"][0]
         account_data = base64.b64decode(account_data_b64)
 
-        # Account data structure for PaymentContract:
-        # 1. Discriminator (8 bytes) - [151, 55, 24, 165, 12, 206, 38, 31]
-        # 2. Owner (32 bytes) - Pubkey
-        # 3. Total amount (8 bytes) - u64
-        # 4. Tranche count (8 bytes) - u64
-        # 5. Recipients vector (4 bytes for length + n*32 bytes for pubkeys)
-        # 6. Paid tranches (8 bytes) - u64
-
-        # Skip 8-byte discriminator
-        offset = 8
-
-        # Extract owner pubkey (32 bytes)
-        owner_bytes = account_data[offset : offset + 32]
-        owner = str(PublicKey(owner_bytes))
-        offset += 32
-
-        # Extract total_amount (u64/8 bytes)
-        total_amount = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract tranche_count (u64/8 bytes)
-        tranche_count = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-        offset += 8
-
-        # Extract recipients vector
-        # First 4 bytes indicate vector length
-        recipients_len = int.from_bytes(
-            account_data[offset : offset + 4], byteorder="little"
-        )
-        offset += 4
-
-        recipients = []
-        for _ in range(recipients_len):
-            recipient_bytes = account_data[offset : offset + 32]
-            recipient = str(PublicKey(recipient_bytes))
-            recipients.append(recipient)
-            offset += 32
-
-        # Extract paid_tranches (u64/8 bytes)
-        paid_tranches = int.from_bytes(
-            account_data[offset : offset + 8], byteorder="little"
-        )
-
-        # Construct and return the parsed data
-        contract_data = {
-            "owner": owner,
-            "total_amount": total_amount,
-            "tranche_count": tranche_count,
-            "recipients": recipients,
-            "paid_tranches": paid_tranches,
-        }
+        # Decode with the shared PaymentContract decoder
+        contract_data = decode_payment_contract(account_data).to_dict()
 
         logger.info(
             f"Contract data retrieved using raw RPC: {json.dumps(contract_data, indent=2)}"
@@ -242,6 +399,7 @@ async def transfer_tranche(
         from app.services.distribute_tranche_service import main as tranche_distributor
 
         success = await tranche_distributor(contract_address)
+        contract_cache.invalidate(contract_address)
         return success
 
     except Exception as e:
@@ -249,3 +407,49 @@ async def transfer_tranche(
             f"Error distributing tranche for contract {contract_address}: {str(e)}"
         )
         return False
+
+
+async def transfer_tranches(
+    contract_address: str,
+    count: int,
+    snapshot: Optional[PaymentContractSnapshot] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Distribute the next `count` tranches of a contract in as few transactions as fit.
+
+    With PAYOUT_BATCH_ENABLED the tranches are sent through the payout batcher and
+    may share a v0 transaction with the payouts of other contracts.
+
+    Args:
+        contract_address: The contract address
+        count: Number of tranches to distribute
+        snapshot: Already loaded contract state, saves re-reading the account
+
+    Returns:
+        List[Dict[str, Any]]: One result per attempted tranche, see
+        distribute_tranche_service.distribute_tranches
+    """
+    try:
+        # Import the functions only when needed to avoid circular imports
+        from app.services.distribute_tranche_service import distribute_tranches
+        from app.services.payout_batcher import payout_batcher
+
+        contract_data = snapshot.to_dict() if snapshot else None
+        if settings.PAYOUT_BATCH_ENABLED:
+            results = await payout_batcher.submit(
+                contract_address, count, contract_data
+            )
+        else:
+            results = await distribute_tranches(contract_address, count, contract_data)
+
+        # Our own payouts are what changes the account, so drop the cached state
+        if results:
+            contract_cache.invalidate(contract_address)
+
+        return results
+
+    except Exception as e:
+        logger.error(
+            f"Error distributing tranches for contract {contract_address}: {str(e)}"
+        )
+        return []
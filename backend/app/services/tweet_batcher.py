@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# get_tweets accepts at most 100 ids per call
+MAX_TWEETS_PER_LOOKUP = 100
+
+# Looks up a list of tweet ids, returning a result or None for every id
+BatchLookup = Callable[[List[str]], Awaitable[Dict[str, Optional[Dict[str, Any]]]]]
+
+
+class TweetLookupBatcher:
+    """
+    Coalesces concurrent single-tweet lookups into get_tweets calls.
+
+    Lookups arriving within `window` seconds of the first one are queued and
+    sent as one call of up to 100 ids, which costs a single request of rate
+    limit quota. Every caller gets back the result for its own id, None if the
+    API reported an error for it. Concurrent lookups of the same id share one
+    slot in the batch. If the call itself fails, every caller in it gets the
+    exception. The same batching serves get_users lookups by id or username,
+    which take up to 100 of them per call as well.
+    """
+
+    def __init__(
+        self,
+        lookup: BatchLookup,
+        window: float = 0.005,
+        max_batch_size: int = MAX_TWEETS_PER_LOOKUP,
+    ):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lookup = lookup
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.lookups = 0
+
+    async def lookup(self, tweet_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look a tweet up in the next batch.
+
+        Args:
+            tweet_id: The tweet ID
+
+        Returns:
+            The lookup result, None if the API reported an error for this id
+        """
+        self.lookups += 1
+        future = self._pending.get(tweet_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[tweet_id] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # Callers sharing a lookup must not cancel it for each other
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._send(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, pending: Dict[str, asyncio.Future]) -> None:
+        self.calls += 1
+        try:
+            results = await self._lookup(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for tweet_id, future in pending.items():
+            if not future.done():
+                future.set_result(results.get(tweet_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "lookups": self.lookups,
+            "ids_per_call": self.lookups / self.calls if self.calls else 0.0,
+        }
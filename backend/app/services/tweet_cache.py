@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Fields of a post that never change once it is published
+CONTENT_FIELDS = ("tweet_id", "author_id", "author_handle", "text", "created_at")
+
+
+class _CachedTweet:
+    def __init__(self, content: Dict[str, Any], stored_at: float):
+        self.content = content
+        self.content_stored_at = stored_at
+        self.metrics: Optional[Dict[str, Any]] = None
+        self.metrics_stored_at = 0.0
+
+
+class TweetCache:
+    """
+    Bounded LRU cache of tweet lookups, split by how fast the data changes.
+
+    The author and text of a tweet never change and are kept for `content_ttl`
+    seconds. public_metrics keep moving and are kept for `metrics_ttl` seconds,
+    so a lookup with cached content but stale metrics only needs a metrics call
+    instead of the full lookup with the author expansion.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        content_ttl: float,
+        metrics_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.content_ttl = content_ttl
+        self.metrics_ttl = metrics_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, _CachedTweet]" = OrderedDict()
+        self.content_hits = 0
+        self.content_misses = 0
+        self.metrics_hits = 0
+        self.metrics_misses = 0
+        self.evictions = 0
+
+    def get(
+        self, tweet_id: str, refresh_metrics: bool = False
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Look a tweet up in both tiers.
+
+        Args:
+            tweet_id: The tweet ID
+            refresh_metrics: Treat cached metrics as stale
+
+        Returns:
+            Tuple of the cached content and metrics, each None when missing or stale
+        """
+        entry = self._entries.get(tweet_id)
+        now = self._clock()
+        if entry is None or now - entry.content_stored_at > self.content_ttl:
+            self._entries.pop(tweet_id, None)
+            self.content_misses += 1
+            self.metrics_misses += 1
+            return None, None
+
+        self._entries.move_to_end(tweet_id)
+        self.content_hits += 1
+        if (
+            refresh_metrics
+            or entry.metrics is None
+            or now - entry.metrics_stored_at > self.metrics_ttl
+        ):
+            self.metrics_misses += 1
+            return entry.content, None
+
+        self.metrics_hits += 1
+        return entry.content, entry.metrics
+
+    def put(self, post_info: Dict[str, Any]) -> None:
+        """Store a full lookup in the shape returned by validate_post_url."""
+        if self.max_entries <= 0:
+            return
+
+        tweet_id = str(post_info["tweet_id"])
+        content = {field: post_info.get(field) for field in CONTENT_FIELDS}
+        self._entries[tweet_id] = _CachedTweet(content, self._clock())
+        self._entries.move_to_end(tweet_id)
+        self.put_metrics(tweet_id, post_info["public_metrics"])
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put_metrics(self, tweet_id: str, metrics: Dict[str, Any]) -> None:
+        """Refresh the metrics of a cached tweet."""
+        entry = self._entries.get(tweet_id)
+        if entry is not None:
+            entry.metrics = metrics
+            entry.metrics_stored_at = self._clock()
+
+    def invalidate(self, tweet_id: str) -> None:
+        """Drop a tweet, e.g. after it was deleted."""
+        self._entries.pop(tweet_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters of both tiers and the current size."""
+
+        def hit_rate(hits: int, misses: int) -> float:
+            return hits / (hits + misses) if hits + misses else 0.0
+
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "content_ttl": self.content_ttl,
+            "metrics_ttl": self.metrics_ttl,
+            "content_hits": self.content_hits,
+            "content_misses": self.content_misses,
+            "content_hit_rate": hit_rate(self.content_hits, self.content_misses),
+            "metrics_hits": self.metrics_hits,
+            "metrics_misses": self.metrics_misses,
+            "metrics_hit_rate": hit_rate(self.metrics_hits, self.metrics_misses),
+            "evictions": self.evictions,
+        }
+
+
+# Create a singleton instance of the tweet cache
+tweet_cache = TweetCache(
+    max_entries=settings.TWEET_CACHE_SIZE,
+    content_ttl=settings.TWEET_CONTENT_TTL,
+    metrics_ttl=settings.TWEET_METRICS_TTL,
+)
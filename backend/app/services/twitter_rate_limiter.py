@@ -0,0 +1,222 @@
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Mapping, Optional
+from loguru import logger
+
+# Length of the Twitter API v2 rate limit window
+RATE_LIMIT_WINDOW = 15 * 60
+
+
+class RateLimited(Exception):
+    """Raised when a Twitter call cannot start before the caller's deadline."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(
+            f"Twitter rate limit for {endpoint}, retry after {retry_after:.0f}s"
+        )
+
+
+def endpoint_key(path: str) -> str:
+    """
+    Normalize a Twitter API path into the endpoint its rate limit applies to.
+
+    Example:
+        /2/tweets/1234 -> /2/tweets/:id
+        /2/users/by/username/jack -> /2/users/by/username/:username
+    """
+    path = re.sub(r"^(/2/users/by/username)/[^/]+", r"\1/:username", path)
+    return re.sub(r"(?<!^)/\d+(?=/|$)", "/:id", path)
+
+
+class TokenBucket:
+    """
+    Request budget of one Twitter endpoint for the current window.
+
+    The budget and the window end come from the x-rate-limit-* headers of the
+    latest response; until one is seen `default_limit` is assumed. Callers take a
+    token while any is left, so the whole window's quota is usable, and otherwise
+    queue in arrival order for the next window.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        default_limit: int,
+        window: float = RATE_LIMIT_WINDOW,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.endpoint = endpoint
+        self.limit = max(default_limit, 1)
+        self.window = window
+        self._clock = clock
+        self.remaining = default_limit
+        self.reset_at: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Headers arrive from the Twitter worker threads
+        self._lock = threading.Lock()
+
+    def _roll(self, now: float) -> None:
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = None
+
+    def _wait(self, position: int, now: float) -> float:
+        if position < self.remaining:
+            return 0.0
+        windows = (position - self.remaining) // self.limit
+        reset_at = self.reset_at if self.reset_at is not None else now
+        return max(reset_at - now, 0.0) + windows * self.window
+
+    def _take(self, now: float) -> None:
+        self.remaining -= 1
+        if self.reset_at is None:
+            self.reset_at = now + self.window
+
+    def estimate_wait(self, position: Optional[int] = None) -> float:
+        """Seconds until the caller at `position` in the queue can start."""
+        with self._lock:
+            now = self._clock()
+            self._roll(now)
+            if position is None:
+                position = len(self._waiters)
+            return self._wait(position, now)
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Take one request from the budget, waiting for the next window if needed.
+
+        Args:
+            deadline: Clock time by which the call must be able to start
+
+        Raises:
+            RateLimited: If the wait would run past `deadline`
+        """
+        with self._lock:
+            now = self._clock()
+            self._roll(now)
+            if not self._waiters and self.remaining > 0:
+                self._take(now)
+                return
+            wait = self._wait(len(self._waiters), now)
+
+        if deadline is not None and now + wait > deadline:
+            raise RateLimited(self.endpoint, wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Adopt the budget reported in the x-rate-limit-* response headers."""
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            self.limit = max(limit, 1)
+            # Calls started since the response was produced already spent tokens
+            if self.reset_at is None or abs(reset_at - self.reset_at) > 1:
+                self.remaining = remaining
+            else:
+                self.remaining = min(self.remaining, remaining)
+            self.reset_at = reset_at
+
+    def drain(self) -> None:
+        """Release queued callers the current budget allows."""
+        self._timer = None
+        with self._lock:
+            self._roll(self._clock())
+            while self._waiters and self.remaining > 0:
+                future = self._waiters.popleft()
+                if future.done():
+                    continue
+                self._take(self._clock())
+                future.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+        self._timer = asyncio.get_running_loop().call_later(
+            self.estimate_wait(0), self.drain
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in": (
+                max(self.reset_at - self._clock(), 0.0) if self.reset_at else None
+            ),
+            "queued": len(self._waiters),
+        }
+
+
+class TwitterRateLimiter:
+    """
+    Per-endpoint token buckets for the Twitter API, fed by response headers.
+
+    `hook` is installed as a requests response hook on the tweepy session, so
+    every response, 429s included, updates the bucket of its endpoint.
+    """
+
+    def __init__(
+        self,
+        default_limit: int = 300,
+        window: float = RATE_LIMIT_WINDOW,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.default_limit = default_limit
+        self.window = window
+        self._clock = clock
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            bucket = TokenBucket(
+                endpoint, self.default_limit, self.window, clock=self._clock
+            )
+            self.buckets[endpoint] = bucket
+        return bucket
+
+    async def acquire(self, endpoint: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a request slot on `endpoint`.
+
+        Args:
+            endpoint: The endpoint key, see endpoint_key
+            timeout: Longest acceptable wait in seconds, None waits as long as needed
+
+        Raises:
+            RateLimited: If the slot is further away than `timeout`
+        """
+        deadline = self._clock() + timeout if timeout is not None else None
+        await self.bucket(endpoint).acquire(deadline)
+
+    def hook(self, response: Any, *args: Any, **kwargs: Any) -> Any:
+        """requests response hook recording the rate limit headers."""
+        if "x-rate-limit-remaining" in response.headers:
+            path = response.request.path_url.split("?")[0]
+            self.bucket(endpoint_key(path)).update(response.headers)
+        if response.status_code == 429:
+            logger.warning(f"Twitter rate limit hit on {response.request.path_url}")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {endpoint: bucket.stats() for endpoint, bucket in self.buckets.items()}
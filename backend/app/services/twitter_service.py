@@ -1,18 +1,59 @@
 import tweepy
 import re
-from typing import Dict, List, Optional, Union, Any
+import functools
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar, Union, Any
 from datetime import datetime, date
 from app.core.config import settings
 from app.schemas.twitter import TweetMetrics
+from app.services.tweet_batcher import TweetLookupBatcher
+from app.services.tweet_cache import TweetCache, tweet_cache
+from app.services.twitter_rate_limiter import RateLimited, TwitterRateLimiter
+from app.services.twitter_user_cache import (
+    TwitterUserCache,
+    normalize_handle,
+    twitter_user_cache,
+)
 from loguru import logger
 import asyncio
 import time
 
+T = TypeVar("T")
+
+# Twitter usernames are 1 to 15 letters, digits or underscores
+HANDLE_PATTERN = re.compile(r"^\w{1,15}$", re.ASCII)
+
+
+class TwitterUnavailable(Exception):
+    """Raised when a Twitter call failed with a server or network error."""
+
+    def __init__(self, endpoint: str, retry_after: float = 0.0):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Twitter API unavailable for {endpoint}")
+
 
 class TwitterService:
-    """Service for interacting with the Twitter API."""
+    """
+    Service for interacting with the Twitter API.
+
+    tweepy's Client is blocking, so the async methods run its calls on a small
+    dedicated thread pool instead of the event loop. The sync methods are what
+    runs on the pool. Calls are admitted by a per-endpoint rate limiter that
+    learns the quota from the x-rate-limit-* headers of every response.
+    Authors and handles are resolved through the user cache and get_users
+    calls of up to 100 ids or usernames.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = settings.TWITTER_MAX_WORKERS,
+        max_wait: Optional[float] = settings.TWITTER_MAX_WAIT,
+        rate_limiter: Optional[TwitterRateLimiter] = None,
+        cache: Optional[TweetCache] = None,
+        users: Optional[TwitterUserCache] = None,
+    ):
         """Initialize the Twitter API client."""
         self.client = tweepy.Client(
             bearer_token=settings.TWITTER_BEARER_TOKEN,
@@ -21,53 +62,247 @@ class TwitterService:
             access_token=settings.TWITTER_ACCESS_TOKEN,
             access_token_secret=settings.TWITTER_ACCESS_SECRET,
         )
+        self.max_workers = max_workers
+        self.max_wait = max_wait
+        self.rate_limiter = rate_limiter or TwitterRateLimiter(
+            default_limit=settings.TWITTER_RATE_LIMIT_DEFAULT
+        )
+        self.client.session.hooks["response"].append(self.rate_limiter.hook)
+        self.cache = cache or tweet_cache
+        # Concurrent lookups share get_tweets calls, full ones and metrics-only ones
+        self.post_batcher = TweetLookupBatcher(
+            functools.partial(self.run, "/2/tweets", self.lookup_tweets),
+            window=settings.TWEET_BATCH_WINDOW,
+        )
+        self.metrics_batcher = TweetLookupBatcher(
+            functools.partial(self.run, "/2/tweets", self.lookup_public_metrics),
+            window=settings.TWEET_BATCH_WINDOW,
+        )
+        self.users = users or twitter_user_cache
+        # User lookups missing from the cache share get_users calls too
+        self.user_id_batcher = TweetLookupBatcher(
+            functools.partial(self.run, "/2/users", self.lookup_users),
+            window=settings.TWEET_BATCH_WINDOW,
+        )
+        self.username_batcher = TweetLookupBatcher(
+            functools.partial(self.run, "/2/users/by", self.lookup_users, None),
+            window=settings.TWEET_BATCH_WINDOW,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
 
-    def get_tweet_metrics(self, tweet_ids: List[str]) -> List[TweetMetrics]:
+    async def run(
+        self, endpoint: str, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
         """
-        Get performance metrics for the specified tweets.
+        Run a blocking Twitter call on the Twitter thread pool once its quota allows.
 
         Args:
-            tweet_ids: List of tweet IDs to analyze
+            endpoint: Rate limit endpoint of the call, e.g. "/2/tweets/:id"
+            func: The blocking function, usually one of the sync methods
+            *args: Positional arguments for `func`
+            **kwargs: Keyword arguments for `func`
 
         Returns:
-            List of tweet metrics
-        """
-        metrics = []
+            The return value of `func`
 
+        Raises:
+            RateLimited: If the call could not start within `max_wait` seconds, or
+                Twitter answered 429
+            TwitterUnavailable: If Twitter answered 5xx or could not be reached
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="twitter"
+            )
+        await self.rate_limiter.acquire(endpoint, self.max_wait)
+        loop = asyncio.get_running_loop()
         try:
-            # Fetch tweets with public metrics
-            tweets = self.client.get_tweets(
-                tweet_ids,
-                tweet_fields=["created_at", "public_metrics", "text"],
-                expansions=["author_id"],
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
             )
+        except tweepy.TooManyRequests as e:
+            raise RateLimited(endpoint, self._retry_after(endpoint, e)) from e
+        except (tweepy.TwitterServerError, requests.RequestException) as e:
+            logger.warning(f"Twitter call to {endpoint} failed: {str(e)}")
+            raise TwitterUnavailable(endpoint) from e
+
+    def _retry_after(self, endpoint: str, error: tweepy.TooManyRequests) -> float:
+        """Seconds until the quota of a 429 response resets."""
+        try:
+            reset_at = float(error.response.headers["x-rate-limit-reset"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return self.rate_limiter.bucket(endpoint).estimate_wait(0)
+        return max(reset_at - time.time(), 0.0)
+
+    def close(self) -> None:
+        """Shut the thread pool down, calls already running finish on their own."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def fetch_tweet_metrics(self, tweet_ids: List[str]) -> List[TweetMetrics]:
+        """
+        Async version of get_tweet_metrics.
+
+        Raises:
+            RateLimited: If the lookup was rate limited
+            TwitterUnavailable: If Twitter could not be reached
+            tweepy.TweepyException: If Twitter rejected the request
+        """
+        return await self.run("/2/tweets", self.get_tweet_metrics, tweet_ids)
+
+    async def fetch_post(
+        self, url: str, refresh_metrics: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Async version of validate_post_url, served from the tweet cache when possible.
+
+        Lookups go through the batchers, so concurrent ones share get_tweets
+        calls. A tweet whose author and text are cached but whose metrics are
+        stale only joins a metrics-only call instead of the full lookup.
+
+        Args:
+            url: Twitter post URL
+            refresh_metrics: Fetch fresh public_metrics even if cached ones are valid
+
+        Returns:
+            Dict containing post information or None if invalid
+
+        Raises:
+            RateLimited: If the lookup was rate limited
+            TwitterUnavailable: If Twitter could not be reached
+        """
+        tweet_id = self.extract_tweet_id_from_url(url)
+        if not tweet_id:
+            logger.error(f"Invalid Twitter URL format: {url}")
+            return None
 
-            if not tweets.data:
-                return []
-
-            # Process each tweet
-            for tweet in tweets.data:
-                metrics.append(
-                    TweetMetrics(
-                        tweet_id=tweet.id,
-                        text=tweet.text,
-                        created_at=tweet.created_at,
-                        impression_count=getattr(
-                            tweet.public_metrics, "impression_count", 0
-                        ),
-                        like_count=getattr(tweet.public_metrics, "like_count", 0),
-                        retweet_count=getattr(tweet.public_metrics, "retweet_count", 0),
-                        reply_count=getattr(tweet.public_metrics, "reply_count", 0),
-                        quote_count=getattr(tweet.public_metrics, "quote_count", 0),
-                        url=f"https://twitter.com/user/status/{tweet.id}",
-                    )
+        content, metrics = self.cache.get(tweet_id, refresh_metrics)
+        if content is None:
+            post_info = await self.post_batcher.lookup(tweet_id)
+            if not post_info:
+                logger.error(f"Tweet not found: {url}")
+                return None
+            if post_info["author_handle"]:
+                await self.users.put(
+                    [
+                        {
+                            "id": post_info["author_id"],
+                            "username": post_info["author_handle"],
+                        }
+                    ]
                 )
+            else:
+                author_handle = await self.resolve_username(post_info["author_id"])
+                if not author_handle:
+                    logger.error(f"Could not determine author of tweet: {tweet_id}")
+                    return None
+                post_info = {**post_info, "author_handle": author_handle}
+            self.cache.put(post_info)
+            return post_info
+
+        if metrics is None:
+            metrics = await self.metrics_batcher.lookup(tweet_id)
+            if metrics is None:
+                self.cache.invalidate(tweet_id)
+                return None
+            self.cache.put_metrics(tweet_id, metrics)
+
+        return {**content, "public_metrics": metrics}
 
-            return metrics
+    async def resolve_username(self, user_id: str) -> Optional[str]:
+        """
+        Get the username of a user id, from the user cache or a batched get_users call.
 
+        Args:
+            user_id: Twitter user id
+
+        Returns:
+            str: The username, None if the user could not be read
+        """
+        user_id = str(user_id)
+        usernames = await self.users.get_usernames([user_id])
+        if user_id in usernames:
+            return usernames[user_id]
+
+        try:
+            user = await self.user_id_batcher.lookup(user_id)
         except tweepy.TweepyException as e:
-            print(f"Twitter API error: {str(e)}")
-            return []
+            logger.error(f"Error looking up Twitter user {user_id}: {str(e)}")
+            return None
+
+        if not user:
+            return None
+        await self.users.put([user])
+        return user["username"]
+
+    async def check_handle(self, twitter_handle: str) -> bool:
+        """
+        Async version of validate_handle, answered from the user cache when possible.
+
+        Args:
+            twitter_handle: The Twitter username to validate (with or without @)
+
+        Returns:
+            bool: True if the handle exists, False otherwise
+
+        Raises:
+            RateLimited: If the lookup was rate limited
+            TwitterUnavailable: If Twitter could not be reached or did not answer
+                for the handle
+        """
+        handle = normalize_handle(twitter_handle)
+        # A malformed handle would fail the whole get_users call it is batched in
+        if not HANDLE_PATTERN.match(handle):
+            return False
+
+        known = await self.users.get_ids([handle])
+        if handle in known:
+            return known[handle] is not None
+
+        # Failed lookups raise: the handle may well exist, so nothing is cached
+        user = await self.username_batcher.lookup(handle)
+        if user:
+            await self.users.put([user])
+        else:
+            self.users.put_missing([handle])
+        return user is not None
+
+    def get_tweet_metrics(self, tweet_ids: List[str]) -> List[TweetMetrics]:
+        """
+        Get performance metrics for the specified tweets.
+
+        Args:
+            tweet_ids: List of tweet IDs to analyze
+
+        Returns:
+            List of tweet metrics, without the tweets that could not be read
+
+        Raises:
+            tweepy.TweepyException: If the call failed, so that fetch_tweet_metrics
+                can report rate limits and outages instead of missing tweets
+        """
+        # Fetch tweets with public metrics
+        tweets = self.client.get_tweets(
+            tweet_ids,
+            tweet_fields=["created_at", "public_metrics", "text"],
+            expansions=["author_id"],
+        )
+
+        return [
+            TweetMetrics(
+                tweet_id=tweet.id,
+                text=tweet.text,
+                created_at=tweet.created_at,
+                impression_count=getattr(tweet.public_metrics, "impression_count", 0),
+                like_count=getattr(tweet.public_metrics, "like_count", 0),
+                retweet_count=getattr(tweet.public_metrics, "retweet_count", 0),
+                reply_count=getattr(tweet.public_metrics, "reply_count", 0),
+                quote_count=getattr(tweet.public_metrics, "quote_count", 0),
+                url=f"https://twitter.com/user/status/{tweet.id}",
+            )
+            for tweet in tweets.data or []
+        ]
 
     def calculate_total_metrics(self, metrics: List[TweetMetrics]) -> Dict[str, int]:
         """
@@ -142,68 +377,177 @@ class TwitterService:
 
         return None
 
-    def validate_post_url(self, url: str) -> Optional[Dict[str, Any]]:
+    def lookup_tweets(
+        self, tweet_ids: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
         """
-        Validate a Twitter post URL and extract information from it.
+        Look up to 100 tweets and their authors with a single get_tweets call.
+
+        The author handle comes from the author_id expansion. It is None for
+        tweets whose author the response did not include.
 
         Args:
-            url: Twitter post URL
+            tweet_ids: The tweet IDs
 
         Returns:
-            Dict containing post information or None if invalid
+            Post information keyed by tweet ID, None for tweets the API reported
+            as unavailable
+
+        Raises:
+            tweepy.TweepyException: If the call failed, so that tweets are not
+                mistaken for missing ones
         """
-        try:
-            # Extract tweet ID from URL
-            tweet_id = self.extract_tweet_id_from_url(url)
-            if not tweet_id:
-                logger.error(f"Invalid Twitter URL format: {url}")
-                return None
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(tweet_ids)
+        tweets = self.client.get_tweets(
+            tweet_ids,
+            tweet_fields=["created_at", "public_metrics", "text"],
+            expansions=["author_id"],
+        )
 
-            # Fetch tweet data
-            tweet = self.client.get_tweet(
-                tweet_id,
-                tweet_fields=["created_at", "public_metrics", "text"],
-                expansions=["author_id"],
+        for error in tweets.errors or []:
+            logger.error(
+                f"Tweet {error.get('resource_id') or error.get('value')} "
+                f"unavailable: {error.get('detail') or error.get('title')}"
             )
 
-            if not tweet.data:
-                logger.error(f"Tweet not found: {url}")
-                return None
-
-            # Get author data
-            if tweet.includes and "users" in tweet.includes:
-                author = tweet.includes["users"][0]
-                author_handle = author.username
-            else:
-                # Fallback - get user from the tweet's author_id
-                author = self.client.get_user(id=tweet.data.author_id).data
-                author_handle = author.username if author else None
-
-            if not author_handle:
-                logger.error(f"Could not determine author of tweet: {url}")
-                return None
+        # Get author data
+        authors = {
+            str(user.id): user.username
+            for user in (tweets.includes or {}).get("users", [])
+        }
 
-            # Return tweet info
-            return {
+        for tweet in tweets.data or []:
+            tweet_id = str(tweet.id)
+            results[tweet_id] = {
                 "tweet_id": tweet_id,
-                "author_id": tweet.data.author_id,
-                "author_handle": author_handle,
-                "text": tweet.data.text,
-                "created_at": tweet.data.created_at,
+                "author_id": str(tweet.author_id),
+                # None if the expansion left the author out, callers resolve it
+                "author_handle": authors.get(str(tweet.author_id)),
+                "text": tweet.text,
+                "created_at": tweet.created_at,
                 "public_metrics": (
-                    tweet.data.public_metrics._json
-                    if hasattr(tweet.data.public_metrics, "_json")
-                    else tweet.data.public_metrics
+                    tweet.public_metrics._json
+                    if hasattr(tweet.public_metrics, "_json")
+                    else tweet.public_metrics
                 ),
             }
 
+        return results
+
+    def lookup_public_metrics(
+        self, tweet_ids: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get only the public metrics of up to 100 tweets, without the author expansion.
+
+        Args:
+            tweet_ids: The tweet IDs
+
+        Returns:
+            Public metrics keyed by tweet ID, None for tweets the API reported as
+            unavailable
+
+        Raises:
+            tweepy.TweepyException: If the call failed
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(tweet_ids)
+        tweets = self.client.get_tweets(tweet_ids, tweet_fields=["public_metrics"])
+        for tweet in tweets.data or []:
+            results[str(tweet.id)] = (
+                tweet.public_metrics._json
+                if hasattr(tweet.public_metrics, "_json")
+                else tweet.public_metrics
+            )
+
+        return results
+
+    def lookup_users(
+        self,
+        user_ids: Optional[List[str]] = None,
+        usernames: Optional[List[str]] = None,
+    ) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        Look up to 100 users by id or by username with a single get_users call.
+
+        Args:
+            user_ids: Twitter user ids
+            usernames: Lowercase usernames, used when no ids are given
+
+        Returns:
+            Dict with "id" and "username" keyed by the id or lowercase username
+            looked up, None for users the API reported as not found
+
+        Raises:
+            tweepy.TweepyException: If the call failed, so that users are not
+                mistaken for missing ones
+            TwitterUnavailable: If the response left some users unanswered
+        """
+        keys = user_ids or usernames or []
+        if user_ids:
+            users = self.client.get_users(ids=user_ids)
+        else:
+            users = self.client.get_users(usernames=usernames)
+
+        results: Dict[str, Optional[Dict[str, str]]] = {}
+        for user in users.data or []:
+            info = {"id": str(user.id), "username": user.username}
+            key = info["id"] if user_ids else user.username.lower()
+            if key in keys:
+                results[key] = info
+
+        # Users the API reported as not found, suspended and the like
+        for error in users.errors or []:
+            key = str(error.get("value") or error.get("resource_id") or "")
+            key = key if user_ids else key.lower()
+            if key in keys and key not in results:
+                results[key] = None
+
+        unanswered = [key for key in keys if key not in results]
+        if unanswered:
+            raise TwitterUnavailable("/2/users")
+
+        return results
+
+    def validate_post_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Validate a Twitter post URL and extract information from it.
+
+        Args:
+            url: Twitter post URL
+
+        Returns:
+            Dict containing post information or None if invalid
+        """
+        # Extract tweet ID from URL
+        tweet_id = self.extract_tweet_id_from_url(url)
+        if not tweet_id:
+            logger.error(f"Invalid Twitter URL format: {url}")
+            return None
+
+        try:
+            post_info = self.lookup_tweets([tweet_id])[tweet_id]
         except tweepy.TweepyException as e:
-            logger.error(f"Error validating Twitter URL {url}: {str(e)}")
+            logger.error(f"Error looking up tweet {tweet_id}: {str(e)}")
             return None
-        except Exception as e:
-            logger.error(f"General error validating Twitter URL {url}: {str(e)}")
+        if not post_info:
+            logger.error(f"Tweet not found: {url}")
             return None
 
+        if not post_info["author_handle"]:
+            # Fallback - get user from the tweet's author_id
+            try:
+                author = self.lookup_users([post_info["author_id"]])
+                author = author[post_info["author_id"]]
+            except (tweepy.TweepyException, TwitterUnavailable) as e:
+                logger.error(f"Error looking up author of tweet {tweet_id}: {str(e)}")
+                author = None
+            if not author:
+                logger.error(f"Could not determine author of tweet: {tweet_id}")
+                return None
+            post_info["author_handle"] = author["username"]
+
+        return post_info
+
     async def get_post_metrics(self, url: str) -> Optional[Dict[str, Any]]:
         """
         Get metrics for a specific Twitter post.
@@ -216,7 +560,7 @@ class TwitterService:
         """
         try:
             # Extract tweet ID and validate URL
-            post_info = await self.validate_post_url(url)
+            post_info = await self.fetch_post(url)
             if not post_info:
                 return None
 
@@ -243,7 +587,7 @@ twitter_service = TwitterService()
 
 
 # Create helper functions to use the singleton
-def validate_twitter_handle(twitter_handle: str) -> bool:
+async def validate_twitter_handle(twitter_handle: str) -> bool:
     """
     Wrapper for validating Twitter handles.
 
@@ -253,22 +597,23 @@ def validate_twitter_handle(twitter_handle: str) -> bool:
     Returns:
         bool: True if the handle exists, False otherwise
     """
-    return twitter_service.validate_handle(twitter_handle)
+    return await twitter_service.check_handle(twitter_handle)
 
 
-async def validate_post_url(url: str) -> Optional[Dict[str, Any]]:
+async def validate_post_url(
+    url: str, refresh_metrics: bool = False
+) -> Optional[Dict[str, Any]]:
     """
     Validate a Twitter post URL and extract information from it.
 
     Args:
         url: Twitter post URL
+        refresh_metrics: Fetch fresh public_metrics instead of cached ones
 
     Returns:
         Dict containing post information or None if invalid
     """
-    post_info = twitter_service.validate_post_url(str(url))
-    time.sleep(1)
-    return post_info
+    return await twitter_service.fetch_post(str(url), refresh_metrics)
 
 
 async def get_post_metrics(url: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,187 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.db_service import get_twitter_users, upsert_twitter_users
+
+
+def normalize_handle(twitter_handle: str) -> str:
+    """Return the lookup key of a handle: without @, whitespace or case."""
+    return twitter_handle.strip().lstrip("@").strip().lower()
+
+
+class TwitterUserCache:
+    """
+    Two-level cache of Twitter user id <-> username pairs.
+
+    Lookups are answered from a bounded in-memory LRU first and then from the
+    twitter_users collection, so resolved users survive restarts and are
+    shared between API processes. Entries older than `ttl_seconds` are looked
+    up again, since handles can be renamed. Handles the API reported as
+    missing are remembered in memory only, for `negative_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        negative_ttl: float,
+        persist: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl = negative_ttl
+        self.persist = persist
+        self._clock = clock
+        # id -> (username, stored_at)
+        self._by_id: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # lowercase username -> (id or None if missing, stored_at)
+        self._by_username: "OrderedDict[str, Tuple[Optional[str], float]]" = (
+            OrderedDict()
+        )
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get_usernames(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Resolve user ids to usernames.
+
+        Args:
+            user_ids: Twitter user ids
+
+        Returns:
+            Usernames keyed by user id, ids that are not cached are left out
+        """
+        found: Dict[str, str] = {}
+        remaining = []
+        now = self._clock()
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            entry = self._by_id.get(user_id)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._by_id.move_to_end(user_id)
+                found[user_id] = entry[0]
+            else:
+                remaining.append(user_id)
+        self.memory_hits += len(found)
+
+        for user in await self._load(ids=remaining):
+            if user["id"] in remaining:
+                found[user["id"]] = user["username"]
+                self.db_hits += 1
+        self.misses += len([user_id for user_id in remaining if user_id not in found])
+        return found
+
+    async def get_ids(self, usernames: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolve usernames to user ids.
+
+        Args:
+            usernames: Twitter handles, with or without @
+
+        Returns:
+            User ids keyed by lowercase username, None for handles known not to
+            exist. Handles that are not cached are left out.
+        """
+        found: Dict[str, Optional[str]] = {}
+        remaining = []
+        now = self._clock()
+        for username in dict.fromkeys(normalize_handle(name) for name in usernames):
+            entry = self._by_username.get(username)
+            ttl = self.ttl_seconds if entry and entry[0] else self.negative_ttl
+            if entry is not None and now - entry[1] <= ttl:
+                self._by_username.move_to_end(username)
+                found[username] = entry[0]
+            else:
+                remaining.append(username)
+        self.memory_hits += len(found)
+
+        for user in await self._load(usernames=remaining):
+            username = user["username"].lower()
+            if username in remaining:
+                found[username] = user["id"]
+                self.db_hits += 1
+        self.misses += len(
+            [username for username in remaining if username not in found]
+        )
+        return found
+
+    async def put(self, users: List[Dict[str, Any]]) -> None:
+        """
+        Store resolved users in memory and in the twitter_users collection.
+
+        Args:
+            users: Users with "id" and "username" keys
+        """
+        users = [
+            {"id": str(user["id"]), "username": user["username"]} for user in users
+        ]
+        self._remember(users)
+        if self.persist and users:
+            await upsert_twitter_users(users)
+
+    def put_missing(self, usernames: Iterable[str]) -> None:
+        """Remember handles the API reported as nonexistent."""
+        now = self._clock()
+        for username in usernames:
+            self._store(self._by_username, normalize_handle(username), (None, now))
+
+    def clear(self) -> None:
+        self._by_id.clear()
+        self._by_username.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current in-memory size."""
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "ids": len(self._by_id),
+            "usernames": len(self._by_username),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.memory_hits + self.db_hits) / lookups if lookups else 0.0
+            ),
+        }
+
+    async def _load(
+        self, ids: Optional[List[str]] = None, usernames: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Read fresh entries from Mongo into memory."""
+        if not self.persist or not (ids or usernames):
+            return []
+        users = await get_twitter_users(
+            ids=ids, usernames=usernames, max_age=self.ttl_seconds
+        )
+        self._remember(users)
+        return users
+
+    def _remember(self, users: List[Dict[str, Any]]) -> None:
+        now = self._clock()
+        for user in users:
+            username = user["username"].lower()
+            previous = self._by_id.get(user["id"])
+            if previous is not None and previous[0].lower() != username:
+                # The account was renamed, its old handle is free now
+                self._by_username.pop(previous[0].lower(), None)
+            self._store(self._by_id, user["id"], (user["username"], now))
+            self._store(self._by_username, username, (user["id"], now))
+
+    def _store(self, entries: OrderedDict, key: str, value: Tuple) -> None:
+        if self.max_entries <= 0:
+            return
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+# Create a singleton instance of the Twitter user cache
+twitter_user_cache = TwitterUserCache(
+    max_entries=settings.TWITTER_USER_CACHE_SIZE,
+    ttl_seconds=settings.TWITTER_USER_TTL,
+    negative_ttl=settings.TWITTER_USER_NEGATIVE_TTL,
+)
@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of contract creation and claims.
+
+Drives /new_contract and /claim through the ASGI app with Twitter, Groq, the
+Solana RPC endpoint and Mongo replaced by deterministic local fakes, each with a
+configurable latency. Reports p50/p95/p99 latency and throughput per stage:
+
+    create_contract  POST /new_contract, end to end
+    claim_request    POST /claim, until the job is queued
+    claim            from POST /claim until the payout job has finished
+    db               every database call
+    tweet_fetch      post lookups through twitter_service
+    llm              text validation and post verification
+    rpc_read         PaymentContract account reads
+    send             payout transactions, until confirmed
+
+Usage:
+    python -m benchmarks.bench_claim [--contracts N] [--tranches N]
+        [--db-latency S] [--twitter-latency S] [--llm-latency S]
+        [--rpc-latency S] [--output results.json]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+import httpx
+import tweepy
+from langchain_core.runnables import RunnableLambda
+from loguru import logger
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from benchmarks.fake_rpc import BLOCKHASH_VALIDITY, FakeRpcServer, FakeSolanaRpc
+
+
+class StageTimer:
+    """Collects latency samples per stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.windows: Dict[str, Tuple[float, float]] = {}
+
+    def record(self, stage: str, started: float, finished: float) -> None:
+        self.samples.setdefault(stage, []).append(finished - started)
+        first, last = self.windows.get(stage, (started, finished))
+        self.windows[stage] = (min(first, started), max(last, finished))
+
+    def wrap_async(self, stage: str, fn: Callable) -> Callable:
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.record(stage, started, time.perf_counter())
+
+        return timed
+
+    def wrap_sync(self, stage: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, started, time.perf_counter())
+
+        return timed
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Latency percentiles in milliseconds and throughput per second."""
+        # Import only when needed to avoid circular imports
+        from app.services.fee_planner import percentile
+
+        report = {}
+        for stage, samples in self.samples.items():
+            first, last = self.windows[stage]
+            report[stage] = {
+                "count": len(samples),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "max_ms": max(samples) * 1000,
+                "throughput_per_s": len(samples) / max(last - first, 1e-9),
+            }
+        return report
+
+
+class Patches:
+    """Replaces app attributes for the run and restores them afterwards."""
+
+    def __init__(self):
+        self._undo: List[Tuple[Any, str, Any]] = []
+
+    def setattr(self, target: Any, name: str, value: Any) -> None:
+        self._undo.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+    def replace(self, module: Any, name: str, value: Any) -> None:
+        """Replace a function in its module and in every app module importing it."""
+        original = getattr(module, name)
+        for loaded in list(sys.modules.values()):
+            module_name = getattr(loaded, "__name__", "")
+            if not (module_name.startswith("app.") or module_name == "main"):
+                continue
+            if vars(loaded).get(name) is original:
+                self.setattr(loaded, name, value)
+
+    def undo(self) -> None:
+        while self._undo:
+            target, name, value = self._undo.pop()
+            setattr(target, name, value)
+
+
+class FakeDatabase:
+    """In-memory stand-in for the db_service functions on the claim path."""
+
+    def __init__(self, timer: StageTimer, latency: float = 0.0):
+        self.timer = timer
+        self.latency = latency
+        self.contracts: Dict[str, Dict[str, Any]] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.job_started: Dict[str, float] = {}
+        self.finished: Dict[str, asyncio.Event] = {}
+        self.twitter_users: Dict[str, Dict[str, Any]] = {}
+
+    async def _io(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def store_contract_data(self, contract_data):
+        await self._io()
+        address = contract_data["contract_address"]
+        if address in self.contracts:
+            return False, "already_exists"
+        contract_data["created_at"] = datetime.utcnow()
+        contract_data["status"] = "pending"
+        self.contracts[address] = copy.deepcopy(contract_data)
+        return True, None
+
+    async def get_contract(self, contract_address):
+        await self._io()
+        return copy.deepcopy(self.contracts.get(contract_address))
+
+    async def get_contracts(self, contract_addresses):
+        await self._io()
+        return [
+            copy.deepcopy(self.contracts[address])
+            for address in contract_addresses
+            if address in self.contracts
+        ]
+
+    async def update_contract_with_post(self, contract_address, update_data):
+        await self._io()
+        if contract_address not in self.contracts:
+            return False
+        self.contracts[contract_address].update(copy.deepcopy(update_data))
+        return True
+
+    async def insert_job(self, job):
+        await self._io()
+        self.jobs[job["_id"]] = copy.deepcopy(job)
+        self.job_started[job["_id"]] = time.perf_counter()
+        self.finished.setdefault(job["_id"], asyncio.Event())
+        return True
+
+    async def claim_next_job(self, worker_id, lease_seconds):
+        await self._io()
+        now = datetime.utcnow()
+        runnable = [
+            job
+            for job in self.jobs.values()
+            if (job["status"] == "queued" and job["available_at"] <= now)
+            or (job["status"] == "running" and job["locked_until"] < now)
+        ]
+        if not runnable:
+            return None
+        job = min(runnable, key=lambda job: job["available_at"])
+        job.update(
+            status="running",
+            worker_id=worker_id,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+            attempts=job["attempts"] + 1,
+        )
+        return copy.deepcopy(job)
+
+    async def update_job(self, job_id, worker_id, update_data):
+        await self._io()
+        job = self.jobs.get(job_id)
+        if job is None or job.get("worker_id") != worker_id:
+            return False
+        job.update(copy.deepcopy(update_data), updated_at=datetime.utcnow())
+        if job["status"] in ("succeeded", "failed"):
+            self.timer.record("claim", self.job_started[job_id], time.perf_counter())
+            self.finished[job_id].set()
+        return True
+
+    async def get_job(self, job_id):
+        await self._io()
+        return copy.deepcopy(self.jobs.get(job_id))
+
+    async def ensure_job_indexes(self):
+        await self._io()
+
+    async def get_twitter_users(self, ids=None, usernames=None, max_age=None):
+        await self._io()
+        usernames = [username.lower() for username in usernames or []]
+        return [
+            dict(user)
+            for user in self.twitter_users.values()
+            if user["id"] in (ids or []) or user["username"].lower() in usernames
+        ]
+
+    async def upsert_twitter_users(self, users):
+        await self._io()
+        for user in users:
+            self.twitter_users[user["id"]] = dict(user)
+        return len(users)
+
+    async def ensure_twitter_user_indexes(self):
+        await self._io()
+
+    def install(self, patches: Patches) -> None:
+        # Import the module for patching
+        import app.services.db_service as db_service
+
+        for name in (
+            "store_contract_data",
+            "get_contract",
+            "get_contracts",
+            "update_contract_with_post",
+            "insert_job",
+            "claim_next_job",
+            "update_job",
+            "get_job",
+            "ensure_job_indexes",
+            "get_twitter_users",
+            "upsert_twitter_users",
+            "ensure_twitter_user_indexes",
+        ):
+            patches.replace(
+                db_service, name, self.timer.wrap_async("db", getattr(self, name))
+            )
+
+
+class FakeTwitterClient:
+    """
+    Deterministic stand-in for tweepy.Client.
+
+    Calls block for `latency` seconds, like the synchronous tweepy client does.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.tweets: Dict[str, Dict[str, Any]] = {}
+        self.calls = 0
+
+    def add_user(self, username: str) -> Dict[str, Any]:
+        user = self.users.get(username.lower())
+        if user is None:
+            user = {
+                "id": str(1_000 + len(self.users)),
+                "name": username,
+                "username": username,
+            }
+            self.users[username.lower()] = user
+        return user
+
+    def add_tweet(self, username: str, text: str, like_count: int) -> str:
+        user = self.add_user(username)
+        tweet_id = str(1_800_000_000_000_000_000 + len(self.tweets))
+        self.tweets[tweet_id] = {
+            "id": tweet_id,
+            "text": text,
+            "author_id": user["id"],
+            "created_at": "2025-01-01T00:00:00.000Z",
+            "edit_history_tweet_ids": [tweet_id],
+            "public_metrics": {
+                "retweet_count": like_count // 10,
+                "reply_count": like_count // 20,
+                "like_count": like_count,
+                "quote_count": like_count // 50,
+                "impression_count": like_count * 30,
+            },
+        }
+        return tweet_id
+
+    def _wait(self) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _author(self, tweet: Dict[str, Any]) -> tweepy.User:
+        user = next(
+            user for user in self.users.values() if user["id"] == tweet["author_id"]
+        )
+        return tweepy.User(user)
+
+    def get_tweet(self, id, **kwargs) -> tweepy.Response:
+        self._wait()
+        tweet = self.tweets.get(str(id))
+        if tweet is None:
+            return tweepy.Response(None, {}, [{"value": str(id)}], {})
+        return tweepy.Response(
+            tweepy.Tweet(copy.deepcopy(tweet)),
+            {"users": [self._author(tweet)]},
+            [],
+            {},
+        )
+
+    def get_tweets(self, ids, **kwargs) -> tweepy.Response:
+        self._wait()
+        found = [self.tweets[str(id)] for id in ids if str(id) in self.tweets]
+        errors = [{"value": str(id)} for id in ids if str(id) not in self.tweets]
+        return tweepy.Response(
+            [tweepy.Tweet(copy.deepcopy(tweet)) for tweet in found] or None,
+            {"users": [self._author(tweet) for tweet in found]},
+            errors,
+            {},
+        )
+
+    def get_user(self, id=None, username=None, **kwargs) -> tweepy.Response:
+        self._wait()
+        for user in self.users.values():
+            if (id is not None and user["id"] == str(id)) or (
+                username is not None and user["username"].lower() == username.lower()
+            ):
+                return tweepy.Response(tweepy.User(user), {}, [], {})
+        return tweepy.Response(None, {}, [{"value": id or username}], {})
+
+    def get_users(self, ids=None, usernames=None, **kwargs) -> tweepy.Response:
+        self._wait()
+        found = [
+            user
+            for user in self.users.values()
+            if (ids and user["id"] in map(str, ids))
+            or (usernames and user["username"].lower() in map(str.lower, usernames))
+        ]
+        return tweepy.Response(
+            [tweepy.User(user) for user in found] or None, {}, [], {}
+        )
+
+
+def fake_llm(latency: float) -> RunnableLambda:
+    """A Groq stand-in approving every text and post, after `latency` seconds."""
+
+    def answer(prompt) -> str:
+        if latency:
+            time.sleep(latency)
+        return "VALID" if "VALID or INVALID" in prompt.to_string() else "yes"
+
+    return RunnableLambda(answer)
+
+
+async def run(
+    contracts: int = 20,
+    tranches: int = 3,
+    concurrency: int = 10,
+    db_latency: float = 0.002,
+    twitter_latency: float = 0.05,
+    llm_latency: float = 0.1,
+    rpc_latency: float = 0.01,
+    slot_time: float = 0.05,
+) -> Dict[str, Any]:
+    """
+    Create `contracts` contracts and claim all of them through the ASGI app.
+
+    Returns:
+        Dict[str, Any]: The run configuration and the per-stage report
+    """
+    config = {key: value for key, value in locals().items() if not key.startswith("_")}
+
+    # Import the app only when needed, it reads settings at import time
+    import main
+    import app.services.llm_service as llm_service
+    import app.services.solana_service as solana_service
+    import app.services.twitter_service as twitter_module
+    from app.core.config import settings
+    from app.services.blockhash_service import blockhash_prefetcher
+    from app.services.confirmation_service import confirmation_tracker
+    from app.services.rpc_client import close_rpc_client
+    from app.services.tweet_cache import TweetCache
+    from app.services.twitter_user_cache import TwitterUserCache
+
+    timer = StageTimer()
+    patches = Patches()
+    database = FakeDatabase(timer, db_latency)
+    twitter = FakeTwitterClient(twitter_latency)
+    chain = FakeSolanaRpc(latency=rpc_latency, slot_time=slot_time)
+
+    payer = Keypair()
+    owner = Pubkey.new_unique()
+    claims = []
+    for index in range(contracts):
+        recipients = [Pubkey.new_unique() for _ in range(tranches)]
+        address = chain.add_payment_contract(owner, 1_000_000 * tranches, recipients)
+        handle = f"creator{index}"
+        tweet_id = twitter.add_tweet(handle, "gm from the attention vault", 1_000)
+        claims.append(
+            (str(address), handle, f"https://x.com/{handle}/status/{tweet_id}")
+        )
+
+    previous_env = {
+        key: os.environ.get(key) for key in ("WALLET_SECRET", "GROQ_API_KEY")
+    }
+    server = FakeRpcServer(chain)
+    await server.start()
+    try:
+        await close_rpc_client()
+        blockhash_prefetcher.invalidate()
+        os.environ["WALLET_SECRET"] = json.dumps(list(bytes(payer)))
+        os.environ["GROQ_API_KEY"] = "benchmark"
+
+        patches.setattr(settings, "SOLANA_RPC_URL", server.url)
+        patches.setattr(settings, "SOLANA_RPC_FALLBACK_URLS", [])
+        patches.setattr(settings, "ACCOUNT_MIRROR_ENABLED", False)
+        patches.setattr(confirmation_tracker, "ws_url", None)
+        patches.setattr(confirmation_tracker, "poll_interval", slot_time)
+        # The prefetcher is tuned for 400ms slots, keep it within the fake's validity
+        max_age = BLOCKHASH_VALIDITY * slot_time / 2
+        patches.setattr(blockhash_prefetcher, "max_age", max_age)
+        patches.setattr(blockhash_prefetcher, "refresh_interval", max_age / 6)
+        patches.setattr(twitter_module.twitter_service, "client", twitter)
+        # Tweet ids repeat between runs, start every run with a cold cache
+        patches.setattr(
+            twitter_module.twitter_service,
+            "cache",
+            TweetCache(
+                settings.TWEET_CACHE_SIZE,
+                settings.TWEET_CONTENT_TTL,
+                settings.TWEET_METRICS_TTL,
+            ),
+        )
+        patches.setattr(
+            twitter_module.twitter_service,
+            "users",
+            TwitterUserCache(
+                settings.TWITTER_USER_CACHE_SIZE,
+                settings.TWITTER_USER_TTL,
+                settings.TWITTER_USER_NEGATIVE_TTL,
+            ),
+        )
+        patches.setattr(llm_service, "get_llm_client", lambda: fake_llm(llm_latency))
+        database.install(patches)
+        patches.replace(
+            twitter_module,
+            "validate_post_url",
+            timer.wrap_async("tweet_fetch", twitter_module.validate_post_url),
+        )
+        patches.replace(
+            llm_service,
+            "verify_post_content",
+            timer.wrap_async("llm", llm_service.verify_post_content),
+        )
+        patches.replace(
+            llm_service,
+            "validate_text",
+            timer.wrap_sync("llm", llm_service.validate_text),
+        )
+        patches.replace(
+            solana_service,
+            "load_payment_contract",
+            timer.wrap_async("rpc_read", solana_service.load_payment_contract),
+        )
+        patches.replace(
+            solana_service,
+            "transfer_tranches",
+            timer.wrap_async("send", solana_service.transfer_tranches),
+        )
+
+        transport = httpx.ASGITransport(app=main.app)
+        limit = asyncio.Semaphore(concurrency)
+        prefix = settings.API_PREFIX
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=None
+            ) as client:
+
+                async def create(address: str, handle: str) -> None:
+                    async with limit:
+                        started = time.perf_counter()
+                        response = await client.post(
+                            f"{prefix}/new_contract",
+                            json={
+                                "contract_address": address,
+                                "verification_text": "Say gm from the attention vault",
+                                "twitter_handle": handle,
+                                "number_of_tranches": tranches,
+                                "tranche_distribution": [
+                                    10 * (step + 1) for step in range(tranches)
+                                ],
+                            },
+                        )
+                        timer.record("create_contract", started, time.perf_counter())
+                        if not response.json().get("success"):
+                            raise RuntimeError(f"Create failed: {response.text}")
+
+                async def claim(address: str, post_url: str) -> str:
+                    async with limit:
+                        started = time.perf_counter()
+                        response = await client.post(
+                            f"{prefix}/claim",
+                            json={"contract_address": address, "post_url": post_url},
+                        )
+                        timer.record("claim_request", started, time.perf_counter())
+                        response.raise_for_status()
+                        job_id = response.json()["job_id"]
+                    await database.finished[job_id].wait()
+                    return job_id
+
+                await asyncio.gather(
+                    *(create(address, handle) for address, handle, _ in claims)
+                )
+                job_ids = await asyncio.gather(
+                    *(claim(address, post_url) for address, _, post_url in claims)
+                )
+    finally:
+        patches.undo()
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        await close_rpc_client()
+        blockhash_prefetcher.invalidate()
+        await server.stop()
+
+    succeeded = sum(
+        1 for job_id in job_ids if database.jobs[job_id]["status"] == "succeeded"
+    )
+    return {
+        "benchmark": "claim",
+        "app_version": main.app.version,
+        "python": platform.python_version(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": config,
+        "claims_succeeded": succeeded,
+        "rpc_requests": dict(chain.requests),
+        "rpc_http_requests": chain.http_requests,
+        "stages": timer.report(),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    config = result["config"]
+    print(
+        f"{config['contracts']} contracts x {config['tranches']} tranches, "
+        f"{result['claims_succeeded']} claims succeeded, "
+        f"{result['rpc_http_requests']} RPC HTTP requests"
+    )
+    print(
+        f"  {'stage':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'ops/s':>9}"
+    )
+    for stage, stats in result["stages"].items():
+        print(
+            f"  {stage:<16} {stats['count']:>6} {stats['p50_ms']:>9.1f} "
+            f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+            f"{stats['throughput_per_s']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contracts", type=int, default=20)
+    parser.add_argument("--tranches", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--db-latency", type=float, default=0.002)
+    parser.add_argument("--twitter-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--rpc-latency", type=float, default=0.01)
+    parser.add_argument("--slot-time", type=float, default=0.05)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    result = asyncio.run(
+        run(
+            contracts=args.contracts,
+            tranches=args.tranches,
+            concurrency=args.concurrency,
+            db_latency=args.db_latency,
+            twitter_latency=args.twitter_latency,
+            llm_latency=args.llm_latency,
+            rpc_latency=args.rpc_latency,
+            slot_time=args.slot_time,
+        )
+    )
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for PaymentContract account decoding.
+
+Compares the struct/memoryview decoder in app.services.payment_contract_decoder
+with the borsh_construct based PaymentContract.decode from the generated client.
+
+Usage:
+    python -m benchmarks.bench_decode [--recipients N] [--number N]
+"""
+import argparse
+import timeit
+
+from solders.pubkey import Pubkey
+
+from app.contract_client.accounts import PaymentContract
+from app.services.payment_contract_decoder import (
+    decode_payment_contract,
+    encode_payment_contract,
+)
+
+
+def build_account(recipient_count: int) -> bytes:
+    recipients = [Pubkey.new_unique() for _ in range(recipient_count)]
+    return encode_payment_contract(
+        owner=Pubkey.new_unique(),
+        total_amount=1_000_000_000,
+        tranche_count=recipient_count,
+        recipients=recipients,
+        paid_tranches=recipient_count // 2,
+    )
+
+
+def verify(data: bytes) -> None:
+    """Make sure both decoders agree before timing them."""
+    fast = decode_payment_contract(data)
+    reference = PaymentContract.decode(data)
+    assert fast.owner == reference.owner
+    assert fast.total_amount == reference.total_amount
+    assert fast.tranche_count == reference.tranche_count
+    assert fast.recipients == list(reference.recipients)
+    assert fast.paid_tranches == reference.paid_tranches
+
+
+def run(recipient_count: int, number: int) -> None:
+    data = build_account(recipient_count)
+    verify(data)
+
+    def construct_decode():
+        return PaymentContract.decode(data)
+
+    def fast_scalars():
+        return decode_payment_contract(data).paid_tranches
+
+    def fast_current_recipient():
+        contract = decode_payment_contract(data)
+        return contract.recipient(contract.paid_tranches)
+
+    def fast_all_recipients():
+        return decode_payment_contract(data).recipients
+
+    cases = {
+        "construct PaymentContract.decode": construct_decode,
+        "fast decode (scalars only)": fast_scalars,
+        "fast decode (current recipient)": fast_current_recipient,
+        "fast decode (all recipients)": fast_all_recipients,
+    }
+
+    print(f"PaymentContract with {recipient_count} recipients, {number} iterations")
+    baseline = None
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        per_call_us = best / number * 1e6
+        if baseline is None:
+            baseline = per_call_us
+        print(
+            f"  {name:<36} {per_call_us:8.2f} us/call "
+            f"({baseline / per_call_us:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=5)
+    parser.add_argument("--number", type=int, default=10_000)
+    args = parser.parse_args()
+
+    run(args.recipients, args.number)
@@ -0,0 +1,903 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Sonic/Solana JSON-RPC endpoint.
+
+Keeps PaymentContract accounts in memory with their real byte layout and
+executes distribute_tranche and close_contract instructions from submitted
+legacy or v0 transactions, so the claim and payout paths can be exercised and
+measured without https://api.testnet.sonic.game. Address lookup tables can be
+created, extended, deactivated and closed for v0 payouts. Latency and failures can be injected per
+method.
+
+Supported methods: getAccountInfo, getMultipleAccounts, getProgramAccounts,
+getLatestBlockhash, sendTransaction, getSignatureStatuses, simulateTransaction,
+getBlockHeight, getSlot, getBalance and getRecentPrioritizationFees. Batch
+requests are accepted.
+
+Usage:
+    python -m benchmarks.fake_rpc [--port 8899] [--contracts N] [--latency S]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import random
+import struct
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+import base58
+import httpx
+from solders.address_lookup_table_account import (
+    ID as LOOKUP_TABLE_PROGRAM_ID,
+    AddressLookupTable,
+    derive_lookup_table_address,
+)
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+from app.contract_client.program_id import PROGRAM_ID
+from app.services.payment_contract_decoder import (
+    decode_payment_contract,
+    encode_payment_contract,
+)
+
+SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
+COMPUTE_BUDGET_PROGRAM_ID = Pubkey.from_string(
+    "ComputeBudget111111111111111111111111111111"
+)
+
+# Anchor instruction discriminators, see app.contract_client.instructions
+DISTRIBUTE_TRANCHE = b"\x04eutz\xf2\xd3["
+CLOSE_CONTRACT = b'%\xf4"\xa8\\\xcaPj'
+
+# Custom program errors, see app.contract_client.errors.custom
+ALL_TRANCHES_PAID = 6000
+INVALID_RECIPIENT = 6001
+INVALID_SIGNER = 6005
+ACCOUNT_NOT_INITIALIZED = 3012
+
+# Blockhashes stay valid for this many blocks, as on mainnet
+BLOCKHASH_VALIDITY = 150
+FINALIZED_DEPTH = 32
+
+RENT_EXEMPT_LAMPORTS = 2_000_000
+
+# Address lookup table program instructions, bincode enum tags
+CREATE_LOOKUP_TABLE = 0
+EXTEND_LOOKUP_TABLE = 2
+DEACTIVATE_LOOKUP_TABLE = 3
+CLOSE_LOOKUP_TABLE = 4
+_LOOKUP_TABLE_META = struct.Struct("<IQQB")
+# Tables not deactivated carry u64::MAX as their deactivation slot
+_ACTIVE = 2**64 - 1
+# A deactivated table is unusable, and can be closed, once its deactivation
+# slot has left the SlotHashes sysvar
+LOOKUP_TABLE_COOLDOWN_SLOTS = 513
+
+
+def encode_lookup_table(
+    authority: Pubkey,
+    addresses: Sequence[Pubkey],
+    last_extended_slot: int = 0,
+    last_extended_slot_start_index: int = 0,
+    deactivation_slot: int = _ACTIVE,
+) -> bytes:
+    """Encode address lookup table account data, as read by AddressLookupTable."""
+    return b"".join(
+        [
+            _LOOKUP_TABLE_META.pack(
+                1,
+                deactivation_slot,
+                last_extended_slot,
+                last_extended_slot_start_index,
+            ),
+            b"\x01",
+            bytes(authority),
+            b"\x00\x00",
+            *(bytes(address) for address in addresses),
+        ]
+    )
+
+
+@dataclass
+class FakeAccount:
+    data: bytes
+    owner: Pubkey
+    lamports: int
+
+
+class TransactionError(Exception):
+    """A transaction error in the JSON format of the RPC `err` field."""
+
+    def __init__(self, err: Any):
+        super().__init__(str(err))
+        self.err = err
+
+
+class RpcFailure(Exception):
+    """A JSON-RPC error answered instead of a result."""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class FakeSolanaRpc:
+    """
+    In-memory chain state and JSON-RPC method handlers.
+
+    Slots advance with the wall clock every `slot_time` seconds, or by hand with
+    advance(). Transactions land in the slot they were sent in and report
+    `confirmed` after `confirmation_slots` further slots.
+
+    Args:
+        latency: Base delay added to every HTTP request, in seconds
+        jitter: Random extra delay of up to this many seconds
+        method_latency: Extra delay per JSON-RPC method
+        failure_rate: Share of HTTP requests answered with `failure_status`
+        failure_status: HTTP status used for injected failures
+        drop_rate: Share of sendTransaction calls accepted but never landed
+        authorized_signers: Signers allowed to distribute tranches besides the
+            contract owner, None accepts any signer
+        seed: Seed for the random latency, failures and drops
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        method_latency: Optional[Dict[str, float]] = None,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        drop_rate: float = 0.0,
+        slot_time: float = 0.4,
+        confirmation_slots: int = 1,
+        priority_fee: int = 0,
+        units_per_instruction: int = 5_000,
+        authorized_signers: Optional[Sequence[Pubkey]] = None,
+        seed: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.method_latency = dict(method_latency or {})
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.drop_rate = drop_rate
+        self.slot_time = slot_time
+        self.confirmation_slots = confirmation_slots
+        self.priority_fee = priority_fee
+        self.units_per_instruction = units_per_instruction
+        self.authorized_signers: Optional[Set[Pubkey]] = (
+            set(authorized_signers) if authorized_signers is not None else None
+        )
+        self.accounts: Dict[Pubkey, FakeAccount] = {}
+        self.signatures: Dict[str, Tuple[int, Any]] = {}
+        self.requests: Dict[str, int] = {}
+        self.http_requests = 0
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._started = clock()
+        self._base_slot = 1_000
+        self._slot_offset = 0
+        self._blockhashes: Dict[Hash, int] = {}
+        self._injected: Dict[str, List[Dict[str, Any]]] = {}
+
+    # Chain state
+
+    @property
+    def slot(self) -> int:
+        elapsed = self._clock() - self._started
+        ticks = int(elapsed / self.slot_time) if self.slot_time > 0 else 0
+        return self._base_slot + self._slot_offset + ticks
+
+    @property
+    def block_height(self) -> int:
+        # No skipped slots, block height trails the slot by a constant
+        return self.slot - 100
+
+    def advance(self, slots: int = 1) -> None:
+        """Move the chain forward by `slots` slots."""
+        self._slot_offset += slots
+
+    def add_payment_contract(
+        self,
+        owner: Pubkey,
+        total_amount: int,
+        recipients: Sequence[Pubkey],
+        paid_tranches: int = 0,
+        address: Optional[Pubkey] = None,
+    ) -> Pubkey:
+        """Create a funded PaymentContract account and return its address."""
+        address = address or Pubkey.new_unique()
+        self.accounts[address] = FakeAccount(
+            data=encode_payment_contract(
+                owner=owner,
+                total_amount=total_amount,
+                tranche_count=len(recipients),
+                recipients=recipients,
+                paid_tranches=paid_tranches,
+            ),
+            owner=PROGRAM_ID,
+            lamports=RENT_EXEMPT_LAMPORTS + total_amount,
+        )
+        return address
+
+    def inject_error(
+        self,
+        method: str,
+        count: int = 1,
+        code: int = -32005,
+        message: str = "Node is behind",
+    ) -> None:
+        """Answer the next `count` calls of `method` with a JSON-RPC error."""
+        self._injected.setdefault(method, []).extend(
+            {"code": code, "message": message} for _ in range(count)
+        )
+
+    # HTTP handling
+
+    def delay_for(self, methods: Sequence[str]) -> float:
+        """The injected delay for a request calling `methods`."""
+        extra = max(
+            (self.method_latency.get(method, 0.0) for method in methods), default=0.0
+        )
+        jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + extra + jitter
+
+    async def handle_body(self, body: bytes) -> Tuple[int, Optional[Any]]:
+        """Answer a raw JSON-RPC body, returning the HTTP status and JSON reply."""
+        self.http_requests += 1
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 200, self._error(None, -32700, "Parse error")
+
+        requests = payload if isinstance(payload, list) else [payload]
+        methods = [
+            request.get("method", "")
+            for request in requests
+            if isinstance(request, dict)
+        ]
+        delay = self.delay_for(methods)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return self.failure_status, None
+
+        replies = [self.dispatch(request) for request in requests]
+        return 200, replies if isinstance(payload, list) else replies[0]
+
+    async def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """httpx.MockTransport handler, for use without a socket."""
+        status, reply = await self.handle_body(await request.aread())
+        if reply is None:
+            return httpx.Response(status, text="injected failure")
+        return httpx.Response(status, json=reply)
+
+    def transport(self) -> httpx.MockTransport:
+        """An httpx transport answering from this fake, without a socket."""
+        return httpx.MockTransport(self.handle_request)
+
+    def dispatch(self, request: Any) -> Dict[str, Any]:
+        """Answer a single JSON-RPC request object."""
+        if not isinstance(request, dict) or "method" not in request:
+            return self._error(None, -32600, "Invalid request")
+
+        request_id = request.get("id")
+        method = request["method"]
+        self.requests[method] = self.requests.get(method, 0) + 1
+
+        injected = self._injected.get(method)
+        if injected:
+            error = injected.pop(0)
+            return self._error(request_id, error["code"], error["message"])
+
+        handler = self._methods().get(method)
+        if handler is None:
+            return self._error(request_id, -32601, "Method not found")
+        try:
+            result = handler(*(request.get("params") or []))
+        except RpcFailure as e:
+            return self._error(request_id, e.code, e.message, e.data)
+        except (TypeError, ValueError, IndexError, KeyError) as e:
+            return self._error(request_id, -32602, f"Invalid params: {str(e)}")
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    @staticmethod
+    def _error(
+        request_id: Any, code: int, message: str, data: Any = None
+    ) -> Dict[str, Any]:
+        error: Dict[str, Any] = {"code": code, "message": message}
+        if data is not None:
+            error["data"] = data
+        return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+    def _methods(self) -> Dict[str, Callable[..., Any]]:
+        return {
+            "getAccountInfo": self.get_account_info,
+            "getMultipleAccounts": self.get_multiple_accounts,
+            "getProgramAccounts": self.get_program_accounts,
+            "getLatestBlockhash": self.get_latest_blockhash,
+            "sendTransaction": self.send_transaction,
+            "simulateTransaction": self.simulate_transaction,
+            "getSignatureStatuses": self.get_signature_statuses,
+            "getBlockHeight": lambda config=None: self.block_height,
+            "getSlot": lambda config=None: self.slot,
+            "getBalance": self.get_balance,
+            "getRecentPrioritizationFees": self.get_recent_prioritization_fees,
+            "getHealth": lambda: "ok",
+        }
+
+    # JSON-RPC methods
+
+    def _context(self) -> Dict[str, Any]:
+        return {"slot": self.slot, "apiVersion": "1.18.0"}
+
+    @staticmethod
+    def _encode_account(
+        account: FakeAccount, config: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        config = config or {}
+        data = account.data
+        data_slice = config.get("dataSlice")
+        if data_slice:
+            offset = data_slice["offset"]
+            data = data[offset : offset + data_slice["length"]]
+
+        encoding = config.get("encoding", "base58")
+        if encoding == "base58":
+            encoded = [base58.b58encode(data).decode(), "base58"]
+        elif encoding == "base64":
+            encoded = [base64.b64encode(data).decode(), "base64"]
+        else:
+            raise ValueError(f"unsupported encoding {encoding}")
+
+        return {
+            "data": encoded,
+            "executable": False,
+            "lamports": account.lamports,
+            "owner": str(account.owner),
+            "rentEpoch": 0,
+            "space": len(account.data),
+        }
+
+    def get_account_info(
+        self, address: str, config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        account = self.accounts.get(Pubkey.from_string(address))
+        return {
+            "context": self._context(),
+            "value": self._encode_account(account, config) if account else None,
+        }
+
+    def get_multiple_accounts(
+        self, addresses: List[str], config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if len(addresses) > 100:
+            raise RpcFailure(-32602, "Too many inputs provided; max 100")
+        values = []
+        for address in addresses:
+            account = self.accounts.get(Pubkey.from_string(address))
+            values.append(self._encode_account(account, config) if account else None)
+        return {"context": self._context(), "value": values}
+
+    def get_program_accounts(
+        self, program_id: str, config: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        config = config or {}
+        program = Pubkey.from_string(program_id)
+        matches = [
+            {"pubkey": str(address), "account": self._encode_account(account, config)}
+            for address, account in self.accounts.items()
+            if account.owner == program
+            and all(
+                self._matches(account.data, item) for item in config.get("filters", [])
+            )
+        ]
+        if config.get("withContext"):
+            return {"context": self._context(), "value": matches}
+        return matches
+
+    @staticmethod
+    def _matches(data: bytes, filter_: Dict[str, Any]) -> bool:
+        if "dataSize" in filter_:
+            return len(data) == filter_["dataSize"]
+        memcmp = filter_["memcmp"]
+        if memcmp.get("encoding") == "base64":
+            expected = base64.b64decode(memcmp["bytes"])
+        else:
+            expected = base58.b58decode(memcmp["bytes"])
+        offset = memcmp["offset"]
+        return data[offset : offset + len(expected)] == expected
+
+    def get_latest_blockhash(
+        self, config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        slot = self.slot
+        blockhash = Hash.hash(b"fake-rpc-blockhash" + slot.to_bytes(8, "little"))
+        last_valid_block_height = self.block_height + BLOCKHASH_VALIDITY
+        self._blockhashes[blockhash] = last_valid_block_height
+
+        # Forget blockhashes that expired long ago
+        if len(self._blockhashes) > 1_000:
+            height = self.block_height
+            self._blockhashes = {
+                known: last_valid
+                for known, last_valid in self._blockhashes.items()
+                if last_valid >= height
+            }
+        return {
+            "context": self._context(),
+            "value": {
+                "blockhash": str(blockhash),
+                "lastValidBlockHeight": last_valid_block_height,
+            },
+        }
+
+    def get_balance(
+        self, address: str, config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        account = self.accounts.get(Pubkey.from_string(address))
+        return {"context": self._context(), "value": account.lamports if account else 0}
+
+    def get_recent_prioritization_fees(
+        self, accounts: Optional[List[str]] = None
+    ) -> List[Dict[str, int]]:
+        slot = self.slot
+        return [
+            {"slot": slot - offset, "prioritizationFee": self.priority_fee}
+            for offset in range(10)
+        ]
+
+    @staticmethod
+    def _decode_transaction(raw: str, config: Optional[Dict[str, Any]]) -> bytes:
+        if (config or {}).get("encoding", "base58") == "base64":
+            return base64.b64decode(raw)
+        return base58.b58decode(raw)
+
+    def send_transaction(
+        self, raw: str, config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        config = config or {}
+        transaction = VersionedTransaction.from_bytes(
+            self._decode_transaction(raw, config)
+        )
+        signature = str(transaction.signatures[0])
+        skip_preflight = config.get("skipPreflight", False)
+
+        if signature in self.signatures:
+            if skip_preflight:
+                # A rebroadcast of a transaction that already landed
+                return signature
+            raise RpcFailure(
+                -32002,
+                "Transaction simulation failed: This transaction has already been processed",
+                self._simulation_result("AlreadyProcessed"),
+            )
+
+        if not self._blockhash_valid(transaction.message.recent_blockhash):
+            if skip_preflight:
+                # The leader drops it, like a real cluster would
+                return signature
+            raise RpcFailure(
+                -32002,
+                "Transaction simulation failed: Blockhash not found",
+                self._simulation_result("BlockhashNotFound"),
+            )
+
+        try:
+            staged = self._execute(transaction)
+            err = None
+        except TransactionError as e:
+            if not skip_preflight:
+                raise RpcFailure(
+                    -32002,
+                    f"Transaction simulation failed: {e.err}",
+                    self._simulation_result(e.err),
+                )
+            staged = {}
+            err = e.err
+
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            return signature
+
+        for address, account in staged.items():
+            if account is None:
+                self.accounts.pop(address, None)
+            else:
+                self.accounts[address] = account
+        self.signatures[signature] = (self.slot, err)
+        return signature
+
+    def simulate_transaction(
+        self, raw: str, config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        transaction = VersionedTransaction.from_bytes(
+            self._decode_transaction(raw, config)
+        )
+        try:
+            self._execute(transaction)
+            err = None
+        except TransactionError as e:
+            err = e.err
+        units = self.units_per_instruction * len(transaction.message.instructions)
+        return {
+            "context": self._context(),
+            "value": self._simulation_result(err, units),
+        }
+
+    @staticmethod
+    def _simulation_result(err: Any, units: int = 0) -> Dict[str, Any]:
+        return {
+            "err": err,
+            "logs": [],
+            "accounts": None,
+            "unitsConsumed": units,
+            "returnData": None,
+        }
+
+    def get_signature_statuses(
+        self, signatures: List[str], config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if len(signatures) > 256:
+            raise RpcFailure(-32602, "Too many inputs provided; max 256")
+        slot = self.slot
+        statuses = []
+        for signature in signatures:
+            landed = self.signatures.get(signature)
+            if landed is None:
+                statuses.append(None)
+                continue
+            landed_slot, err = landed
+            depth = slot - landed_slot
+            if depth >= FINALIZED_DEPTH:
+                confirmation_status, confirmations = "finalized", None
+            elif depth >= self.confirmation_slots:
+                confirmation_status, confirmations = "confirmed", depth
+            else:
+                confirmation_status, confirmations = "processed", depth
+            statuses.append(
+                {
+                    "slot": landed_slot,
+                    "confirmations": confirmations,
+                    "err": err,
+                    "status": {"Ok": None} if err is None else {"Err": err},
+                    "confirmationStatus": confirmation_status,
+                }
+            )
+        return {"context": self._context(), "value": statuses}
+
+    # Transaction execution
+
+    def _blockhash_valid(self, blockhash: Hash) -> bool:
+        last_valid = self._blockhashes.get(blockhash)
+        return last_valid is not None and self.block_height <= last_valid
+
+    def _execute(
+        self, transaction: VersionedTransaction
+    ) -> Dict[Pubkey, Optional[FakeAccount]]:
+        """Run the instructions and return the changed accounts, all or nothing."""
+        message = transaction.message
+        keys = list(message.account_keys) + self._lookup_keys(message)
+        signers = set(keys[: message.header.num_required_signatures])
+        staged: Dict[Pubkey, Optional[FakeAccount]] = {}
+
+        for index, instruction in enumerate(message.instructions):
+            program = keys[instruction.program_id_index]
+            accounts = [keys[position] for position in instruction.accounts]
+            if program == COMPUTE_BUDGET_PROGRAM_ID:
+                continue
+            try:
+                if program == PROGRAM_ID:
+                    self._apply(bytes(instruction.data), accounts, signers, staged)
+                elif program == LOOKUP_TABLE_PROGRAM_ID:
+                    self._apply_lookup_table(
+                        bytes(instruction.data), accounts, signers, staged
+                    )
+                else:
+                    raise TransactionError("IncorrectProgramId")
+            except TransactionError as e:
+                raise TransactionError({"InstructionError": [index, e.err]})
+        return staged
+
+    def _lookup_keys(self, message: Any) -> List[Pubkey]:
+        """Keys loaded through the address lookup tables of a v0 message."""
+        writable: List[Pubkey] = []
+        readonly: List[Pubkey] = []
+        slot = self.slot
+        for lookup in getattr(message, "address_table_lookups", None) or []:
+            account = self.accounts.get(lookup.account_key)
+            if account is None or account.owner != LOOKUP_TABLE_PROGRAM_ID:
+                raise TransactionError("AddressLookupTableNotFound")
+            table = AddressLookupTable.deserialize(account.data)
+            if self._lookup_table_closable(table):
+                raise TransactionError("AddressLookupTableNotFound")
+            # Addresses appended in the current slot are not usable yet
+            usable = len(table.addresses)
+            if table.meta.last_extended_slot >= slot:
+                usable = table.meta.last_extended_slot_start_index
+            for indexes, loaded in (
+                (lookup.writable_indexes, writable),
+                (lookup.readonly_indexes, readonly),
+            ):
+                for position in indexes:
+                    if position >= usable:
+                        raise TransactionError("InvalidAddressLookupTableIndex")
+                    loaded.append(table.addresses[position])
+        return writable + readonly
+
+    def _lookup_table_closable(self, table: AddressLookupTable) -> bool:
+        deactivation_slot = table.meta.deactivation_slot
+        return (
+            deactivation_slot != _ACTIVE
+            and self.slot > deactivation_slot + LOOKUP_TABLE_COOLDOWN_SLOTS
+        )
+
+    def _apply_lookup_table(
+        self,
+        data: bytes,
+        accounts: List[Pubkey],
+        signers: Set[Pubkey],
+        staged: Dict[Pubkey, Optional[FakeAccount]],
+    ) -> None:
+        (tag,) = struct.unpack_from("<I", data)
+        required = 2 if tag == DEACTIVATE_LOOKUP_TABLE else 3
+        if len(accounts) < required:
+            raise TransactionError("NotEnoughAccountKeys")
+        address, authority = accounts[:2]
+
+        if tag == CREATE_LOOKUP_TABLE:
+            if accounts[2] not in signers:
+                raise TransactionError("MissingRequiredSignature")
+            recent_slot, bump = struct.unpack_from("<QB", data, 4)
+            if recent_slot > self.slot:
+                raise TransactionError("InvalidInstructionData")
+            if derive_lookup_table_address(authority, recent_slot) != (address, bump):
+                raise TransactionError("InvalidArgument")
+            if self._load(address, staged) is not None:
+                raise TransactionError("AccountAlreadyInitialized")
+            staged[address] = FakeAccount(
+                data=encode_lookup_table(authority, []),
+                owner=LOOKUP_TABLE_PROGRAM_ID,
+                lamports=RENT_EXEMPT_LAMPORTS,
+            )
+            return
+
+        account = self._load(address, staged)
+        if account is None or account.owner != LOOKUP_TABLE_PROGRAM_ID:
+            raise TransactionError("UninitializedAccount")
+        table = AddressLookupTable.deserialize(account.data)
+        if authority not in signers or table.meta.authority != authority:
+            raise TransactionError("IncorrectAuthority")
+        addresses = list(table.addresses)
+        deactivated = table.meta.deactivation_slot != _ACTIVE
+
+        if tag == EXTEND_LOOKUP_TABLE:
+            if accounts[2] not in signers:
+                raise TransactionError("MissingRequiredSignature")
+            if deactivated:
+                raise TransactionError("InvalidArgument")
+            (count,) = struct.unpack_from("<Q", data, 4)
+            new_addresses = [
+                Pubkey(data[12 + 32 * index : 44 + 32 * index])
+                for index in range(count)
+            ]
+            if len(addresses) + len(new_addresses) > 256:
+                raise TransactionError("InvalidInstructionData")
+
+            slot = self.slot
+            start_index = len(addresses)
+            if table.meta.last_extended_slot == slot:
+                start_index = table.meta.last_extended_slot_start_index
+            staged[address] = replace(
+                account,
+                data=encode_lookup_table(
+                    authority, addresses + new_addresses, slot, start_index
+                ),
+            )
+        elif tag == DEACTIVATE_LOOKUP_TABLE:
+            if deactivated:
+                raise TransactionError("InvalidArgument")
+            staged[address] = replace(
+                account,
+                data=encode_lookup_table(
+                    authority,
+                    addresses,
+                    table.meta.last_extended_slot,
+                    table.meta.last_extended_slot_start_index,
+                    deactivation_slot=self.slot,
+                ),
+            )
+        elif tag == CLOSE_LOOKUP_TABLE:
+            if not self._lookup_table_closable(table):
+                raise TransactionError("InvalidArgument")
+            staged[address] = None
+            self._credit(accounts[2], account.lamports, staged)
+        else:
+            raise TransactionError("InvalidInstructionData")
+
+    def _load(
+        self, address: Pubkey, staged: Dict[Pubkey, Optional[FakeAccount]]
+    ) -> Optional[FakeAccount]:
+        if address in staged:
+            return staged[address]
+        return self.accounts.get(address)
+
+    def _credit(
+        self,
+        address: Pubkey,
+        lamports: int,
+        staged: Dict[Pubkey, Optional[FakeAccount]],
+    ) -> None:
+        account = self._load(address, staged)
+        if account is None:
+            account = FakeAccount(data=b"", owner=SYSTEM_PROGRAM_ID, lamports=0)
+        staged[address] = replace(account, lamports=account.lamports + lamports)
+
+    def _apply(
+        self,
+        data: bytes,
+        accounts: List[Pubkey],
+        signers: Set[Pubkey],
+        staged: Dict[Pubkey, Optional[FakeAccount]],
+    ) -> None:
+        discriminator = data[:8]
+        if discriminator == DISTRIBUTE_TRANCHE:
+            required = 3
+        elif discriminator == CLOSE_CONTRACT:
+            required = 2
+        else:
+            raise TransactionError("InvalidInstructionData")
+        if len(accounts) < required:
+            raise TransactionError("NotEnoughAccountKeys")
+
+        address = accounts[0]
+        account = self._load(address, staged)
+        if account is None or account.owner != PROGRAM_ID:
+            raise TransactionError({"Custom": ACCOUNT_NOT_INITIALIZED})
+        contract = decode_payment_contract(account.data)
+
+        if discriminator == DISTRIBUTE_TRANCHE:
+            recipient, signer = accounts[1], accounts[2]
+            if signer not in signers:
+                raise TransactionError("MissingRequiredSignature")
+            if (
+                self.authorized_signers is not None
+                and signer != contract.owner
+                and signer not in self.authorized_signers
+            ):
+                raise TransactionError({"Custom": INVALID_SIGNER})
+            if contract.paid_tranches >= contract.tranche_count:
+                raise TransactionError({"Custom": ALL_TRANCHES_PAID})
+            if recipient != contract.recipient(contract.paid_tranches):
+                raise TransactionError({"Custom": INVALID_RECIPIENT})
+
+            amount = contract.total_amount // contract.tranche_count
+            staged[address] = FakeAccount(
+                data=encode_payment_contract(
+                    owner=contract.owner,
+                    total_amount=contract.total_amount,
+                    tranche_count=contract.tranche_count,
+                    recipients=contract.recipients,
+                    paid_tranches=contract.paid_tranches + 1,
+                ),
+                owner=PROGRAM_ID,
+                lamports=account.lamports - amount,
+            )
+            self._credit(recipient, amount, staged)
+        else:
+            owner = accounts[1]
+            if owner not in signers:
+                raise TransactionError("MissingRequiredSignature")
+            if owner != contract.owner:
+                raise TransactionError({"Custom": INVALID_SIGNER})
+            staged[address] = None
+            self._credit(owner, account.lamports, staged)
+
+
+class FakeRpcServer:
+    """
+    Serves a FakeSolanaRpc over HTTP/1.1 on a local port.
+
+    Example:
+        async with FakeRpcServer(FakeSolanaRpc(latency=0.02)) as server:
+            settings.SOLANA_RPC_URL = server.url
+    """
+
+    def __init__(self, chain: FakeSolanaRpc, host: str = "127.0.0.1", port: int = 0):
+        self.chain = chain
+        self.host = host
+        self.port = port
+        self.url: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"http://{self.host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeRpcServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, reply = await self.chain.handle_body(body)
+                payload = json.dumps(reply).encode() if reply is not None else b""
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    chain = FakeSolanaRpc(
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        drop_rate=args.drop_rate,
+        slot_time=args.slot_time,
+    )
+    owner = Pubkey.new_unique()
+    for _ in range(args.contracts):
+        recipients = [Pubkey.new_unique() for _ in range(args.tranches)]
+        address = chain.add_payment_contract(owner, 1_000_000_000, recipients)
+        print(address)
+
+    async with FakeRpcServer(chain, args.host, args.port) as server:
+        print(f"Fake RPC listening on {server.url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--contracts", type=int, default=10)
+    parser.add_argument("--tranches", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--slot-time", type=float, default=0.4)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
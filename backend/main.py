@@ -1,15 +1,67 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
 from app.core.config import settings
+from app.services.account_mirror import account_mirror
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.claim_service import (
+    CLAIM_JOB,
+    MILESTONE_JOB,
+    handle_claim_job,
+    handle_milestone_job,
+)
+from app.services.db_service import (
+    ensure_job_indexes,
+    ensure_onchain_indexes,
+    ensure_twitter_user_indexes,
+)
+from app.services.job_queue import payout_workers
+from app.services.metrics_poller import metrics_poller
+from app.services.rpc_client import close_rpc_client, start_rpc_client
+from app.services.signer_service import signer_service
+from app.services.twitter_service import twitter_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients at startup and close them at shutdown."""
+    # Parse the payout wallet once, refusing to start without a valid key
+    signer_service.load()
+    await start_rpc_client()
+    await blockhash_prefetcher.start()
+    await confirmation_tracker.start()
+    if settings.ACCOUNT_MIRROR_ENABLED:
+        if settings.ACCOUNT_MIRROR_PERSIST:
+            await ensure_onchain_indexes()
+        await account_mirror.start()
+    await ensure_job_indexes()
+    await ensure_twitter_user_indexes()
+    payout_workers.register(CLAIM_JOB, handle_claim_job)
+    payout_workers.register(MILESTONE_JOB, handle_milestone_job)
+    await payout_workers.start()
+    if settings.METRICS_POLLER_ENABLED:
+        await metrics_poller.start()
+    yield
+    await metrics_poller.stop()
+    await payout_workers.stop()
+    await account_mirror.stop()
+    await confirmation_tracker.stop()
+    await blockhash_prefetcher.stop()
+    await close_rpc_client()
+    twitter_service.close()
+
 
 # Initialize FastAPI application
 app = FastAPI(
     title="Attention Vault Backend",
     description="Backend API for Attention Vault to verify social media metrics",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS middleware
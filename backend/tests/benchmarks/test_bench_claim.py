@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.bench_claim import StageTimer, run
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestBenchClaim:
+    """Tests for the end-to-end claim benchmark."""
+
+    async def test_stage_timer_report(self):
+        """Test that the report has percentiles and throughput per stage."""
+        timer = StageTimer()
+        for index in range(100):
+            timer.record("db", index, index + (index + 1) / 1000)
+
+        report = timer.report()["db"]
+
+        assert report["count"] == 100
+        assert report["p50_ms"] == pytest.approx(50)
+        assert report["p99_ms"] == pytest.approx(99)
+        assert report["throughput_per_s"] == pytest.approx(100 / 99.1)
+
+    async def test_run_claims_every_contract(self):
+        """Test a small run end to end against the local fakes."""
+        result = await run(
+            contracts=2,
+            tranches=2,
+            db_latency=0,
+            twitter_latency=0,
+            llm_latency=0,
+            rpc_latency=0,
+            slot_time=0.01,
+        )
+
+        assert result["claims_succeeded"] == 2
+        assert result["rpc_requests"]["sendTransaction"] == 2
+        for stage in (
+            "create_contract",
+            "claim_request",
+            "claim",
+            "db",
+            "tweet_fetch",
+            "llm",
+            "rpc_read",
+            "send",
+        ):
+            assert result["stages"][stage]["count"] > 0
@@ -0,0 +1,238 @@
+import pytest
+import asyncio
+import base64
+import httpx
+from solana.rpc.async_api import AsyncClient
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+
+from app.contract_client.instructions.close_contract import close_contract
+from app.contract_client.instructions.distribute_tranche import distribute_tranche
+from app.core.config import settings
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.distribute_tranche_service import distribute_tranches
+from app.services.payment_contract_decoder import decode_payment_contract
+from app.services.rpc_client import close_rpc_client, get_rpc_client
+from app.services.signer_service import signer_service
+from app.services.solana_service import program_account_filters
+from benchmarks.fake_rpc import (
+    ALL_TRANCHES_PAID,
+    INVALID_RECIPIENT,
+    FakeRpcServer,
+    FakeSolanaRpc,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def seed_contract(chain: FakeSolanaRpc, tranches: int = 3, paid: int = 0):
+    owner = Keypair()
+    recipients = [Pubkey.new_unique() for _ in range(tranches)]
+    address = chain.add_payment_contract(
+        owner.pubkey(), 3_000, recipients, paid_tranches=paid
+    )
+    return address, owner, recipients
+
+
+def send(chain: FakeSolanaRpc, signer: Keypair, instructions, skip_preflight=False):
+    blockhash = chain.get_latest_blockhash()["value"]["blockhash"]
+    transaction = Transaction.new_signed_with_payer(
+        instructions, signer.pubkey(), [signer], Hash.from_string(blockhash)
+    )
+    return chain.dispatch(
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTransaction",
+            "params": [
+                base64.b64encode(bytes(transaction)).decode(),
+                {"encoding": "base64", "skipPreflight": skip_preflight},
+            ],
+        }
+    )
+
+
+def distribute(address: Pubkey, recipient: Pubkey, signer: Keypair):
+    return distribute_tranche(
+        {"contract": address, "recipient": recipient, "owner": signer.pubkey()}
+    )
+
+
+class TestFakeSolanaRpc:
+    """Tests for the local stand-in RPC endpoint."""
+
+    async def test_account_reads_use_real_layout(self):
+        """Test that seeded contracts decode through the AsyncClient and filters."""
+        chain = FakeSolanaRpc()
+        address, owner, recipients = seed_contract(chain)
+        seed_contract(chain)
+
+        async with FakeRpcServer(chain) as server:
+            solana = AsyncClient(server.url)
+            info = await solana.get_account_info(address)
+            multiple = await solana.get_multiple_accounts(
+                [address, Pubkey.new_unique()]
+            )
+            owned = await solana.get_program_accounts(
+                info.value.owner,
+                encoding="base64",
+                filters=program_account_filters(str(owner.pubkey())),
+            )
+            await solana.close()
+
+        contract = decode_payment_contract(info.value.data)
+        assert contract.recipients == recipients
+        assert contract.paid_tranches == 0
+        assert multiple.value[1] is None
+        assert [account.pubkey for account in owned.value] == [address]
+
+    async def test_distribute_tranche_advances_state(self):
+        """Test that a payout bumps paid_tranches and credits the recipient."""
+        chain = FakeSolanaRpc()
+        address, _, recipients = seed_contract(chain)
+        payer = Keypair()
+
+        reply = send(chain, payer, [distribute(address, recipients[0], payer)])
+
+        assert "result" in reply
+        contract = decode_payment_contract(chain.accounts[address].data)
+        assert contract.paid_tranches == 1
+        assert chain.accounts[recipients[0]].lamports == 1_000
+
+        chain.advance()
+        statuses = chain.get_signature_statuses([reply["result"]])["value"]
+        assert statuses[0]["confirmationStatus"] == "confirmed"
+        assert statuses[0]["err"] is None
+
+    async def test_program_errors_fail_preflight_atomically(self):
+        """Test that a failing instruction rolls back the whole transaction."""
+        chain = FakeSolanaRpc()
+        address, _, recipients = seed_contract(chain)
+        payer = Keypair()
+
+        reply = send(
+            chain,
+            payer,
+            [
+                distribute(address, recipients[0], payer),
+                distribute(address, recipients[0], payer),
+            ],
+        )
+
+        assert reply["error"]["code"] == -32002
+        assert reply["error"]["data"]["err"] == {
+            "InstructionError": [1, {"Custom": INVALID_RECIPIENT}]
+        }
+        assert decode_payment_contract(chain.accounts[address].data).paid_tranches == 0
+
+    async def test_skip_preflight_lands_failed_transaction(self):
+        """Test that without preflight a failing transaction lands with its error."""
+        chain = FakeSolanaRpc()
+        address, _, recipients = seed_contract(chain, tranches=1, paid=1)
+        payer = Keypair()
+
+        reply = send(chain, payer, [distribute(address, recipients[0], payer)], True)
+
+        status = chain.get_signature_statuses([reply["result"]])["value"][0]
+        assert status["err"] == {"InstructionError": [0, {"Custom": ALL_TRANCHES_PAID}]}
+
+    async def test_close_contract_refunds_owner(self):
+        """Test that close_contract removes the account and refunds its lamports."""
+        chain = FakeSolanaRpc()
+        address, owner, _ = seed_contract(chain)
+        lamports = chain.accounts[address].lamports
+
+        reply = send(
+            chain,
+            owner,
+            [close_contract({"contract": address, "owner": owner.pubkey()})],
+        )
+
+        assert "result" in reply
+        assert address not in chain.accounts
+        assert chain.accounts[owner.pubkey()].lamports == lamports
+
+    async def test_expired_blockhash_is_rejected(self):
+        """Test that a transaction with an expired blockhash is not processed."""
+        chain = FakeSolanaRpc()
+        address, _, recipients = seed_contract(chain)
+        payer = Keypair()
+        blockhash = chain.get_latest_blockhash()["value"]["blockhash"]
+        chain.advance(200)
+
+        transaction = Transaction.new_signed_with_payer(
+            [distribute(address, recipients[0], payer)],
+            payer.pubkey(),
+            [payer],
+            Hash.from_string(blockhash),
+        )
+        reply = chain.dispatch(
+            {
+                "method": "sendTransaction",
+                "params": [
+                    base64.b64encode(bytes(transaction)).decode(),
+                    {"encoding": "base64"},
+                ],
+            }
+        )
+
+        assert reply["error"]["data"]["err"] == "BlockhashNotFound"
+
+    async def test_latency_and_failure_injection(self):
+        """Test injected delays, HTTP failures and JSON-RPC errors."""
+        chain = FakeSolanaRpc(method_latency={"getSlot": 0.05})
+        chain.inject_error("getBlockHeight")
+
+        async with httpx.AsyncClient(transport=chain.transport()) as client:
+            started = asyncio.get_running_loop().time()
+            await client.post("http://fake", json={"id": 1, "method": "getSlot"})
+            assert asyncio.get_running_loop().time() - started >= 0.05
+
+            first = await client.post(
+                "http://fake", json={"id": 1, "method": "getBlockHeight"}
+            )
+            second = await client.post(
+                "http://fake", json={"id": 1, "method": "getBlockHeight"}
+            )
+            assert first.json()["error"]["code"] == -32005
+            assert "result" in second.json()
+
+            chain.failure_rate = 1.0
+            failed = await client.post(
+                "http://fake", json={"id": 1, "method": "getSlot"}
+            )
+            assert failed.status_code == 503
+
+
+class TestFakeRpcPayouts:
+    """Tests running the payout service against the stand-in endpoint."""
+
+    @pytest.fixture
+    async def chain(self, monkeypatch):
+        chain = FakeSolanaRpc(slot_time=0.01)
+        async with FakeRpcServer(chain) as server:
+            await close_rpc_client()
+            monkeypatch.setattr(settings, "SOLANA_RPC_URL", server.url)
+            monkeypatch.setattr(signer_service, "_keypair", Keypair())
+            monkeypatch.setattr(signer_service, "_provider", None)
+            monkeypatch.setattr(confirmation_tracker, "poll_interval", 0.01)
+            blockhash_prefetcher.invalidate()
+            yield chain
+            await confirmation_tracker.stop()
+            await close_rpc_client()
+            blockhash_prefetcher.invalidate()
+
+    async def test_distribute_tranches_end_to_end(self, chain):
+        """Test that distribute_tranches pays out against the fake chain."""
+        address, _, recipients = seed_contract(chain, tranches=4)
+
+        results = await distribute_tranches(str(address), 3)
+
+        assert [result["success"] for result in results] == [True] * 3
+        contract = decode_payment_contract(chain.accounts[address].data)
+        assert contract.paid_tranches == 3
+        assert chain.requests["sendTransaction"] == 1
+        assert get_rpc_client()._provider.endpoint_uri == settings.SOLANA_RPC_URL
@@ -0,0 +1,208 @@
+import pytest
+import asyncio
+import base64
+import json
+import websockets
+from solders.pubkey import Pubkey
+
+from app.services.account_mirror import AccountMirror
+from app.services.payment_contract_decoder import encode_payment_contract
+from app.services.solana_service import PROGRAM_ID, PaymentContractSnapshot
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_snapshot(address: str, paid_tranches: int, slot: int):
+    return PaymentContractSnapshot(
+        address=address,
+        owner=str(Pubkey.new_unique()),
+        total_amount=300,
+        tranche_count=3,
+        recipients=[str(Pubkey.new_unique()) for _ in range(3)],
+        paid_tranches=paid_tranches,
+        slot=slot,
+    )
+
+
+def program_notification(address: str, paid_tranches: int, slot: int) -> str:
+    data = encode_payment_contract(
+        owner=Pubkey.new_unique(),
+        total_amount=300,
+        tranche_count=3,
+        recipients=[Pubkey.new_unique() for _ in range(3)],
+        paid_tranches=paid_tranches,
+    )
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "programNotification",
+            "params": {
+                "subscription": 7,
+                "result": {
+                    "context": {"slot": slot},
+                    "value": {
+                        "pubkey": address,
+                        "account": {
+                            "data": [base64.b64encode(data).decode(), "base64"],
+                            "executable": False,
+                            "lamports": 1_000_000,
+                            "owner": str(PROGRAM_ID),
+                            "rentEpoch": 0,
+                            "space": len(data),
+                        },
+                    },
+                },
+            },
+        }
+    )
+
+
+class StandInFeed:
+    """Local websocket server standing in for the Solana programSubscribe feed."""
+
+    def __init__(self, sessions):
+        # One list of outgoing notifications per connection; the server closes
+        # the connection after sending them unless it is the last session
+        self.sessions = list(sessions)
+        self.connections = 0
+        self.subscribe_requests = []
+        self.server = None
+
+    async def handler(self, websocket, path=None):
+        self.connections += 1
+        request = json.loads(await websocket.recv())
+        self.subscribe_requests.append(request)
+        await websocket.send(
+            json.dumps({"jsonrpc": "2.0", "result": 7, "id": request["id"]})
+        )
+
+        messages = self.sessions.pop(0) if self.sessions else []
+        for message in messages:
+            await websocket.send(message)
+
+        if self.sessions:
+            await websocket.close()
+        else:
+            await websocket.wait_closed()
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met"
+        await asyncio.sleep(0.01)
+
+
+class TestAccountMirror:
+    """Tests for the programSubscribe account mirror."""
+
+    async def test_applies_program_notifications(self):
+        """Test that streamed updates replace the resynced snapshot."""
+        address = str(Pubkey.new_unique())
+
+        async def resync():
+            return 10, [make_snapshot(address, paid_tranches=0, slot=10)]
+
+        feed = StandInFeed([[program_notification(address, paid_tranches=2, slot=11)]])
+        async with feed:
+            mirror = AccountMirror(feed.url, resync=resync)
+            await mirror.start()
+            await wait_for(lambda: mirror.updates == 1)
+            await mirror.stop()
+
+        assert feed.subscribe_requests[0]["method"] == "programSubscribe"
+        assert feed.subscribe_requests[0]["params"][0] == str(PROGRAM_ID)
+        assert mirror._snapshots[address].paid_tranches == 2
+        assert mirror._snapshots[address].slot == 11
+
+    async def test_ignores_older_slots(self):
+        """Test that an update older than the mirrored state is dropped."""
+        address = str(Pubkey.new_unique())
+
+        async def resync():
+            return 20, [make_snapshot(address, paid_tranches=3, slot=20)]
+
+        feed = StandInFeed([[program_notification(address, paid_tranches=1, slot=15)]])
+        async with feed:
+            mirror = AccountMirror(feed.url, resync=resync)
+            await mirror.start()
+            await wait_for(lambda: mirror.updates == 1)
+            snapshot = mirror.get(address)
+            await mirror.stop()
+
+        assert snapshot.paid_tranches == 3
+
+    async def test_reconnects_and_resyncs(self):
+        """Test that a dropped connection is re-established and resynced."""
+        address = str(Pubkey.new_unique())
+        resyncs = []
+
+        async def resync():
+            resyncs.append(True)
+            return len(resyncs), [
+                make_snapshot(address, paid_tranches=len(resyncs), slot=len(resyncs))
+            ]
+
+        persisted = []
+
+        async def persist(snapshots):
+            persisted.extend(snapshots)
+
+        feed = StandInFeed([[], []])
+        async with feed:
+            mirror = AccountMirror(
+                feed.url, resync=resync, persist=persist, reconnect_delay=0.01
+            )
+            await mirror.start()
+            await wait_for(lambda: len(resyncs) == 2 and mirror.synced.is_set())
+            snapshot = mirror.get(address)
+            await mirror.stop()
+
+        assert feed.connections == 2
+        assert mirror.reconnects == 1
+        assert snapshot.paid_tranches == 2
+        assert [snapshot.slot for snapshot in persisted] == [1, 2]
+        assert mirror.get(address) is None
+
+    async def test_resync_drops_accounts_closed_while_disconnected(self):
+        """Test that a resync removes mirrored accounts missing from the scan."""
+        kept = str(Pubkey.new_unique())
+        closed = str(Pubkey.new_unique())
+        created_later = str(Pubkey.new_unique())
+        resyncs = []
+
+        async def resync():
+            resyncs.append(True)
+            if len(resyncs) == 1:
+                return 10, [
+                    make_snapshot(kept, paid_tranches=0, slot=10),
+                    make_snapshot(closed, paid_tranches=0, slot=10),
+                ]
+            return 20, [make_snapshot(kept, paid_tranches=1, slot=20)]
+
+        feed = StandInFeed([[], []])
+        async with feed:
+            mirror = AccountMirror(feed.url, resync=resync, reconnect_delay=0.01)
+            # Seen by a notification after the second scan, so it must survive it
+            mirror.apply(make_snapshot(created_later, paid_tranches=0, slot=25))
+            await mirror.start()
+            await wait_for(lambda: len(resyncs) == 2 and mirror.synced.is_set())
+            mirrored = dict(mirror._snapshots)
+            await mirror.stop()
+
+        assert mirrored[kept].paid_tranches == 1
+        assert closed not in mirrored
+        assert created_later in mirrored
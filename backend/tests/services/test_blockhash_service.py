@@ -0,0 +1,96 @@
+import pytest
+import asyncio
+from solders.hash import Hash
+
+from app.services.blockhash_service import BlockhashPrefetcher, CachedBlockhash
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockFetch:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return CachedBlockhash(Hash.new_unique(), 1000 + self.calls, 0.0)
+
+
+class TestBlockhashPrefetcher:
+    """Tests for the background blockhash prefetcher."""
+
+    async def test_get_reuses_fresh_blockhash(self):
+        """Test that a fresh blockhash is served without another RPC call."""
+        fetch = MockFetch()
+        clock = MockClock()
+        prefetcher = BlockhashPrefetcher(fetch=fetch, max_age=30, clock=clock)
+
+        first = await prefetcher.get()
+        clock.now = 10
+        second = await prefetcher.get()
+
+        assert fetch.calls == 1
+        assert second == first
+
+    async def test_get_refreshes_near_expiry(self):
+        """Test that a blockhash older than max_age is refreshed on demand."""
+        fetch = MockFetch()
+        clock = MockClock()
+        prefetcher = BlockhashPrefetcher(fetch=fetch, max_age=30, clock=clock)
+
+        first = await prefetcher.get()
+        clock.now = 31
+        second = await prefetcher.get()
+
+        assert fetch.calls == 2
+        assert second.blockhash != first.blockhash
+        assert second.last_valid_block_height == 1002
+
+    async def test_concurrent_refreshes_share_one_request(self):
+        """Test that concurrent callers wait on a single fetch."""
+        fetch = MockFetch(delay=0.01)
+        prefetcher = BlockhashPrefetcher(fetch=fetch)
+
+        results = await asyncio.gather(*(prefetcher.get() for _ in range(10)))
+
+        assert fetch.calls == 1
+        assert len({result.blockhash for result in results}) == 1
+
+    async def test_invalidate_forces_refresh(self):
+        """Test that an invalidated blockhash is fetched again."""
+        fetch = MockFetch()
+        prefetcher = BlockhashPrefetcher(fetch=fetch)
+
+        await prefetcher.get()
+        prefetcher.invalidate()
+        await prefetcher.get()
+
+        assert fetch.calls == 2
+
+    async def test_background_refresh(self):
+        """Test that the background task keeps refreshing and survives errors."""
+        calls = []
+
+        async def flaky_fetch():
+            calls.append(True)
+            if len(calls) == 2:
+                raise Exception("RPC error")
+            return CachedBlockhash(Hash.new_unique(), len(calls), 0.0)
+
+        prefetcher = BlockhashPrefetcher(fetch=flaky_fetch, refresh_interval=0.01)
+        await prefetcher.start()
+        await asyncio.sleep(0.1)
+        await prefetcher.stop()
+
+        assert len(calls) >= 3
+        assert prefetcher.refreshes == len(calls) - 1
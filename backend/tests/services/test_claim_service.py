@@ -0,0 +1,256 @@
+import pytest
+import asyncio
+
+from app.services.claim_service import (
+    TrancheTransferError,
+    handle_claim_job,
+    handle_milestone_job,
+    process_claim,
+    process_milestone,
+)
+from app.services.solana_service import PaymentContractSnapshot
+from app.services.twitter_rate_limiter import RateLimited
+
+# Import the module for patching
+import app.services.claim_service as claim_service
+
+pytestmark = pytest.mark.asyncio
+
+CONTRACT_ADDRESS = "11111111111111111111111111111111"
+POST_URL = "https://twitter.com/influencer/status/123"
+
+
+@pytest.fixture
+def claim_env(monkeypatch):
+    """Patch the claim pipeline dependencies, returning recorded calls."""
+    env = {
+        "updates": [],
+        "transfers": [],
+        "likes": 250,
+        "fail_from": None,
+        "contract": {},
+        "paid_tranches": 0,
+        "verified": [],
+        "fresh_reads": [],
+    }
+
+    async def mock_get_contract(address):
+        return {
+            "contract_address": address,
+            "twitter_handle": "@influencer",
+            "verification_text": "Mention the vault",
+            "status": "pending",
+            "number_of_tranches": 3,
+            "tranche_distribution": [100, 200, 300],
+            **env["contract"],
+        }
+
+    async def mock_validate_post_url(post_url, refresh_metrics=False):
+        env["refreshed"] = refresh_metrics
+        return {
+            "author_handle": "influencer",
+            "text": "The vault",
+            "public_metrics": {"like_count": env["likes"]},
+        }
+
+    async def mock_verify_post_content(text, verification_text):
+        env["verified"].append(text)
+        return True
+
+    async def mock_load_payment_contract(address, fresh=False):
+        env["fresh_reads"].append(fresh)
+        return PaymentContractSnapshot(
+            address=address,
+            owner=CONTRACT_ADDRESS,
+            total_amount=300,
+            tranche_count=3,
+            recipients=["a", "b", "c"],
+            paid_tranches=env["paid_tranches"],
+            slot=1,
+        )
+
+    async def mock_transfer_tranches(address, count, snapshot):
+        env["transfers"].append(count)
+        return [
+            {
+                "tranche_index": index,
+                "success": env["fail_from"] is None or index < env["fail_from"],
+                "error": (
+                    None
+                    if env["fail_from"] is None or index < env["fail_from"]
+                    else "rpc_error"
+                ),
+            }
+            for index in range(count)
+        ]
+
+    async def mock_update_contract_with_post(address, update_data):
+        env["updates"].append(update_data)
+        return True
+
+    monkeypatch.setattr(claim_service, "get_contract", mock_get_contract)
+    monkeypatch.setattr(claim_service, "validate_post_url", mock_validate_post_url)
+    monkeypatch.setattr(claim_service, "verify_post_content", mock_verify_post_content)
+    monkeypatch.setattr(
+        claim_service, "load_payment_contract", mock_load_payment_contract
+    )
+    monkeypatch.setattr(claim_service, "transfer_tranches", mock_transfer_tranches)
+    monkeypatch.setattr(
+        claim_service, "update_contract_with_post", mock_update_contract_with_post
+    )
+    return env
+
+
+class TestClaimService:
+    """Tests for the claim pipeline run by the payout queue."""
+
+    async def test_process_claim_pays_qualified_tranches(self, claim_env):
+        """Test that every tranche the likes qualify for is paid."""
+        result = await process_claim(CONTRACT_ADDRESS, POST_URL)
+
+        assert result["success"]
+        assert claim_env["transfers"] == [2]
+        assert claim_env["updates"][0]["status"] == "partially_claimed"
+        assert claim_env["updates"][0]["tranches_distributed"] == 2
+        assert claim_env["updates"][0]["paid_tranches"] == 2
+        # Payouts are decided on fresh like counts, never cached ones
+        assert claim_env["refreshed"]
+        # ...and on paid_tranches read from the chain, not the cache or mirror
+        assert claim_env["fresh_reads"] == [True]
+
+    async def test_process_claim_rejects_insufficient_likes(self, claim_env):
+        """Test that a rejected claim returns a result instead of raising."""
+        claim_env["likes"] = 10
+
+        result = await process_claim(CONTRACT_ADDRESS, POST_URL)
+
+        assert not result["success"]
+        assert result["reason"] == "insufficient_likes"
+        assert claim_env["transfers"] == []
+
+    async def test_process_claim_raises_on_failed_tranches(self, claim_env):
+        """Test that unpaid qualified tranches raise so the job is retried."""
+        claim_env["fail_from"] = 1
+
+        with pytest.raises(TrancheTransferError):
+            await process_claim(CONTRACT_ADDRESS, POST_URL)
+
+        assert claim_env["updates"][0]["tranches_distributed"] == 1
+
+    async def test_process_claim_raises_when_rate_limited(self, claim_env, monkeypatch):
+        """Test that a rate limited tweet lookup is retried, not rejected."""
+
+        async def rate_limited(post_url, refresh_metrics=False):
+            raise RateLimited("/2/tweets", 30)
+
+        monkeypatch.setattr(claim_service, "validate_post_url", rate_limited)
+
+        with pytest.raises(RateLimited):
+            await process_claim(CONTRACT_ADDRESS, POST_URL)
+
+        assert claim_env["transfers"] == []
+
+    async def test_milestone_pays_without_verification(self, claim_env):
+        """Test that a milestone pays the new tranches without checking content again."""
+        claim_env["contract"] = {"status": "partially_claimed", "post_url": POST_URL}
+        claim_env["paid_tranches"] = 1
+
+        result = await process_milestone(
+            CONTRACT_ADDRESS, POST_URL, {"like_count": 300}
+        )
+
+        assert result["success"]
+        assert claim_env["transfers"] == [2]
+        assert claim_env["verified"] == []
+        assert claim_env["updates"][0]["status"] == "claimed"
+        # tranches_distributed counts this payout, paid_tranches earlier ones too
+        assert claim_env["updates"][0]["tranches_distributed"] == 2
+        assert claim_env["updates"][0]["paid_tranches"] == 3
+
+    async def test_milestone_requires_verified_post(self, claim_env):
+        """Test that a milestone for a post that was never claimed pays nothing."""
+        result = await process_milestone(
+            CONTRACT_ADDRESS, POST_URL, {"like_count": 300}
+        )
+
+        assert not result["success"]
+        assert result["reason"] == "not_verified"
+        assert claim_env["transfers"] == []
+
+    async def test_claims_with_different_posts_run_their_own_checks(
+        self, claim_env, monkeypatch
+    ):
+        """Test that overlapping claims on one contract are serialized, not shared."""
+        calls = []
+
+        async def mock_process_claim(contract_address, post_url):
+            calls.append(post_url)
+            await asyncio.sleep(0.01)
+            return {"success": post_url == POST_URL, "post_url": post_url}
+
+        monkeypatch.setattr(claim_service, "process_claim", mock_process_claim)
+        other_url = "https://twitter.com/someone_else/status/456"
+
+        results = await asyncio.gather(
+            handle_claim_job(
+                {"contract_address": CONTRACT_ADDRESS, "post_url": POST_URL}
+            ),
+            handle_claim_job(
+                {"contract_address": CONTRACT_ADDRESS, "post_url": other_url}
+            ),
+        )
+
+        assert calls == [POST_URL, other_url]
+        assert results[0]["success"]
+        assert not results[1]["success"]
+        assert results[1]["post_url"] == other_url
+
+    async def test_identical_claims_share_one_execution(self, claim_env, monkeypatch):
+        """Test that the same claim queued twice runs once."""
+        calls = []
+
+        async def mock_process_claim(contract_address, post_url):
+            calls.append(post_url)
+            await asyncio.sleep(0.01)
+            return {"success": True}
+
+        monkeypatch.setattr(claim_service, "process_claim", mock_process_claim)
+        payload = {"contract_address": CONTRACT_ADDRESS, "post_url": POST_URL}
+
+        await asyncio.gather(handle_claim_job(payload), handle_claim_job(dict(payload)))
+
+        assert calls == [POST_URL]
+
+    async def test_milestone_and_claim_take_turns(self, claim_env, monkeypatch):
+        """Test that a milestone waits for a claim on its contract, with its own result."""
+        events = []
+
+        async def mock_process_claim(contract_address, post_url):
+            events.append("claim started")
+            await asyncio.sleep(0.01)
+            events.append("claim done")
+            return {"success": False, "reason": "already_claimed"}
+
+        async def mock_process_milestone(contract_address, post_url, metrics):
+            events.append("milestone")
+            return {"success": True}
+
+        monkeypatch.setattr(claim_service, "process_claim", mock_process_claim)
+        monkeypatch.setattr(claim_service, "process_milestone", mock_process_milestone)
+
+        claim_result, milestone_result = await asyncio.gather(
+            handle_claim_job(
+                {"contract_address": CONTRACT_ADDRESS, "post_url": POST_URL}
+            ),
+            handle_milestone_job(
+                {
+                    "contract_address": CONTRACT_ADDRESS,
+                    "post_url": POST_URL,
+                    "metrics": {"like_count": 300},
+                }
+            ),
+        )
+
+        assert events == ["claim started", "claim done", "milestone"]
+        assert not claim_result["success"]
+        assert milestone_result["success"]
@@ -0,0 +1,192 @@
+import pytest
+import asyncio
+import json
+import websockets
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+from app.services.confirmation_service import ConfirmationTracker
+
+# Import the module for patching
+import app.services.confirmation_service as confirmation_service
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockStatus:
+    def __init__(self, confirmation_status, err=None, slot=10):
+        self.confirmation_status = confirmation_status
+        self.err = err
+        self.slot = slot
+
+
+class MockResponse:
+    def __init__(self, value):
+        self.value = value
+
+
+class MockClient:
+    def __init__(self, block_height=100):
+        self.statuses = {}
+        self.block_height = block_height
+        self.status_calls = []
+        self.rebroadcasts = []
+
+    async def get_signature_statuses(self, signatures):
+        self.status_calls.append(list(signatures))
+        return MockResponse([self.statuses.get(sig) for sig in signatures])
+
+    async def get_block_height(self, commitment=None):
+        return MockResponse(self.block_height)
+
+    async def send_raw_transaction(self, raw, opts=None):
+        self.rebroadcasts.append(raw)
+        return MockResponse(None)
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = MockClient()
+    monkeypatch.setattr(confirmation_service, "get_rpc_client", lambda: client)
+    return client
+
+
+def make_signature(seed: int) -> Signature:
+    return Signature.from_bytes(bytes([seed]) * 64)
+
+
+class TestConfirmationTracker:
+    """Tests for the batched transaction confirmation tracker."""
+
+    async def test_batches_statuses_and_resolves(self, client):
+        """Test that all signatures are checked in one call and resolved."""
+        tracker = ConfirmationTracker()
+        signatures = [make_signature(i) for i in range(1, 4)]
+        callbacks = []
+        futures = [
+            tracker.track(sig, b"raw", 200, callback=callbacks.append)
+            for sig in signatures
+        ]
+        await tracker.stop()
+
+        client.statuses[signatures[0]] = MockStatus(
+            TransactionConfirmationStatus.Confirmed
+        )
+        client.statuses[signatures[1]] = MockStatus(
+            TransactionConfirmationStatus.Processed, err="InstructionError"
+        )
+        client.statuses[signatures[2]] = MockStatus(
+            TransactionConfirmationStatus.Processed
+        )
+        await tracker.poll_once()
+
+        assert client.status_calls == [signatures]
+        assert futures[0].result()["status"] == "confirmed"
+        assert futures[1].result()["status"] == "failed"
+        # Processed is below the confirmed target
+        assert not futures[2].done()
+        assert len(tracker) == 1
+        assert [outcome["status"] for outcome in callbacks] == ["confirmed", "failed"]
+
+    async def test_rebroadcasts_until_expiry(self, client):
+        """Test that unconfirmed transactions are resent, then expire."""
+        clock = MockClock()
+        tracker = ConfirmationTracker(rebroadcast_interval=2.0, clock=clock)
+        future = tracker.track(make_signature(1), b"raw", 150)
+        await tracker.stop()
+
+        await tracker.poll_once()
+        assert client.rebroadcasts == []
+
+        clock.now = 2.0
+        await tracker.poll_once()
+        assert client.rebroadcasts == [b"raw"]
+
+        client.block_height = 151
+        await tracker.poll_once()
+        assert future.result()["status"] == "expired"
+        assert tracker.stats()["expired"] == 1
+
+    async def test_background_polling(self, client):
+        """Test that tracking starts the poller and awaits resolve."""
+        tracker = ConfirmationTracker(poll_interval=0.01)
+        signature = make_signature(1)
+        client.statuses[signature] = MockStatus(TransactionConfirmationStatus.Finalized)
+
+        outcome = await asyncio.wait_for(tracker.track(signature, b"raw", 200), 1)
+        await tracker.stop()
+
+        assert outcome["status"] == "confirmed"
+        assert outcome["signature"] == str(signature)
+
+    async def test_signature_subscribe(self, client):
+        """Test that a websocket notification resolves without polling."""
+        signature = make_signature(1)
+        requests = []
+
+        async def handler(websocket, path=None):
+            request = json.loads(await websocket.recv())
+            requests.append(request)
+            await websocket.send(
+                json.dumps({"jsonrpc": "2.0", "result": 9, "id": request["id"]})
+            )
+            await websocket.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "signatureNotification",
+                        "params": {
+                            "result": {"context": {"slot": 5}, "value": {"err": None}},
+                            "subscription": 9,
+                        },
+                    }
+                )
+            )
+            await websocket.wait_closed()
+
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        tracker = ConfirmationTracker(poll_interval=60, ws_url=f"ws://127.0.0.1:{port}")
+        future = tracker.track(signature, b"raw", 200)
+        await tracker.start()
+
+        outcome = await asyncio.wait_for(future, 5)
+        await tracker.stop()
+        server.close()
+        await server.wait_closed()
+
+        assert requests[0]["method"] == "signatureSubscribe"
+        assert requests[0]["params"][0] == str(signature)
+        assert outcome["status"] == "confirmed"
+        assert outcome["slot"] == 5
+
+    async def test_subscribe_task_is_kept_until_done(self, client):
+        """Test that signatureSubscribe tasks are referenced until they finish."""
+        subscribed = []
+        release = asyncio.Event()
+
+        class MockWebsocket:
+            async def signature_subscribe(self, signature, commitment=None):
+                await release.wait()
+                subscribed.append(signature)
+
+        tracker = ConfirmationTracker(poll_interval=60)
+        tracker._ws = MockWebsocket()
+        signature = make_signature(1)
+        tracker.track(signature, b"raw", 200)
+
+        assert len(tracker._subscribe_tasks) == 1
+        release.set()
+        await asyncio.gather(*tracker._subscribe_tasks)
+        await tracker.stop()
+
+        assert subscribed == [signature]
+        assert not tracker._subscribe_tasks
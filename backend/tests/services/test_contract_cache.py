@@ -0,0 +1,105 @@
+from app.services.contract_cache import ContractCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestContractCache:
+    """Tests for the decoded contract state cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted."""
+        cache = ContractCache(max_entries=10, ttl_seconds=30)
+
+        assert cache.get("a") is None
+        cache.put("a", "snapshot", slot=1)
+        assert cache.get("a") == "snapshot"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = ContractCache(max_entries=10, ttl_seconds=5, clock=clock)
+
+        cache.put("a", "snapshot", slot=1)
+        clock.now = 5
+        assert cache.get("a") == "snapshot"
+        clock.now = 5.1
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_older_slot_does_not_replace_newer(self):
+        """Test that a stale read never overwrites a newer snapshot."""
+        cache = ContractCache(max_entries=10, ttl_seconds=30)
+
+        cache.put("a", "new", slot=20)
+        cache.put("a", "old", slot=10)
+        assert cache.get("a") == "new"
+
+        cache.put("a", "newer", slot=20)
+        assert cache.get("a") == "newer"
+
+    def test_read_started_before_invalidation_is_dropped(self):
+        """Test that a read in flight during an invalidation is not cached."""
+        clock = FakeClock()
+        cache = ContractCache(max_entries=10, ttl_seconds=30, clock=clock)
+
+        read_started = cache.begin_read()
+        clock.now = 1
+        cache.invalidate("a")
+        clock.now = 2
+        cache.put("a", "stale", slot=10, read_started=read_started)
+        assert cache.get("a") is None
+
+        cache.put("a", "fresh", slot=11, read_started=cache.begin_read())
+        assert cache.get("a") == "fresh"
+
+    def test_read_older_than_ttl_is_dropped(self):
+        """Test that invalidation marks can expire without letting old reads in."""
+        clock = FakeClock()
+        cache = ContractCache(max_entries=10, ttl_seconds=5, clock=clock)
+
+        read_started = cache.begin_read()
+        clock.now = 1
+        cache.invalidate("a")
+        clock.now = 10
+        cache.invalidate("b")
+        assert "a" not in cache._invalidated_at
+
+        cache.put("a", "stale", slot=10, read_started=read_started)
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ContractCache(max_entries=2, ttl_seconds=30)
+
+        cache.put("a", "a", slot=1)
+        cache.put("b", "b", slot=1)
+        cache.get("a")
+        cache.put("c", "c", slot=1)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert cache.get("c") == "c"
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate(self):
+        """Test explicit invalidation after our own payouts."""
+        cache = ContractCache(max_entries=10, ttl_seconds=30)
+
+        cache.put("a", "snapshot", slot=1)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+
+        assert cache.get("a") is None
+        assert cache.stats()["invalidations"] == 1
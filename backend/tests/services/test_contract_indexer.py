@@ -0,0 +1,122 @@
+import pytest
+from solders.pubkey import Pubkey
+
+from app.services.contract_indexer import index_contracts, list_owner_contracts
+from app.services.payment_contract_decoder import (
+    HEADER_SIZE,
+    encode_payment_contract,
+)
+from app.services.solana_service import PROGRAM_ID
+
+# Import the modules for patching
+import app.services.contract_indexer as contract_indexer
+import app.services.solana_service as solana_service
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockAccount:
+    def __init__(self, data: bytes):
+        self.owner = PROGRAM_ID
+        self.data = data
+
+
+class MockKeyedAccount:
+    def __init__(self, pubkey: Pubkey, data: bytes):
+        self.pubkey = pubkey
+        self.account = MockAccount(data)
+
+
+class MockValue:
+    def __init__(self, value):
+        self.value = value
+
+
+class MockClient:
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.calls = []
+
+    async def get_slot(self):
+        return MockValue(42)
+
+    async def get_program_accounts(self, program_id, **kwargs):
+        self.calls.append(kwargs)
+        data_slice = kwargs.get("data_slice")
+        accounts = [
+            MockKeyedAccount(
+                pubkey,
+                (
+                    data[data_slice.offset : data_slice.offset + data_slice.length]
+                    if data_slice
+                    else data
+                ),
+            )
+            for pubkey, data in self.accounts
+        ]
+        return MockValue(accounts)
+
+
+def make_accounts(owner: Pubkey, count: int):
+    return [
+        (
+            Pubkey.new_unique(),
+            encode_payment_contract(
+                owner=owner,
+                total_amount=100 * (i + 1),
+                tranche_count=2,
+                recipients=[Pubkey.new_unique(), Pubkey.new_unique()],
+                paid_tranches=i % 2,
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+class TestContractIndexer:
+    """Tests for the getProgramAccounts contract indexer."""
+
+    async def test_list_owner_contracts_uses_filters_and_slice(self, monkeypatch):
+        """Test that owner listings filter by owner and only fetch the prefix."""
+        owner = Pubkey.new_unique()
+        client = MockClient(make_accounts(owner, 3))
+        monkeypatch.setattr(contract_indexer, "get_rpc_client", lambda: client)
+
+        summaries = await list_owner_contracts(str(owner))
+
+        filters = client.calls[0]["filters"]
+        assert filters[0].offset == 0
+        assert filters[1].offset == 8
+        assert filters[1].bytes == str(owner)
+        assert client.calls[0]["data_slice"].length == HEADER_SIZE
+        assert [summary["total_amount"] for summary in summaries] == [100, 200, 300]
+        assert all(summary["owner"] == str(owner) for summary in summaries)
+        assert all(summary["recipient_count"] == 2 for summary in summaries)
+
+    async def test_index_contracts_upserts_snapshots(self, monkeypatch):
+        """Test that indexing decodes every account and upserts it once."""
+        owner = Pubkey.new_unique()
+        client = MockClient(make_accounts(owner, 2))
+        upserted = []
+
+        async def mock_upsert(snapshots):
+            upserted.extend(snapshots)
+            return len(snapshots)
+
+        async def mock_ensure_indexes():
+            pass
+
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: client)
+        monkeypatch.setattr(contract_indexer, "upsert_onchain_contracts", mock_upsert)
+        monkeypatch.setattr(
+            contract_indexer, "ensure_onchain_indexes", mock_ensure_indexes
+        )
+
+        written = await index_contracts(str(owner))
+
+        assert written == 2
+        assert len(client.calls) == 1
+        assert "data_slice" not in client.calls[0]
+        assert [snapshot["paid_tranches"] for snapshot in upserted] == [0, 1]
+        assert all(snapshot["slot"] == 42 for snapshot in upserted)
+        assert all(snapshot["owner"] == str(owner) for snapshot in upserted)
@@ -7,6 +7,7 @@ from typing import Dict, Any
 from app.services.db_service import (
     store_contract_data,
     get_contract,
+    get_contracts,
     update_contract_with_post,
 )
 
@@ -131,6 +132,58 @@ class TestDbService:
         # Verify the function returned None due to the exception
         assert result is None
 
+    async def test_get_contracts_success(
+        self, monkeypatch, test_db, sample_contract_data
+    ):
+        """Test retrieving several contracts with one query."""
+        # Patch the db reference to use our test database
+        monkeypatch.setattr(db_service, "db", test_db)
+
+        # Insert two sample contracts
+        await test_db.contracts.insert_one(dict(sample_contract_data))
+        await test_db.contracts.insert_one(
+            dict(sample_contract_data, contract_address="test_contract_address_456")
+        )
+
+        # Call the function, including an address that does not exist
+        result = await get_contracts(
+            [
+                "test_contract_address_123",
+                "test_contract_address_456",
+                "non_existent_contract",
+            ]
+        )
+
+        # Verify results
+        assert sorted(contract["contract_address"] for contract in result) == [
+            "test_contract_address_123",
+            "test_contract_address_456",
+        ]
+
+    async def test_get_contracts_error(self, monkeypatch):
+        """Test get_contracts with a database error."""
+
+        # Mock the find method to raise an exception
+        def mock_find(*args, **kwargs):
+            raise Exception("Database error")
+
+        # Create a mock collection
+        class MockCollection:
+            find = mock_find
+
+        # Create a mock db
+        class MockDb:
+            contracts = MockCollection()
+
+        # Patch the db
+        monkeypatch.setattr(db_service, "db", MockDb())
+
+        # Call the function
+        result = await get_contracts(["test_contract"])
+
+        # Verify the function returned an empty list due to the exception
+        assert result == []
+
     async def test_update_contract_with_post_success(
         self, monkeypatch, test_db, sample_contract_data, sample_update_data
     ):
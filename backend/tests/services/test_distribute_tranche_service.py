@@ -0,0 +1,220 @@
+import pytest
+import asyncio
+from solana.transaction import PACKET_DATA_SIZE, Transaction
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.compute_budget import (
+    ID as COMPUTE_BUDGET_ID,
+    set_compute_unit_limit,
+    set_compute_unit_price,
+)
+from solders.signature import Signature
+
+from app.contract_client.instructions.distribute_tranche import (
+    distribute_tranche,
+    DistributeTrancheAccounts,
+)
+from app.services.blockhash_service import BlockhashPrefetcher, CachedBlockhash
+from app.services.fee_planner import COMPUTE_BUDGET_PLACEHOLDER
+from app.services.distribute_tranche_service import (
+    distribute_tranches,
+    pack_instructions,
+)
+
+# Import the module for patching
+import app.services.distribute_tranche_service as distribute_tranche_service
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_instructions(owner: Pubkey, count: int):
+    contract = Pubkey.new_unique()
+    return [
+        distribute_tranche(
+            DistributeTrancheAccounts(
+                contract=contract, recipient=Pubkey.new_unique(), owner=owner
+            )
+        )
+        for _ in range(count)
+    ]
+
+
+class TestDistributeTrancheService:
+    """Tests for multi-tranche payouts."""
+
+    async def test_pack_instructions_single_transaction(self):
+        """Test that a small claim fits into one transaction."""
+        owner = Keypair().pubkey()
+        instructions = make_instructions(owner, 5)
+
+        chunks = pack_instructions(instructions, owner)
+
+        assert len(chunks) == 1
+        assert chunks[0] == instructions
+
+    async def test_pack_instructions_splits_on_size_limit(self):
+        """Test that large claims are split and keep their order."""
+        owner = Keypair().pubkey()
+        instructions = make_instructions(owner, 40)
+
+        chunks = pack_instructions(instructions, owner)
+
+        assert len(chunks) > 1
+        assert [ix for chunk in chunks for ix in chunk] == instructions
+
+    async def test_pack_instructions_reserves_prefix(self):
+        """Test that room is left in each transaction for the prefix instructions."""
+        owner = Keypair().pubkey()
+        instructions = make_instructions(owner, 40)
+        prefix = COMPUTE_BUDGET_PLACEHOLDER
+
+        chunks = pack_instructions(instructions, owner, prefix)
+
+        assert len(chunks) >= len(pack_instructions(instructions, owner))
+        for chunk in chunks:
+            transaction = Transaction(fee_payer=owner, instructions=[*prefix, *chunk])
+            assert len(bytes(transaction.to_solders())) <= PACKET_DATA_SIZE
+
+    async def test_distribute_tranches_one_send(self, monkeypatch):
+        """Test that all qualified tranches are sent in a single transaction."""
+        keypair = Keypair()
+        recipients = [str(Pubkey.new_unique()) for _ in range(5)]
+        sent = []
+        signature = Signature.default()
+
+        async def mock_get_contract_data(address):
+            return {
+                "owner": str(keypair.pubkey()),
+                "total_amount": 500,
+                "tranche_count": 5,
+                "recipients": recipients,
+                "paid_tranches": 1,
+            }
+
+        async def mock_fetch():
+            return CachedBlockhash(Hash.default(), 100, 0.0)
+
+        class MockProvider:
+            async def send(self, transaction, opts=None):
+                sent.append(transaction)
+                return signature
+
+        class MockPlanner:
+            async def plan(self, instructions, fee_payer, accounts, blockhash):
+                return [set_compute_unit_limit(90_000), set_compute_unit_price(5)]
+
+        class MockTracker:
+            def track(self, signature, raw_transaction, last_valid_block_height):
+                future = asyncio.get_running_loop().create_future()
+                future.set_result({"status": "confirmed", "error": None})
+                return future
+
+        class MockSigner:
+            def __init__(self):
+                self.keypair = keypair
+                self.provider = MockProvider()
+
+        monkeypatch.setattr(
+            distribute_tranche_service, "get_contract_data", mock_get_contract_data
+        )
+        monkeypatch.setattr(
+            distribute_tranche_service,
+            "blockhash_prefetcher",
+            BlockhashPrefetcher(fetch=mock_fetch),
+        )
+        monkeypatch.setattr(distribute_tranche_service, "signer_service", MockSigner())
+        monkeypatch.setattr(
+            distribute_tranche_service, "confirmation_tracker", MockTracker()
+        )
+        monkeypatch.setattr(distribute_tranche_service, "fee_planner", MockPlanner())
+
+        results = await distribute_tranches("11111111111111111111111111111111", 3)
+
+        assert len(sent) == 1
+        # Compute unit limit and price, then the three tranches
+        assert len(sent[0].instructions) == 5
+        assert sent[0].instructions[0].program_id == COMPUTE_BUDGET_ID
+        assert [result["tranche_index"] for result in results] == [1, 2, 3]
+        assert [result["recipient"] for result in results] == recipients[1:4]
+        assert all(result["success"] for result in results)
+        assert all(result["signature"] == str(signature) for result in results)
+
+    async def test_distribute_tranches_sends_all_chunks_before_waiting(
+        self, monkeypatch
+    ):
+        """Test that every chunk is sent before any confirmation is awaited."""
+        keypair = Keypair()
+        recipients = [str(Pubkey.new_unique()) for _ in range(40)]
+        events = []
+        futures = []
+
+        async def mock_fetch():
+            return CachedBlockhash(Hash.default(), 100, 0.0)
+
+        class MockProvider:
+            async def send(self, transaction, opts=None):
+                events.append("send")
+                return Keypair().sign_message(bytes(len(events)))
+
+        class MockPlanner:
+            async def plan(self, instructions, fee_payer, accounts, blockhash):
+                return [set_compute_unit_limit(90_000), set_compute_unit_price(5)]
+
+        class MockTracker:
+            def track(self, signature, raw_transaction, last_valid_block_height):
+                future = asyncio.get_running_loop().create_future()
+                futures.append(future)
+                return future
+
+        class MockSigner:
+            def __init__(self):
+                self.keypair = keypair
+                self.provider = MockProvider()
+
+        async def confirm_later():
+            await asyncio.sleep(0.01)
+            for index, future in enumerate(futures):
+                events.append("confirm")
+                # The last transaction fails on-chain
+                failed = index == len(futures) - 1
+                future.set_result(
+                    {
+                        "status": "failed" if failed else "confirmed",
+                        "error": "InstructionError" if failed else None,
+                    }
+                )
+
+        monkeypatch.setattr(
+            distribute_tranche_service,
+            "blockhash_prefetcher",
+            BlockhashPrefetcher(fetch=mock_fetch),
+        )
+        monkeypatch.setattr(distribute_tranche_service, "signer_service", MockSigner())
+        monkeypatch.setattr(
+            distribute_tranche_service, "confirmation_tracker", MockTracker()
+        )
+        monkeypatch.setattr(distribute_tranche_service, "fee_planner", MockPlanner())
+
+        contract_data = {
+            "owner": str(keypair.pubkey()),
+            "total_amount": 4000,
+            "tranche_count": 40,
+            "recipients": recipients,
+            "paid_tranches": 0,
+        }
+        confirmer = asyncio.create_task(confirm_later())
+        results = await distribute_tranches(
+            "11111111111111111111111111111111", 40, contract_data
+        )
+        await confirmer
+
+        chunks = len(futures)
+        assert chunks > 1
+        assert events == ["send"] * chunks + ["confirm"] * chunks
+        assert len(results) == 40
+        signatures = list(dict.fromkeys(result["signature"] for result in results))
+        assert len(signatures) == chunks
+        last_chunk = [r for r in results if r["signature"] == signatures[-1]]
+        assert not any(result["success"] for result in last_chunk)
+        assert all(result["success"] for result in results if result not in last_chunk)
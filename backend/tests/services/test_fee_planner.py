@@ -0,0 +1,188 @@
+import pytest
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from app.contract_client.instructions.distribute_tranche import (
+    distribute_tranche,
+    DistributeTrancheAccounts,
+)
+from app.services.fee_planner import FeePlanner, percentile
+
+# Import the module for patching
+import app.services.fee_planner as fee_planner_module
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class MockSimulation:
+    def __init__(self, units_consumed, err=None):
+        class value:
+            pass
+
+        value.units_consumed = units_consumed
+        value.err = err
+        self.value = value
+
+
+class MockClient:
+    def __init__(self, units_consumed):
+        self.units_consumed = units_consumed
+        self.simulations = 0
+
+    async def simulate_transaction(self, transaction):
+        self.simulations += 1
+        return MockSimulation(self.units_consumed)
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_instructions(owner: Pubkey, count: int):
+    contract = Pubkey.new_unique()
+    return [
+        distribute_tranche(
+            DistributeTrancheAccounts(
+                contract=contract, recipient=Pubkey.new_unique(), owner=owner
+            )
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def rpc(monkeypatch):
+    """Stand-in RPC returning fixed fees and simulated compute units."""
+    state = {"fees": [0, 100, 200, 300, 400], "payloads": []}
+    client = MockClient(units_consumed=12_000)
+
+    async def mock_rpc_post(payload):
+        state["payloads"].append(payload)
+        return MockResponse(
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "result": [
+                    {"slot": slot, "prioritizationFee": fee}
+                    for slot, fee in enumerate(state["fees"])
+                ],
+            }
+        )
+
+    monkeypatch.setattr(fee_planner_module, "rpc_post", mock_rpc_post)
+    monkeypatch.setattr(fee_planner_module, "get_rpc_client", lambda: client)
+    state["client"] = client
+    return state
+
+
+class TestFeePlanner:
+    """Tests for the compute budget and priority fee planner."""
+
+    async def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        assert percentile([5, 1, 3, 2, 4], 50) == 3
+        assert percentile([5, 1, 3, 2, 4], 100) == 5
+        assert percentile([7], 75) == 7
+
+    async def test_plan_uses_simulated_units_and_fee_percentile(self, rpc):
+        """Test that the plan sizes the limit from simulation and prices by percentile."""
+        owner = Keypair().pubkey()
+        planner = FeePlanner(fee_percentile=75, compute_margin=1.5)
+        instructions = make_instructions(owner, 3)
+
+        plan = await planner.plan(instructions, owner, [owner], Hash.default())
+
+        # 12_000 units for 3 instructions, times the margin, plus budget overhead
+        assert plan == [set_compute_unit_limit(18_300), set_compute_unit_price(300)]
+        assert rpc["payloads"][0]["method"] == "getRecentPrioritizationFees"
+        assert rpc["payloads"][0]["params"] == [[str(owner)]]
+
+    async def test_fee_caps(self, rpc):
+        """Test the per-price and per-transaction fee caps."""
+        planner = FeePlanner(max_price=250, max_fee_lamports=1)
+        accounts = [Pubkey.new_unique()]
+        await planner.sample_fees(accounts)
+
+        assert planner.compute_unit_price(accounts, 1_000) == 250
+        # 1 lamport over 10_000 units allows at most 100 micro-lamports per unit
+        assert planner.compute_unit_price(accounts, 10_000) == 100
+
+    async def test_min_price_without_samples(self):
+        """Test that the floor applies before any fees were sampled."""
+        planner = FeePlanner(min_price=50)
+        assert planner.compute_unit_price([Pubkey.new_unique()], 10_000) == 50
+
+    async def test_samples_and_simulations_are_reused(self, rpc):
+        """Test that fees and compute units are not re-fetched on every payout."""
+        owner = Keypair().pubkey()
+        clock = MockClock()
+        planner = FeePlanner(sample_interval=10, resimulate_interval=600, clock=clock)
+        instructions = make_instructions(owner, 1)
+
+        await planner.plan(instructions, owner, [owner], Hash.default())
+        clock.now = 5
+        await planner.plan(instructions, owner, [owner], Hash.default())
+        assert len(rpc["payloads"]) == 1
+        assert rpc["client"].simulations == 1
+
+        clock.now = 11
+        await planner.plan(instructions, owner, [owner], Hash.default())
+        assert len(rpc["payloads"]) == 2
+        assert rpc["client"].simulations == 1
+
+    async def test_fees_are_kept_per_account_set(self, rpc):
+        """Test that fees sampled for one contract are not reused for another."""
+        owner = Keypair().pubkey()
+        clock = MockClock()
+        planner = FeePlanner(fee_percentile=100, sample_interval=10, clock=clock)
+        busy, quiet = [Pubkey.new_unique(), owner], [Pubkey.new_unique(), owner]
+
+        rpc["fees"] = [5_000]
+        busy_plan = await planner.plan(
+            make_instructions(owner, 1), owner, busy, Hash.default()
+        )
+        rpc["fees"] = [10]
+        quiet_plan = await planner.plan(
+            make_instructions(owner, 1), owner, quiet, Hash.default()
+        )
+
+        assert [payload["params"][0] for payload in rpc["payloads"]] == [
+            [str(account) for account in busy],
+            [str(account) for account in quiet],
+        ]
+        assert busy_plan[1] == set_compute_unit_price(5_000)
+        assert quiet_plan[1] == set_compute_unit_price(10)
+
+        # The order of the accounts does not matter, and the window is reused
+        clock.now = 5
+        await planner.plan(
+            make_instructions(owner, 1), owner, busy[::-1], Hash.default()
+        )
+        assert len(rpc["payloads"]) == 2
+
+    async def test_least_recently_used_account_sets_are_dropped(self, rpc):
+        """Test that at most max_tracked fee windows are kept."""
+        planner = FeePlanner(max_tracked=2)
+        first, second, third = ([Pubkey.new_unique()] for _ in range(3))
+
+        await planner.sample_fees(first)
+        await planner.sample_fees(second)
+        planner.compute_unit_price(first, 1_000)
+        await planner.sample_fees(third)
+
+        assert planner._key(first) in planner._windows
+        assert planner._key(second) not in planner._windows
@@ -0,0 +1,218 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services.job_queue import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    WorkerPool,
+    enqueue_job,
+)
+from app.services.twitter_rate_limiter import RateLimited
+
+# Import the module for patching
+import app.services.job_queue as job_queue
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockJobStore:
+    """In-memory stand-in for the payout_jobs collection functions."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.renewals = 0
+
+    async def insert_job(self, job):
+        self.jobs[job["_id"]] = dict(job)
+        return True
+
+    async def claim_next_job(self, worker_id, lease_seconds):
+        now = datetime.utcnow()
+        for job in sorted(self.jobs.values(), key=lambda job: job["available_at"]):
+            runnable = (job["status"] == JOB_QUEUED and job["available_at"] <= now) or (
+                job["status"] == "running" and job["locked_until"] < now
+            )
+            if runnable:
+                job.update(
+                    status="running",
+                    worker_id=worker_id,
+                    locked_until=now + timedelta(seconds=lease_seconds),
+                    attempts=job["attempts"] + 1,
+                )
+                return dict(job)
+        return None
+
+    async def renew_job(self, job_id, worker_id, lease_seconds):
+        job = self.jobs[job_id]
+        if job.get("worker_id") != worker_id or job["status"] != "running":
+            return False
+        job["locked_until"] = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        self.renewals += 1
+        return True
+
+    async def update_job(self, job_id, worker_id, update_data):
+        job = self.jobs[job_id]
+        if job.get("worker_id") != worker_id:
+            return False
+        job.update(update_data)
+        return True
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MockJobStore()
+    monkeypatch.setattr(job_queue, "insert_job", store.insert_job)
+    monkeypatch.setattr(job_queue, "claim_next_job", store.claim_next_job)
+    monkeypatch.setattr(job_queue, "renew_job", store.renew_job)
+    monkeypatch.setattr(job_queue, "update_job", store.update_job)
+    return store
+
+
+class TestJobQueue:
+    """Tests for the durable payout job queue."""
+
+    async def test_enqueue_and_run(self, store):
+        """Test that a queued job runs once and stores its result."""
+        calls = []
+
+        async def handler(payload):
+            calls.append(payload)
+            return {"success": True}
+
+        pool = WorkerPool()
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {"contract_address": "abc"})
+
+        assert store.jobs[job_id]["status"] == JOB_QUEUED
+        assert await pool.run_once("worker-0")
+        assert not await pool.run_once("worker-0")
+
+        assert calls == [{"contract_address": "abc"}]
+        assert store.jobs[job_id]["status"] == JOB_SUCCEEDED
+        assert store.jobs[job_id]["result"] == {"success": True}
+        assert store.jobs[job_id]["attempts"] == 1
+
+    async def test_retries_then_fails(self, store):
+        """Test that a raising handler is retried with backoff up to max_attempts."""
+
+        async def handler(payload):
+            raise Exception("RPC timeout")
+
+        pool = WorkerPool(retry_delay=0)
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {}, max_attempts=2)
+
+        await pool.run_once("worker-0")
+        assert store.jobs[job_id]["status"] == JOB_QUEUED
+        assert store.jobs[job_id]["error"] == "RPC timeout"
+
+        await pool.run_once("worker-0")
+        assert store.jobs[job_id]["status"] == JOB_FAILED
+        assert store.jobs[job_id]["attempts"] == 2
+
+    async def test_retry_waits_for_backoff(self, store):
+        """Test that a failed job is not leased again before its retry delay."""
+
+        async def handler(payload):
+            raise Exception("RPC timeout")
+
+        pool = WorkerPool(retry_delay=60)
+        pool.register("claim", handler)
+        await enqueue_job("claim", {})
+
+        assert await pool.run_once("worker-0")
+        assert not await pool.run_once("worker-0")
+
+    async def test_retry_honors_retry_after(self, store):
+        """Test that a rate limited job waits at least the hinted time."""
+
+        async def handler(payload):
+            raise RateLimited("/2/tweets/:id", 600)
+
+        pool = WorkerPool(retry_delay=1)
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {})
+
+        assert await pool.run_once("worker-0")
+
+        delay = store.jobs[job_id]["available_at"] - datetime.utcnow()
+        assert delay > timedelta(seconds=590)
+
+    async def test_expired_lease_is_reclaimed(self, store):
+        """Test that a job held by a dead worker is picked up by another."""
+
+        async def handler(payload):
+            return {"success": True}
+
+        pool = WorkerPool()
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {})
+
+        # A worker leases the job and dies without finishing it
+        await store.claim_next_job("dead-worker", lease_seconds=-1)
+
+        assert await pool.run_once("worker-1")
+        assert store.jobs[job_id]["status"] == JOB_SUCCEEDED
+        assert store.jobs[job_id]["worker_id"] == "worker-1"
+        assert store.jobs[job_id]["attempts"] == 2
+        # The dead worker can no longer overwrite the job
+        assert not await store.update_job(job_id, "dead-worker", {"status": "x"})
+
+    async def test_unknown_kind_fails(self, store):
+        """Test that a job without a registered handler is marked failed."""
+        pool = WorkerPool()
+        job_id = await enqueue_job("unknown", {})
+
+        await pool.run_once("worker-0")
+
+        assert store.jobs[job_id]["status"] == JOB_FAILED
+
+    async def test_long_job_keeps_its_lease(self, store):
+        """Test that a job outliving its lease is renewed, not run twice."""
+        calls = []
+
+        async def handler(payload):
+            calls.append(payload)
+            await asyncio.sleep(0.2)
+            return {"success": True}
+
+        pool = WorkerPool(lease_seconds=0.06)
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {})
+
+        run = asyncio.create_task(pool.run_once("worker-0"))
+        await asyncio.sleep(0.1)
+        # Past the original lease, another worker finds nothing to take
+        assert not await pool.run_once("worker-1")
+        assert await run
+
+        assert calls == [{}]
+        assert store.renewals >= 2
+        assert store.jobs[job_id]["status"] == JOB_SUCCEEDED
+
+    async def test_lost_lease_cancels_handler(self, store):
+        """Test that a job whose lease was taken over stops running here."""
+        finished = []
+
+        async def handler(payload):
+            await asyncio.sleep(0.2)
+            finished.append(payload)
+            return {"success": True}
+
+        pool = WorkerPool(lease_seconds=0.06)
+        pool.register("claim", handler)
+        job_id = await enqueue_job("claim", {})
+
+        run = asyncio.create_task(pool.run_once("worker-0"))
+        await asyncio.sleep(0.01)
+        # The lease could not be renewed in time and another worker took the job
+        store.jobs[job_id]["worker_id"] = "worker-1"
+
+        assert await run
+        await asyncio.sleep(0.2)
+
+        assert finished == []
+        assert store.jobs[job_id]["worker_id"] == "worker-1"
+        assert store.jobs[job_id]["status"] == "running"
@@ -0,0 +1,227 @@
+import pytest
+
+from app.services.claim_service import MILESTONE_JOB
+from app.services.metrics_poller import MetricsPoller
+from app.services.solana_service import PaymentContractSnapshot
+
+# Import the module for patching
+import app.services.metrics_poller as metrics_poller
+
+pytestmark = pytest.mark.asyncio
+
+
+def post_url(tweet_id: str) -> str:
+    return f"https://x.com/influencer/status/{tweet_id}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MockTwitter:
+    """Metrics-only tweet lookup recording the ids of every call."""
+
+    def __init__(self):
+        self.likes = {}
+        self.calls = []
+
+    async def lookup(self, tweet_ids):
+        self.calls.append(list(tweet_ids))
+        return {
+            tweet_id: (
+                {"like_count": self.likes[tweet_id]} if tweet_id in self.likes else None
+            )
+            for tweet_id in tweet_ids
+        }
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Patch the contract query and the job queue, returning recorded state."""
+    env = {"contracts": [], "jobs": []}
+
+    async def mock_get_partially_claimed_contracts():
+        return [dict(contract) for contract in env["contracts"]]
+
+    async def mock_enqueue_job(kind, payload, max_attempts=None):
+        env["jobs"].append((kind, payload))
+        return f"job-{len(env['jobs'])}"
+
+    monkeypatch.setattr(
+        metrics_poller,
+        "get_partially_claimed_contracts",
+        mock_get_partially_claimed_contracts,
+    )
+    monkeypatch.setattr(metrics_poller, "enqueue_job", mock_enqueue_job)
+    return env
+
+
+def add_contract(env, address, tweet_id, paid_tranches=1, tranches_distributed=1):
+    contract = {
+        "contract_address": address,
+        "post_url": post_url(tweet_id),
+        "tranche_distribution": [100, 200, 300],
+        "tranches_distributed": tranches_distributed,
+    }
+    if paid_tranches is not None:
+        contract["paid_tranches"] = paid_tranches
+    env["contracts"].append(contract)
+
+
+class TestMetricsPoller:
+    """Tests for the background milestone poller."""
+
+    async def test_queues_crossed_milestones(self, env):
+        """Test that a job is queued once a post crosses another threshold."""
+        twitter = MockTwitter()
+        poller = MetricsPoller(60, 3600, lookup=twitter.lookup, clock=FakeClock())
+        add_contract(env, "vault-a", "1")
+        add_contract(env, "vault-b", "2")
+        twitter.likes = {"1": 250, "2": 150}
+
+        assert await poller.poll_once() == 1
+
+        assert env["jobs"] == [
+            (
+                MILESTONE_JOB,
+                {
+                    "contract_address": "vault-a",
+                    "post_url": post_url("1"),
+                    "metrics": {"like_count": 250},
+                },
+            )
+        ]
+
+    async def test_lookups_are_batched(self, env):
+        """Test that posts are looked up in calls of at most batch_size ids."""
+        twitter = MockTwitter()
+        poller = MetricsPoller(
+            60, 3600, batch_size=2, lookup=twitter.lookup, clock=FakeClock()
+        )
+        for index in range(5):
+            add_contract(env, f"vault-{index}", str(index))
+
+        await poller.poll_once()
+
+        assert [len(call) for call in twitter.calls] == [2, 2, 1]
+
+    async def test_pending_milestone_is_not_queued_twice(self, env):
+        """Test that a milestone waiting for its payout is not queued again."""
+        twitter = MockTwitter()
+        clock = FakeClock()
+        poller = MetricsPoller(60, 3600, lookup=twitter.lookup, clock=clock)
+        add_contract(env, "vault-a", "1")
+        twitter.likes = {"1": 250}
+
+        await poller.poll_once()
+        clock.now += 60
+        twitter.likes = {"1": 260}
+        await poller.poll_once()
+
+        assert len(env["jobs"]) == 1
+
+        # More likes cross the next threshold before the first job ran
+        clock.now += 60
+        twitter.likes = {"1": 300}
+        await poller.poll_once()
+
+        assert len(env["jobs"]) == 2
+
+    async def test_stalled_posts_back_off(self, env):
+        """Test that posts without new likes are polled less often."""
+        twitter = MockTwitter()
+        clock = FakeClock()
+        poller = MetricsPoller(60, 200, lookup=twitter.lookup, clock=clock)
+        add_contract(env, "vault-a", "1")
+        twitter.likes = {"1": 150}
+
+        polled_at = []
+        for _ in range(12):
+            calls = len(twitter.calls)
+            await poller.poll_once()
+            if len(twitter.calls) > calls:
+                polled_at.append(clock.now - 1000)
+            clock.now += 60
+
+        # Intervals double from 60s and are capped at 200s
+        assert polled_at == [0, 60, 180, 420, 660]
+        assert poller.stats()["backed_off"] == 1
+
+        # New likes reset the interval
+        twitter.likes = {"1": 160}
+        clock.now = 1000 + 860
+        await poller.poll_once()
+        assert poller.stats()["backed_off"] == 0
+        clock.now += 60
+        await poller.poll_once()
+
+        assert len(twitter.calls) == 7
+
+    async def test_failed_lookup_leaves_posts_due(self, env):
+        """Test that a rate limited poll retries the same posts next time."""
+        twitter = MockTwitter()
+        poller = MetricsPoller(60, 3600, lookup=twitter.lookup, clock=FakeClock())
+        add_contract(env, "vault-a", "1")
+        twitter.likes = {"1": 250}
+
+        async def rate_limited(tweet_ids):
+            raise Exception("Rate limited")
+
+        poller._lookup = rate_limited
+        assert await poller.poll_once() == 0
+
+        poller._lookup = twitter.lookup
+        assert await poller.poll_once() == 1
+
+    async def test_compares_against_all_paid_tranches(self, env):
+        """Test that tranches paid by earlier claims count, not only the last one."""
+        twitter = MockTwitter()
+        poller = MetricsPoller(60, 3600, lookup=twitter.lookup, clock=FakeClock())
+        # Two claims paid one tranche each
+        add_contract(env, "vault-a", "1", paid_tranches=2, tranches_distributed=1)
+        twitter.likes = {"1": 250}
+
+        assert await poller.poll_once() == 0
+
+    async def test_legacy_contracts_read_paid_tranches_from_chain(
+        self, env, monkeypatch
+    ):
+        """Test that contracts stored without paid_tranches are checked on-chain."""
+        twitter = MockTwitter()
+        poller = MetricsPoller(60, 3600, lookup=twitter.lookup, clock=FakeClock())
+        add_contract(env, "vault-a", "1", paid_tranches=None)
+        add_contract(env, "vault-b", "2", paid_tranches=None)
+        add_contract(env, "vault-c", "3", paid_tranches=None)
+        twitter.likes = {"1": 250, "2": 250, "3": 150}
+        loads = []
+
+        async def mock_load_payment_contracts(addresses):
+            loads.append(sorted(addresses))
+            return {
+                address: PaymentContractSnapshot(
+                    address=address,
+                    owner="owner",
+                    total_amount=300,
+                    tranche_count=3,
+                    recipients=["a", "b", "c"],
+                    paid_tranches=2 if address == "vault-a" else 1,
+                    slot=1,
+                )
+                for address in addresses
+            }
+
+        monkeypatch.setattr(
+            metrics_poller, "load_payment_contracts", mock_load_payment_contracts
+        )
+
+        assert await poller.poll_once() == 1
+
+        # vault-c has no new milestone even by its last claim alone
+        assert loads == [["vault-a", "vault-b"]]
+        assert [payload["contract_address"] for _, payload in env["jobs"]] == [
+            "vault-b"
+        ]
@@ -0,0 +1,93 @@
+import pytest
+from anchorpy.error import AccountInvalidDiscriminator
+from solders.pubkey import Pubkey
+
+from app.contract_client.accounts import PaymentContract
+from app.services.payment_contract_decoder import (
+    HEADER_SIZE,
+    decode_payment_contract,
+    decode_payment_contract_header,
+    encode_payment_contract,
+)
+
+
+def build_account(recipient_count: int = 3, paid_tranches: int = 1) -> dict:
+    return {
+        "owner": Pubkey.new_unique(),
+        "total_amount": 1_000_000,
+        "tranche_count": recipient_count,
+        "recipients": [Pubkey.new_unique() for _ in range(recipient_count)],
+        "paid_tranches": paid_tranches,
+    }
+
+
+class TestPaymentContractDecoder:
+    """Tests for the struct based PaymentContract decoder."""
+
+    def test_matches_construct_decoder(self):
+        """Test that the fast decoder agrees with PaymentContract.decode."""
+        fields = build_account()
+        data = PaymentContract.discriminator + PaymentContract.layout.build(fields)
+
+        decoded = decode_payment_contract(data)
+        reference = PaymentContract.decode(data)
+
+        assert decoded.owner == reference.owner
+        assert decoded.total_amount == reference.total_amount
+        assert decoded.tranche_count == reference.tranche_count
+        assert decoded.recipients == list(reference.recipients)
+        assert decoded.paid_tranches == reference.paid_tranches
+
+    def test_encode_round_trip(self):
+        """Test that encoding produces the on-chain layout."""
+        fields = build_account(recipient_count=5, paid_tranches=4)
+        data = encode_payment_contract(**fields)
+
+        assert data == PaymentContract.discriminator + PaymentContract.layout.build(
+            fields
+        )
+        assert decode_payment_contract(data).to_dict() == {
+            "owner": str(fields["owner"]),
+            "total_amount": fields["total_amount"],
+            "tranche_count": fields["tranche_count"],
+            "recipients": [str(recipient) for recipient in fields["recipients"]],
+            "paid_tranches": fields["paid_tranches"],
+        }
+
+    def test_single_recipient_lookup(self):
+        """Test decoding one recipient by index."""
+        fields = build_account(recipient_count=4)
+        decoded = decode_payment_contract(memoryview(encode_payment_contract(**fields)))
+
+        assert decoded.recipient_count == 4
+        assert decoded.recipient(2) == fields["recipients"][2]
+        with pytest.raises(IndexError):
+            decoded.recipient(4)
+
+    def test_invalid_discriminator(self):
+        """Test that other account types are rejected."""
+        data = b"\x00" * 8 + encode_payment_contract(**build_account())[8:]
+
+        with pytest.raises(AccountInvalidDiscriminator):
+            decode_payment_contract(data)
+
+    def test_truncated_data(self):
+        """Test that truncated account data is rejected."""
+        data = encode_payment_contract(**build_account())
+
+        with pytest.raises(ValueError):
+            decode_payment_contract(data[:20])
+        with pytest.raises(ValueError):
+            decode_payment_contract(data[:-8])
+
+    def test_decode_header_from_data_slice(self):
+        """Test decoding the fixed prefix returned by a dataSlice."""
+        fields = build_account(recipient_count=7)
+        data = encode_payment_contract(**fields)
+
+        header = decode_payment_contract_header(data[:HEADER_SIZE])
+
+        assert header.owner == fields["owner"]
+        assert header.total_amount == fields["total_amount"]
+        assert header.tranche_count == 7
+        assert header.recipient_count == 7
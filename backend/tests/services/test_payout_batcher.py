@@ -0,0 +1,168 @@
+import pytest
+import asyncio
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from app.core.config import settings
+from app.services.blockhash_service import blockhash_prefetcher
+from app.services.confirmation_service import confirmation_tracker
+from app.services.lookup_table_service import LookupTableManager
+from app.services.payment_contract_decoder import decode_payment_contract
+from app.services.payout_batcher import PayoutBatcher
+from app.services.rpc_client import close_rpc_client
+from app.services.signer_service import signer_service
+from benchmarks.fake_rpc import (
+    LOOKUP_TABLE_COOLDOWN_SLOTS,
+    FakeRpcServer,
+    FakeSolanaRpc,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+def seed_contract(chain: FakeSolanaRpc, tranches: int = 3, paid: int = 0):
+    recipients = [Pubkey.new_unique() for _ in range(tranches)]
+    return chain.add_payment_contract(
+        Keypair().pubkey(), 3_000, recipients, paid_tranches=paid
+    )
+
+
+def paid_tranches(chain: FakeSolanaRpc, address: Pubkey) -> int:
+    return decode_payment_contract(chain.accounts[address].data).paid_tranches
+
+
+class TestPayoutBatcher:
+    """Tests for packing payouts of several contracts into v0 transactions."""
+
+    @pytest.fixture
+    async def chain(self, monkeypatch):
+        chain = FakeSolanaRpc(slot_time=0.01)
+        async with FakeRpcServer(chain) as server:
+            await close_rpc_client()
+            monkeypatch.setattr(settings, "SOLANA_RPC_URL", server.url)
+            monkeypatch.setattr(signer_service, "_keypair", Keypair())
+            monkeypatch.setattr(signer_service, "_provider", None)
+            monkeypatch.setattr(confirmation_tracker, "poll_interval", 0.01)
+            blockhash_prefetcher.invalidate()
+            yield chain
+            await confirmation_tracker.stop()
+            await close_rpc_client()
+            blockhash_prefetcher.invalidate()
+
+    @pytest.fixture
+    def batcher(self):
+        return PayoutBatcher(
+            window=0.01,
+            lookup_tables=LookupTableManager(poll_interval=0.01, min_uses=1),
+        )
+
+    async def test_contracts_share_one_transaction(self, chain, batcher):
+        """Test that payouts within the window land together, mapped per contract."""
+        addresses = [seed_contract(chain) for _ in range(4)]
+
+        results = await asyncio.gather(
+            *(batcher.submit(str(address), 2) for address in addresses)
+        )
+
+        for address, contract_results in zip(addresses, results):
+            assert [result["tranche_index"] for result in contract_results] == [0, 1]
+            assert all(result["success"] for result in contract_results)
+            assert paid_tranches(chain, address) == 2
+        assert len({result["signature"] for r in results for result in r}) == 1
+        assert batcher.stats()["transactions"] == 1
+        assert batcher.stats()["contracts"] == 4
+
+    async def test_lookup_table_fits_more_than_legacy(self, chain, batcher):
+        """Test that accounts come from the lookup table, beyond legacy size limits."""
+        # 12 contracts and 36 recipients do not fit a legacy transaction's keys
+        addresses = [seed_contract(chain) for _ in range(12)]
+
+        results = await asyncio.gather(
+            *(batcher.submit(str(address), 3) for address in addresses)
+        )
+
+        assert all(result["success"] for r in results for result in r)
+        assert batcher.stats()["transactions"] == 1
+        table = batcher.lookup_tables
+        assert table.address in chain.accounts
+        assert set(addresses) <= set(table.addresses)
+        assert len(table.addresses) == 12 + 36
+
+    async def test_failed_batch_is_retried_per_contract(self, chain, batcher):
+        """Test that one failing contract does not fail the others in its batch."""
+        good = seed_contract(chain)
+        stale = seed_contract(chain, paid=1)
+        # Claims against stale state target an already paid recipient
+        stale_data = {
+            "paid_tranches": 0,
+            "tranche_count": 3,
+            "recipients": [str(Pubkey.new_unique()) for _ in range(3)],
+        }
+
+        good_results, stale_results = await asyncio.gather(
+            batcher.submit(str(good), 1), batcher.submit(str(stale), 1, stale_data)
+        )
+
+        assert good_results[0]["success"]
+        assert not stale_results[0]["success"]
+        assert paid_tranches(chain, good) == 1
+        assert paid_tranches(chain, stale) == 1
+        assert batcher.stats()["fallbacks"] == 2
+
+    async def test_new_and_recurring_contracts_share_a_transaction(self, chain):
+        """Test that first-time contracts join the batch with static account keys."""
+        batcher = PayoutBatcher(
+            window=0.01, lookup_tables=LookupTableManager(poll_interval=0.01)
+        )
+        recurring = [seed_contract(chain) for _ in range(3)]
+        await asyncio.gather(
+            *(batcher.submit(str(address), 1) for address in recurring)
+        )
+        # Seen once, nothing is worth a table slot yet
+        assert batcher.lookup_tables.address is None
+        assert batcher.stats()["transactions"] == 1
+        assert batcher.stats()["static_contracts"] == 3
+
+        new = [seed_contract(chain) for _ in range(2)]
+        results = await asyncio.gather(
+            *(batcher.submit(str(address), 1) for address in recurring + new)
+        )
+
+        assert all(result["success"] for r in results for result in r)
+        assert len({result["signature"] for r in results for result in r}) == 1
+        assert batcher.stats()["transactions"] == 2
+        assert batcher.stats()["fallbacks"] == 0
+        assert batcher.stats()["static_contracts"] == 5
+        table = set(batcher.lookup_tables.addresses)
+        assert set(recurring) <= table
+        assert not set(new) & table
+        assert all(paid_tranches(chain, address) == 2 for address in recurring)
+        assert all(paid_tranches(chain, address) == 1 for address in new)
+
+    async def test_full_table_rolls_over_and_is_closed(self, chain):
+        """Test that a full table is replaced, then closed after the cooldown."""
+        tables = LookupTableManager(poll_interval=0.01, min_uses=1, max_addresses=4)
+        batcher = PayoutBatcher(window=0.01, lookup_tables=tables)
+
+        # One contract and one recipient each
+        first = [seed_contract(chain) for _ in range(2)]
+        await asyncio.gather(*(batcher.submit(str(address), 1) for address in first))
+        full_table = tables.address
+        assert len(tables.addresses) == 4
+
+        second = [seed_contract(chain) for _ in range(2)]
+        results = await asyncio.gather(
+            *(batcher.submit(str(address), 1) for address in second)
+        )
+
+        assert all(result["success"] for r in results for result in r)
+        assert tables.address != full_table
+        assert set(second) <= set(tables.addresses)
+        assert [address for address, _ in tables.retired] == [full_table]
+
+        chain.advance(LOOKUP_TABLE_COOLDOWN_SLOTS + 1)
+        blockhash_prefetcher.invalidate()
+        await tables.ensure([])
+
+        assert tables.retired == []
+        assert full_table not in chain.accounts
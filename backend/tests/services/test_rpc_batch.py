@@ -0,0 +1,207 @@
+import pytest
+import asyncio
+import json
+import httpx
+
+from app.services.rpc_batch import CoalescingTransport, RpcBatch, RpcError
+
+pytestmark = pytest.mark.asyncio
+
+RPC_URL = "http://rpc.test"
+
+
+class MockRpcEndpoint:
+    """JSON-RPC endpoint recording every POST it receives."""
+
+    def __init__(self, reject_batches: bool = False):
+        self.reject_batches = reject_batches
+        self.posts = []
+
+    def answer(self, request: dict) -> dict:
+        if request["method"] == "getBroken":
+            return {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "error": {"code": -32601, "message": "Method not found"},
+            }
+        return {
+            "jsonrpc": "2.0",
+            "id": request["id"],
+            "result": {"method": request["method"], "params": request["params"]},
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.posts.append(body)
+        if isinstance(body, list):
+            if self.reject_batches:
+                return httpx.Response(400, json={"error": "batch not supported"})
+            # Answer out of order, like some providers do
+            return httpx.Response(200, json=[self.answer(item) for item in body[::-1]])
+        return httpx.Response(200, json=self.answer(body))
+
+
+def make_session(endpoint: MockRpcEndpoint, max_batch_size: int = 50):
+    transport = CoalescingTransport(
+        httpx.MockTransport(endpoint.handler), max_batch_size=max_batch_size
+    )
+    return httpx.AsyncClient(transport=transport), transport
+
+
+async def call(session: httpx.AsyncClient, method: str, request_id: int = 1):
+    response = await session.post(
+        RPC_URL,
+        json={"jsonrpc": "2.0", "id": request_id, "method": method, "params": [method]},
+    )
+    return response.json()
+
+
+class TestCoalescingTransport:
+    """Tests for coalescing concurrent RPC calls into batches."""
+
+    async def test_same_tick_calls_share_one_post(self):
+        """Test that concurrent reads go out as one batch with their own ids back."""
+        endpoint = MockRpcEndpoint()
+        session, transport = make_session(endpoint)
+
+        results = await asyncio.gather(
+            call(session, "getAccountInfo", 7),
+            call(session, "getMultipleAccounts", 7),
+            call(session, "getLatestBlockhash", 42),
+        )
+
+        assert len(endpoint.posts) == 1
+        assert [item["method"] for item in endpoint.posts[0]] == [
+            "getAccountInfo",
+            "getMultipleAccounts",
+            "getLatestBlockhash",
+        ]
+        assert [result["id"] for result in results] == [7, 7, 42]
+        assert [result["result"]["method"] for result in results] == [
+            "getAccountInfo",
+            "getMultipleAccounts",
+            "getLatestBlockhash",
+        ]
+        assert transport.stats() == {"batches": 1, "coalesced_requests": 3}
+        await session.aclose()
+
+    async def test_single_call_is_not_wrapped(self):
+        """Test that a lone call is sent as a plain request."""
+        endpoint = MockRpcEndpoint()
+        session, _ = make_session(endpoint)
+
+        result = await call(session, "getSlot")
+
+        assert endpoint.posts == [
+            {"jsonrpc": "2.0", "id": 1, "method": "getSlot", "params": ["getSlot"]}
+        ]
+        assert result["result"]["method"] == "getSlot"
+        await session.aclose()
+
+    async def test_writes_pass_through(self):
+        """Test that sendTransaction is never merged into a batch."""
+        endpoint = MockRpcEndpoint()
+        session, _ = make_session(endpoint)
+
+        await asyncio.gather(
+            call(session, "sendTransaction"),
+            call(session, "getSignatureStatuses"),
+            call(session, "getBlockHeight"),
+        )
+
+        assert len(endpoint.posts) == 2
+        single = [post for post in endpoint.posts if isinstance(post, dict)]
+        assert [post["method"] for post in single] == ["sendTransaction"]
+        await session.aclose()
+
+    async def test_batch_size_is_capped(self):
+        """Test that a large burst is split into batches of the maximum size."""
+        endpoint = MockRpcEndpoint()
+        session, _ = make_session(endpoint, max_batch_size=4)
+
+        await asyncio.gather(*(call(session, "getAccountInfo", i) for i in range(10)))
+
+        assert [len(post) for post in endpoint.posts] == [4, 4, 2]
+        await session.aclose()
+
+    async def test_rejected_batch_falls_back_to_single_calls(self):
+        """Test that calls are retried one by one when batches are refused."""
+        endpoint = MockRpcEndpoint(reject_batches=True)
+        session, transport = make_session(endpoint)
+
+        results = await asyncio.gather(
+            call(session, "getAccountInfo", 1), call(session, "getLatestBlockhash", 2)
+        )
+
+        assert len(endpoint.posts) == 3
+        assert [result["id"] for result in results] == [1, 2]
+        assert transport.batches == 0
+        await session.aclose()
+
+
+class TestRpcBatch:
+    """Tests for the explicit batch builder."""
+
+    @pytest.fixture
+    def endpoint(self, monkeypatch):
+        endpoint = MockRpcEndpoint()
+        session = httpx.AsyncClient(transport=httpx.MockTransport(endpoint.handler))
+
+        async def mock_rpc_post(payload):
+            return await session.post(RPC_URL, json=payload)
+
+        # Import the module for patching
+        import app.services.rpc_client
+
+        monkeypatch.setattr(app.services.rpc_client, "rpc_post", mock_rpc_post)
+        return endpoint
+
+    async def test_execute_returns_results_in_order(self, endpoint):
+        """Test that results come back in the order requests were added."""
+        batch = RpcBatch()
+        assert batch.add("getAccountInfo", ["a"]) == 0
+        assert batch.add("getLatestBlockhash") == 1
+
+        results = await batch.execute()
+
+        assert len(endpoint.posts) == 1
+        assert results == [
+            {"method": "getAccountInfo", "params": ["a"]},
+            {"method": "getLatestBlockhash", "params": []},
+        ]
+
+    async def test_parser_builds_response_objects(self, endpoint):
+        """Test that a parser class receives the full JSON-RPC response."""
+
+        class Parsed:
+            @classmethod
+            def from_json(cls, raw):
+                parsed = cls()
+                parsed.raw = json.loads(raw)
+                return parsed
+
+        batch = RpcBatch()
+        batch.add("getSlot", parser=Parsed)
+
+        (result,) = await batch.execute()
+
+        assert result.raw["result"]["method"] == "getSlot"
+
+    async def test_errors_raise_or_are_returned(self, endpoint):
+        """Test that per-request errors raise unless return_exceptions is set."""
+        batch = RpcBatch()
+        batch.add("getSlot")
+        batch.add("getBroken")
+
+        with pytest.raises(RpcError, match="Method not found"):
+            await batch.execute()
+
+        results = await batch.execute(return_exceptions=True)
+        assert results[0]["method"] == "getSlot"
+        assert isinstance(results[1], RpcError)
+        assert results[1].code == -32601
+
+    async def test_empty_batch_sends_nothing(self, endpoint):
+        """Test that executing an empty batch makes no request."""
+        assert await RpcBatch().execute() == []
+        assert endpoint.posts == []
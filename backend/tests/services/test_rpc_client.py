@@ -0,0 +1,103 @@
+import pytest
+import httpx
+
+from app.core.config import settings
+from app.services.rpc_client import (
+    close_rpc_client,
+    get_rpc_client,
+    rpc_post,
+    rpc_stats,
+    start_rpc_client,
+)
+
+# Import the module for patching
+import app.services.rpc_client as rpc_client
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestRpcClient:
+    """Tests for the shared Solana RPC client."""
+
+    async def test_client_is_shared(self):
+        """Test that every caller gets the same pooled client."""
+        client = await start_rpc_client()
+
+        assert get_rpc_client() is client
+        assert client._provider.session is rpc_client._session
+        assert client._provider.endpoint_uri == settings.SOLANA_RPC_URL
+
+        await close_rpc_client()
+
+    async def test_close_resets_client(self):
+        """Test that closing the client lets the next caller create a new one."""
+        client = await start_rpc_client()
+        await close_rpc_client()
+
+        assert rpc_client._client is None
+        assert client._provider.session.is_closed
+
+        new_client = get_rpc_client()
+        assert new_client is not client
+
+        await close_rpc_client()
+
+    async def test_close_resets_router_and_coalescer(self, monkeypatch):
+        """Test that a reopened client does not report or batch over closed transports."""
+        monkeypatch.setattr(settings, "RPC_BATCH_MAX_SIZE", 50)
+        await start_rpc_client()
+        router, coalescer = rpc_client._router, rpc_client._coalescer
+        assert rpc_stats()["batching"] == coalescer.stats()
+
+        await close_rpc_client()
+
+        assert rpc_client._router is None
+        assert rpc_client._coalescer is None
+        assert rpc_stats() == {}
+        assert not coalescer._tasks and not router._background
+
+        await start_rpc_client()
+        assert rpc_client._router is not router
+        assert rpc_client._coalescer is not coalescer
+        await close_rpc_client()
+
+    async def test_no_session_is_leaked(self, monkeypatch):
+        """Test that the client opens only the pooled session and closes it."""
+        sessions = []
+        original_init = httpx.AsyncClient.__init__
+
+        def tracking_init(self, *args, **kwargs):
+            sessions.append(self)
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(httpx.AsyncClient, "__init__", tracking_init)
+
+        client = await start_rpc_client()
+        assert sessions == [client._provider.session]
+
+        await close_rpc_client()
+        assert all(session.is_closed for session in sessions)
+
+    async def test_rpc_post_uses_shared_session(self, monkeypatch):
+        """Test that raw JSON-RPC calls go through the pooled session."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "result": 1})
+
+        monkeypatch.setattr(
+            rpc_client,
+            "_build_session",
+            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+
+        await start_rpc_client()
+        first = await rpc_post({"jsonrpc": "2.0", "id": 1, "method": "getSlot"})
+        second = await rpc_post({"jsonrpc": "2.0", "id": 2, "method": "getSlot"})
+        await close_rpc_client()
+
+        assert first.json()["result"] == 1
+        assert second.status_code == 200
+        assert len(requests) == 2
+        assert str(requests[0].url).rstrip("/") == settings.SOLANA_RPC_URL
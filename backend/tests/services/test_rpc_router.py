@@ -0,0 +1,193 @@
+import pytest
+import asyncio
+import json
+import httpx
+
+from app.services.rpc_router import RpcEndpoint, RpcRouter
+
+pytestmark = pytest.mark.asyncio
+
+
+class StandInRpcServer:
+    """Local HTTP server standing in for a JSON-RPC endpoint."""
+
+    def __init__(
+        self, name: str, delay: float = 0.0, status: int = 200, error: dict = None
+    ):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.error = error
+        self.requests = []
+        self.server = None
+        self.url = None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(": ", 1)
+                    for line in head.decode().split("\r\n")[1:]
+                    if ": " in line
+                )
+                length = int(
+                    headers.get("content-length", headers.get("Content-Length", 0))
+                )
+                body = json.loads(await reader.readexactly(length))
+                self.requests.append(body)
+
+                await asyncio.sleep(self.delay)
+                answer = {"error": self.error} if self.error else {"result": self.name}
+                payload = json.dumps(
+                    {"jsonrpc": "2.0", "id": body.get("id"), **answer}
+                ).encode()
+                writer.write(
+                    f"HTTP/1.1 {self.status} X\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+
+
+async def call(client: httpx.AsyncClient, url: str, method: str = "getSlot"):
+    response = await client.post(
+        url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": []}
+    )
+    return response
+
+
+def warm_up(endpoint: RpcEndpoint, latency: float, count: int = 50):
+    for _ in range(count):
+        endpoint.record(latency, ok=True)
+
+
+class TestRpcRouter:
+    """Tests for the multi-endpoint RPC router."""
+
+    async def test_endpoint_health_scoring(self):
+        """Test that errors and latency both lower an endpoint's rank."""
+        fast = RpcEndpoint("fast")
+        slow = RpcEndpoint("slow")
+        flaky = RpcEndpoint("flaky")
+        warm_up(fast, 0.01)
+        warm_up(slow, 0.1)
+        warm_up(flaky, 0.01)
+        for _ in range(10):
+            flaky.record(0.01, ok=False)
+
+        router = RpcRouter(["fast", "slow", "flaky"])
+        router.endpoints = [slow, flaky, fast]
+
+        assert [endpoint.url for endpoint in router.ranked()][0] == "fast"
+        assert flaky.score > fast.score
+        assert fast.latency_percentile(95) == pytest.approx(0.01)
+
+    async def test_hedges_slow_read(self):
+        """Test that a read slower than the p95 is hedged to the next endpoint."""
+        async with StandInRpcServer("slow", delay=1.0) as slow, StandInRpcServer(
+            "fast"
+        ) as fast:
+            router = RpcRouter([slow.url, fast.url], hedge_min_delay=0.05)
+            # The slow endpoint used to answer in 10ms, so it ranks first
+            warm_up(router.endpoints[0], 0.01)
+            warm_up(router.endpoints[1], 0.02)
+
+            async with httpx.AsyncClient(transport=router) as client:
+                started = asyncio.get_running_loop().time()
+                response = await call(client, slow.url)
+                elapsed = asyncio.get_running_loop().time() - started
+
+        assert response.json()["result"] == "fast"
+        assert router.hedges == 1
+        assert elapsed < 0.5
+        assert len(slow.requests) == 1
+
+    async def test_fails_over_on_server_error(self):
+        """Test that a 503 from one endpoint is retried on the next."""
+        async with StandInRpcServer("down", status=503) as down, StandInRpcServer(
+            "up"
+        ) as up:
+            router = RpcRouter([down.url, up.url])
+            async with httpx.AsyncClient(transport=router) as client:
+                response = await call(client, down.url)
+
+        assert response.status_code == 200
+        assert response.json()["result"] == "up"
+        assert router.failovers == 1
+        assert router.endpoints[0].error_rate > 0
+        # The failing endpoint now ranks last
+        assert router.ranked()[0].url == up.url
+
+    async def test_returns_last_error_when_all_fail(self):
+        """Test that the caller sees the rate limit when every endpoint fails."""
+        async with StandInRpcServer("a", status=429) as a, StandInRpcServer(
+            "b", status=429
+        ) as b:
+            router = RpcRouter([a.url, b.url])
+            async with httpx.AsyncClient(transport=router) as client:
+                response = await call(client, a.url)
+
+        assert response.status_code == 429
+
+    async def test_writes_fan_out(self):
+        """Test that sendTransaction goes to several endpoints."""
+        async with StandInRpcServer("a") as a, StandInRpcServer(
+            "b", delay=0.05
+        ) as b, StandInRpcServer("c") as c:
+            router = RpcRouter([a.url, b.url, c.url], write_fanout=2)
+            warm_up(router.endpoints[2], 1.0)
+
+            async with httpx.AsyncClient(transport=router) as client:
+                response = await call(client, a.url, method="sendTransaction")
+                # Let the slower copy finish delivering
+                await asyncio.sleep(0.1)
+
+        assert response.json()["result"] == "a"
+        assert len(a.requests) == 1
+        assert len(b.requests) == 1
+        assert len(c.requests) == 0
+
+    async def test_write_waits_for_an_accepting_endpoint(self):
+        """Test that a fast rejection does not beat a slower accepted write."""
+        rejected = {"code": -32002, "message": "Blockhash not found"}
+        async with StandInRpcServer("a", error=rejected) as a, StandInRpcServer(
+            "b", status=429
+        ) as b, StandInRpcServer("c", delay=0.05) as c:
+            router = RpcRouter([a.url, b.url, c.url], write_fanout=3)
+
+            async with httpx.AsyncClient(transport=router) as client:
+                response = await call(client, a.url, method="sendTransaction")
+
+        assert response.json()["result"] == "c"
+        # The JSON-RPC error counts against the endpoint like the rate limit
+        assert router.endpoints[0].failures == 1
+        assert router.endpoints[1].failures == 1
+        assert router.endpoints[2].failures == 0
+
+    async def test_write_returns_last_rejection_when_all_fail(self):
+        """Test that the caller sees the JSON-RPC error when no endpoint accepts."""
+        rejected = {"code": -32002, "message": "Blockhash not found"}
+        async with StandInRpcServer("a", error=rejected) as a, StandInRpcServer(
+            "b", error=rejected, delay=0.02
+        ) as b:
+            router = RpcRouter([a.url, b.url], write_fanout=2)
+
+            async with httpx.AsyncClient(transport=router) as client:
+                response = await call(client, a.url, method="sendTransaction")
+
+        assert response.status_code == 200
+        assert response.json()["error"] == rejected
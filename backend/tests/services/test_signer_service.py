@@ -0,0 +1,56 @@
+import pytest
+import base58
+from solders.keypair import Keypair
+
+from app.services.signer_service import SignerService, parse_keypair
+
+# Import the module for patching
+import app.services.signer_service as signer_module
+
+
+class TestSignerService:
+    """Tests for the payout signer service."""
+
+    def test_parse_keypair_json_array(self):
+        """Test parsing a JSON byte array secret."""
+        keypair = Keypair()
+        parsed = parse_keypair(str(list(bytes(keypair))))
+        assert parsed.pubkey() == keypair.pubkey()
+
+    def test_parse_keypair_base58(self):
+        """Test parsing a base58 secret."""
+        keypair = Keypair()
+        parsed = parse_keypair(base58.b58encode(bytes(keypair)).decode())
+        assert parsed.pubkey() == keypair.pubkey()
+
+    @pytest.mark.parametrize("secret", ["", "[1, 2, 3]", "not-a-key"])
+    def test_parse_keypair_invalid(self, secret):
+        """Test that missing or malformed secrets are rejected."""
+        with pytest.raises(ValueError):
+            parse_keypair(secret)
+
+    def test_load_fails_fast_without_secret(self, monkeypatch):
+        """Test that loading without WALLET_SECRET raises."""
+        monkeypatch.delenv("WALLET_SECRET", raising=False)
+        with pytest.raises(ValueError):
+            SignerService().load()
+
+    def test_secret_parsed_once(self, monkeypatch):
+        """Test that the keypair and provider are built once and reused."""
+        keypair = Keypair()
+        monkeypatch.setenv("WALLET_SECRET", str(list(bytes(keypair))))
+
+        class MockClient:
+            pass
+
+        client = MockClient()
+        monkeypatch.setattr(signer_module, "get_rpc_client", lambda: client)
+
+        signer = SignerService()
+        signer.load()
+        monkeypatch.delenv("WALLET_SECRET")
+
+        assert signer.pubkey == keypair.pubkey()
+        assert signer.provider is signer.provider
+        assert signer.provider.connection is client
+        assert signer.provider.wallet.public_key == keypair.pubkey()
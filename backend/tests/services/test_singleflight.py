@@ -0,0 +1,262 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services.singleflight import (
+    KeyedLock,
+    KeyedSingleflight,
+    LeasedLock,
+    LeaseLostError,
+    LeaseTimeoutError,
+)
+
+# Import the module for patching
+import app.services.singleflight as singleflight
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockLeaseStore:
+    """In-memory stand-in for the leases collection functions."""
+
+    def __init__(self):
+        self.leases = {}
+
+    async def acquire_lease(self, key, holder, ttl_seconds):
+        now = datetime.utcnow()
+        lease = self.leases.get(key)
+        if lease and lease["holder"] is not None and lease["expires_at"] >= now:
+            return False
+        self.leases[key] = dict(
+            lease or {},
+            holder=holder,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+        )
+        return True
+
+    async def renew_lease(self, key, holder, ttl_seconds):
+        lease = self.leases.get(key)
+        if not lease or lease["holder"] != holder:
+            return False
+        lease["expires_at"] = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        return True
+
+    async def release_lease(self, key, holder):
+        lease = self.leases.get(key)
+        if not lease or lease["holder"] != holder:
+            return False
+        lease.update(holder=None, released_at=datetime.utcnow())
+        return True
+
+
+@pytest.fixture
+def lease_store(monkeypatch):
+    store = MockLeaseStore()
+    for name in ("acquire_lease", "renew_lease", "release_lease"):
+        monkeypatch.setattr(singleflight, name, getattr(store, name))
+    return store
+
+
+class TestKeyedSingleflight:
+    """Tests for in-process keyed singleflight."""
+
+    async def test_duplicates_share_one_execution(self):
+        """Test that concurrent calls for one key run once and share the result."""
+        flights = KeyedSingleflight()
+        calls = []
+
+        async def work():
+            calls.append(True)
+            await asyncio.sleep(0.01)
+            return {"paid": 2}
+
+        results = await asyncio.gather(
+            *(flights.do("contract", work) for _ in range(5))
+        )
+
+        assert len(calls) == 1
+        assert results == [{"paid": 2}] * 5
+        assert flights.shared == 4
+
+    async def test_different_keys_run_in_parallel(self):
+        """Test that calls for different keys overlap."""
+        flights = KeyedSingleflight()
+        running = []
+        peak = []
+
+        async def work():
+            running.append(True)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        await asyncio.gather(*(flights.do(f"contract-{i}", work) for i in range(3)))
+
+        assert max(peak) == 3
+
+    async def test_exception_is_shared_and_key_released(self):
+        """Test that waiters see the failure and a later call runs again."""
+        flights = KeyedSingleflight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("send failed")
+
+        results = await asyncio.gather(
+            flights.do("contract", fail),
+            flights.do("contract", fail),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.executions == 1
+
+        async def work():
+            return "ok"
+
+        assert await flights.do("contract", work) == "ok"
+        assert flights.executions == 2
+
+    async def test_execution_is_cancelled_with_its_last_caller(self):
+        """Test that cancelling one caller keeps the work, cancelling all stops it."""
+        flights = KeyedSingleflight()
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(True)
+
+        first = asyncio.create_task(flights.do("contract", work))
+        second = asyncio.create_task(flights.do("contract", work))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0.06)
+
+        assert finished == []
+
+        third = asyncio.create_task(flights.do("contract", work))
+        fourth = asyncio.create_task(flights.do("contract", work))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        await fourth
+
+        assert finished == [True]
+
+
+class TestKeyedLock:
+    """Tests for the in-process keyed lock."""
+
+    async def test_same_key_takes_turns_and_runs_every_holder(self):
+        """Test that holders of one key never overlap but all run their own work."""
+        locks = KeyedLock()
+        running = []
+        results = []
+
+        async def work(name):
+            async with locks.hold("contract"):
+                running.append(name)
+                assert len(running) == 1
+                await asyncio.sleep(0.01)
+                running.pop()
+                results.append(name)
+                return name
+
+        assert await asyncio.gather(work("a"), work("b")) == ["a", "b"]
+        assert results == ["a", "b"]
+        assert locks._locks == {}
+
+    async def test_different_keys_run_in_parallel(self):
+        """Test that holders of different keys overlap."""
+        locks = KeyedLock()
+        running = []
+        peak = []
+
+        async def work(key):
+            async with locks.hold(key):
+                running.append(True)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        await asyncio.gather(*(work(f"contract-{i}") for i in range(3)))
+
+        assert max(peak) == 3
+
+
+class TestLeasedLock:
+    """Tests for the Mongo lease backed lock."""
+
+    async def test_other_process_waits_and_runs_its_own_work(self, lease_store):
+        """Test that a second process waits for the lease, then runs its own work."""
+        first = LeasedLock("claim", poll_interval=0.01)
+        second = LeasedLock("claim", poll_interval=0.01)
+        order = []
+
+        async def work(locks, name):
+            async with locks.hold("contract"):
+                order.append(f"{name}-start")
+                await asyncio.sleep(0.03)
+                order.append(f"{name}-end")
+                return name
+
+        async def join_later():
+            await asyncio.sleep(0.01)
+            return await work(second, "second")
+
+        results = await asyncio.gather(work(first, "first"), join_later())
+
+        assert results == ["first", "second"]
+        assert order == ["first-start", "first-end", "second-start", "second-end"]
+        assert lease_store.leases["claim:contract"]["holder"] is None
+
+    async def test_releases_lease_on_failure(self, lease_store):
+        """Test that a failing holder releases the lease for the next one."""
+        first = LeasedLock("claim", poll_interval=0.01)
+        second = LeasedLock("claim", poll_interval=0.01)
+
+        with pytest.raises(ValueError):
+            async with first.hold("contract"):
+                raise ValueError("send failed")
+
+        async with second.hold("contract"):
+            assert lease_store.leases["claim:contract"]["holder"] == second.holder
+
+    async def test_times_out_on_held_lease(self, lease_store):
+        """Test that waiting on a lease that is never released times out."""
+        await lease_store.acquire_lease("claim:contract", "other", 60)
+        locks = LeasedLock("claim", wait_timeout=0.05, poll_interval=0.01)
+
+        with pytest.raises(LeaseTimeoutError):
+            async with locks.hold("contract"):
+                pass
+
+    async def test_takes_over_expired_lease(self, lease_store):
+        """Test that a lease left by a dead process is taken over."""
+        await lease_store.acquire_lease("claim:contract", "dead", -1)
+        locks = LeasedLock("claim", poll_interval=0.01)
+
+        async with locks.hold("contract"):
+            assert lease_store.leases["claim:contract"]["holder"] == locks.holder
+
+    async def test_lost_lease_stops_the_holder(self, lease_store):
+        """Test that work under a lease that could not be renewed does not go on."""
+        locks = LeasedLock("claim", ttl_seconds=0.03, poll_interval=0.01)
+        steps = []
+
+        async def work():
+            async with locks.hold("contract"):
+                steps.append("started")
+                # Another process took the key over
+                lease_store.leases["claim:contract"]["holder"] = "other"
+                await asyncio.sleep(0.1)
+                steps.append("paid")
+
+        with pytest.raises(LeaseLostError):
+            await work()
+
+        assert steps == ["started"]
+        assert lease_store.leases["claim:contract"]["holder"] == "other"
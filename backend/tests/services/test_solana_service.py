@@ -0,0 +1,166 @@
+import pytest
+from solders.pubkey import Pubkey
+
+from app.contract_client.accounts import PaymentContract
+from app.services.solana_service import (
+    PROGRAM_ID,
+    load_payment_contract,
+    load_payment_contracts,
+    validate_contract_address,
+)
+
+# Import the module for patching
+import app.services.solana_service as solana_service
+from app.services.contract_cache import contract_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def clear_contract_cache():
+    """
+    Start every test with an empty contract cache.
+    """
+    contract_cache.clear()
+    yield
+    contract_cache.clear()
+
+
+def encode_contract(owner: Pubkey, recipients, paid_tranches: int) -> bytes:
+    return PaymentContract.discriminator + PaymentContract.layout.build(
+        {
+            "owner": owner,
+            "total_amount": 1000,
+            "tranche_count": len(recipients),
+            "recipients": recipients,
+            "paid_tranches": paid_tranches,
+        }
+    )
+
+
+class MockAccount:
+    def __init__(self, owner: Pubkey, data: bytes):
+        self.owner = owner
+        self.data = data
+
+
+class MockContext:
+    slot = 1234
+
+
+class MockResponse:
+    def __init__(self, value):
+        self.value = value
+        self.context = MockContext()
+
+
+class MockClient:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def get_account_info(self, pubkey):
+        self.calls += 1
+        return MockResponse(self.value)
+
+
+class TestSolanaService:
+    """Tests for loading payment contract state."""
+
+    async def test_load_payment_contract_success(self, monkeypatch):
+        """Test loading and decoding a contract with one RPC call."""
+        owner = Pubkey.new_unique()
+        recipients = [Pubkey.new_unique() for _ in range(3)]
+        client = MockClient(
+            MockAccount(PROGRAM_ID, encode_contract(owner, recipients, 1))
+        )
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: client)
+
+        address = str(Pubkey.new_unique())
+        snapshot = await load_payment_contract(address)
+
+        assert client.calls == 1
+        assert snapshot.address == address
+        assert snapshot.owner == str(owner)
+        assert snapshot.total_amount == 1000
+        assert snapshot.tranche_count == 3
+        assert snapshot.recipients == [str(recipient) for recipient in recipients]
+        assert snapshot.paid_tranches == 1
+        assert snapshot.slot == 1234
+
+    async def test_load_payment_contract_not_found(self, monkeypatch):
+        """Test that a missing account returns None."""
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: MockClient(None))
+
+        assert await load_payment_contract(str(Pubkey.new_unique())) is None
+
+    async def test_load_payment_contract_wrong_owner(self, monkeypatch):
+        """Test that accounts owned by another program are rejected."""
+        data = encode_contract(Pubkey.new_unique(), [Pubkey.new_unique()], 0)
+        client = MockClient(MockAccount(Pubkey.new_unique(), data))
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: client)
+
+        assert await load_payment_contract(str(Pubkey.new_unique())) is None
+
+    async def test_validate_contract_address_single_read(self, monkeypatch):
+        """Test that validating with tranches reads the account only once."""
+        data = encode_contract(Pubkey.new_unique(), [Pubkey.new_unique()], 0)
+        client = MockClient(MockAccount(PROGRAM_ID, data))
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: client)
+
+        result = await validate_contract_address(
+            str(Pubkey.new_unique()), get_tranches=True
+        )
+
+        assert client.calls == 1
+        assert result["paid_tranches"] == 0
+        assert result["tranche_count"] == 1
+
+    async def test_load_payment_contracts_chunks_requests(self, monkeypatch):
+        """Test that bulk loads use one getMultipleAccounts call per 100 addresses."""
+        data = encode_contract(Pubkey.new_unique(), [Pubkey.new_unique()], 0)
+        calls = []
+
+        class MockMultipleClient:
+            async def get_multiple_accounts(self, pubkeys):
+                calls.append(len(pubkeys))
+                # Every third account is missing
+                return MockResponse(
+                    [
+                        None if i % 3 == 0 else MockAccount(PROGRAM_ID, data)
+                        for i in range(len(pubkeys))
+                    ]
+                )
+
+        monkeypatch.setattr(
+            solana_service, "get_rpc_client", lambda: MockMultipleClient()
+        )
+
+        addresses = [str(Pubkey.new_unique()) for _ in range(250)]
+        snapshots = await load_payment_contracts(addresses + ["not-a-pubkey"])
+
+        assert sorted(calls) == [50, 100, 100]
+        assert len(snapshots) == 251
+        assert snapshots["not-a-pubkey"] is None
+        assert snapshots[addresses[0]] is None
+        assert snapshots[addresses[1]].slot == 1234
+        assert snapshots[addresses[1]].tranche_count == 1
+
+    async def test_load_payment_contract_uses_cache(self, monkeypatch):
+        """Test that repeated loads are served from the cache until invalidated."""
+        data = encode_contract(Pubkey.new_unique(), [Pubkey.new_unique()], 0)
+        client = MockClient(MockAccount(PROGRAM_ID, data))
+        monkeypatch.setattr(solana_service, "get_rpc_client", lambda: client)
+
+        address = str(Pubkey.new_unique())
+        first = await load_payment_contract(address)
+        second = await load_payment_contract(address)
+        assert client.calls == 1
+        assert second is first
+
+        await load_payment_contract(address, fresh=True)
+        assert client.calls == 2
+
+        contract_cache.invalidate(address)
+        await load_payment_contract(address)
+        assert client.calls == 3
@@ -0,0 +1,69 @@
+import pytest
+import asyncio
+
+from app.services.tweet_batcher import TweetLookupBatcher
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockLookup:
+    """Batch lookup recording the ids of every call."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, tweet_ids):
+        self.calls.append(tweet_ids)
+        if self.fail:
+            raise Exception("Twitter unavailable")
+        return {tweet_id: {"id": tweet_id} for tweet_id in tweet_ids if tweet_id != "0"}
+
+
+class TestTweetLookupBatcher:
+    """Tests for coalescing tweet lookups into get_tweets calls."""
+
+    async def test_results_fan_out_per_id(self):
+        """Test that every caller gets its own result, None for errored ids."""
+        lookup = MockLookup()
+        batcher = TweetLookupBatcher(lookup, window=0.001)
+
+        results = await asyncio.gather(
+            batcher.lookup("1"), batcher.lookup("0"), batcher.lookup("2")
+        )
+
+        assert lookup.calls == [["1", "0", "2"]]
+        assert results == [{"id": "1"}, None, {"id": "2"}]
+
+    async def test_batches_are_capped_at_the_maximum(self):
+        """Test that a burst is split into calls of at most max_batch_size ids."""
+        lookup = MockLookup()
+        batcher = TweetLookupBatcher(lookup, window=0.001, max_batch_size=100)
+
+        await asyncio.gather(*(batcher.lookup(str(index)) for index in range(1, 251)))
+
+        assert [len(call) for call in lookup.calls] == [100, 100, 50]
+        assert batcher.stats()["ids_per_call"] == 250 / 3
+
+    async def test_call_failure_reaches_every_caller(self):
+        """Test that an exception from the call is raised to all its callers."""
+        batcher = TweetLookupBatcher(MockLookup(fail=True), window=0.001)
+
+        results = await asyncio.gather(
+            batcher.lookup("1"), batcher.lookup("2"), return_exceptions=True
+        )
+
+        assert all(str(result) == "Twitter unavailable" for result in results)
+
+    async def test_cancelled_caller_does_not_cancel_shared_lookup(self):
+        """Test that one caller giving up leaves the others sharing its id waiting."""
+        lookup = MockLookup()
+        batcher = TweetLookupBatcher(lookup, window=0.01)
+
+        first = asyncio.ensure_future(batcher.lookup("1"))
+        second = asyncio.ensure_future(batcher.lookup("1"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == {"id": "1"}
+        assert lookup.calls == [["1"]]
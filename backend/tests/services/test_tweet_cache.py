@@ -0,0 +1,82 @@
+from app.services.tweet_cache import TweetCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def post_info(tweet_id: str = "1", likes: int = 10) -> dict:
+    return {
+        "tweet_id": tweet_id,
+        "author_id": "42",
+        "author_handle": "influencer",
+        "text": "The vault",
+        "created_at": None,
+        "public_metrics": {"like_count": likes},
+    }
+
+
+class TestTweetCache:
+    """Tests for the two-tier tweet lookup cache."""
+
+    def test_miss_then_hit(self):
+        """Test that a stored lookup is served from both tiers."""
+        cache = TweetCache(max_entries=10, content_ttl=3600, metrics_ttl=60)
+
+        assert cache.get("1") == (None, None)
+        cache.put(post_info())
+        content, metrics = cache.get("1")
+
+        assert content["author_handle"] == "influencer"
+        assert "public_metrics" not in content
+        assert metrics == {"like_count": 10}
+        stats = cache.stats()
+        assert stats["content_hits"] == 1
+        assert stats["content_misses"] == 1
+        assert stats["metrics_hit_rate"] == 0.5
+
+    def test_metrics_expire_before_content(self):
+        """Test that stale metrics leave the author and text cached."""
+        clock = FakeClock()
+        cache = TweetCache(
+            max_entries=10, content_ttl=3600, metrics_ttl=60, clock=clock
+        )
+        cache.put(post_info())
+
+        clock.now = 61
+        content, metrics = cache.get("1")
+        assert content["text"] == "The vault"
+        assert metrics is None
+
+        cache.put_metrics("1", {"like_count": 20})
+        assert cache.get("1")[1] == {"like_count": 20}
+
+        clock.now = 3700
+        assert cache.get("1") == (None, None)
+
+    def test_refresh_metrics_skips_cached_metrics(self):
+        """Test that a forced refresh reports the metrics as missing."""
+        cache = TweetCache(max_entries=10, content_ttl=3600, metrics_ttl=60)
+        cache.put(post_info())
+
+        content, metrics = cache.get("1", refresh_metrics=True)
+
+        assert content is not None
+        assert metrics is None
+        assert cache.stats()["metrics_misses"] == 1
+
+    def test_lru_eviction(self):
+        """Test that the least recently used tweet is evicted first."""
+        cache = TweetCache(max_entries=2, content_ttl=3600, metrics_ttl=60)
+        cache.put(post_info("1"))
+        cache.put(post_info("2"))
+        cache.get("1")
+        cache.put(post_info("3"))
+
+        assert cache.get("2") == (None, None)
+        assert cache.get("1")[0] is not None
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,131 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+
+from app.services.twitter_rate_limiter import (
+    RateLimited,
+    TokenBucket,
+    TwitterRateLimiter,
+    endpoint_key,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class MockClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def rate_limit_headers(limit: int, remaining: int, reset: float) -> dict:
+    return {
+        "x-rate-limit-limit": str(limit),
+        "x-rate-limit-remaining": str(remaining),
+        "x-rate-limit-reset": str(int(reset)),
+    }
+
+
+class TestTokenBucket:
+    """Tests for the header-driven per-endpoint budget."""
+
+    async def test_whole_budget_is_usable_at_once(self):
+        """Test that callers never wait while the window has quota left."""
+        bucket = TokenBucket("/2/tweets/:id", default_limit=3, clock=MockClock())
+
+        for _ in range(3):
+            await asyncio.wait_for(bucket.acquire(), 0.1)
+
+        assert bucket.remaining == 0
+        assert bucket.estimate_wait() == pytest.approx(900)
+
+    async def test_headers_set_budget_and_reset(self):
+        """Test that response headers replace the assumed limit."""
+        clock = MockClock()
+        bucket = TokenBucket("/2/tweets/:id", default_limit=300, clock=clock)
+        await bucket.acquire()
+
+        bucket.update(rate_limit_headers(15, 0, clock.now + 120))
+
+        assert bucket.limit == 15
+        assert bucket.remaining == 0
+        assert bucket.estimate_wait() == pytest.approx(120)
+        # The second caller in the queue waits for the window after that one
+        assert bucket.estimate_wait(15) == pytest.approx(120 + 900)
+
+        clock.now += 120
+        assert bucket.estimate_wait() == 0
+
+    async def test_same_window_headers_keep_in_flight_calls(self):
+        """Test that a stale remaining count does not hand out spent tokens."""
+        clock = MockClock()
+        bucket = TokenBucket("/2/tweets/:id", default_limit=10, clock=clock)
+        bucket.update(rate_limit_headers(10, 5, clock.now + 600))
+        for _ in range(3):
+            await bucket.acquire()
+
+        # Response of the first of those calls, produced before the other two
+        bucket.update(rate_limit_headers(10, 4, clock.now + 600))
+
+        assert bucket.remaining == 2
+
+    async def test_waiters_are_served_in_order(self):
+        """Test that queued callers start first come, first served."""
+        bucket = TokenBucket("/2/tweets/:id", default_limit=1, window=0.05)
+        await bucket.acquire()
+        order = []
+
+        async def caller(name):
+            await bucket.acquire()
+            order.append(name)
+
+        await asyncio.wait_for(asyncio.gather(caller("a"), caller("b"), caller("c")), 1)
+
+        assert order == ["a", "b", "c"]
+
+    async def test_deadline_fails_fast(self):
+        """Test that a wait past the deadline raises with the wait as a hint."""
+        clock = MockClock()
+        bucket = TokenBucket("/2/tweets/:id", default_limit=1, clock=clock)
+        bucket.update(rate_limit_headers(1, 0, clock.now + 300))
+
+        with pytest.raises(RateLimited) as error:
+            await bucket.acquire(deadline=clock.now + 30)
+
+        assert error.value.retry_after == pytest.approx(300)
+        assert bucket.stats()["queued"] == 0
+
+
+class TestTwitterRateLimiter:
+    """Tests for routing responses to endpoint buckets."""
+
+    async def test_endpoint_key(self):
+        """Test that ids and usernames collapse into the endpoint template."""
+        assert endpoint_key("/2/tweets/1234") == "/2/tweets/:id"
+        assert endpoint_key("/2/tweets") == "/2/tweets"
+        assert endpoint_key("/2/users/42") == "/2/users/:id"
+        assert (
+            endpoint_key("/2/users/by/username/jack")
+            == "/2/users/by/username/:username"
+        )
+
+    async def test_hook_updates_bucket_of_endpoint(self):
+        """Test that the response hook feeds the headers to the right bucket."""
+        clock = MockClock()
+        limiter = TwitterRateLimiter(clock=clock)
+        response = SimpleNamespace(
+            status_code=429,
+            headers=rate_limit_headers(300, 0, clock.now + 60),
+            request=SimpleNamespace(path_url="/2/tweets/1234?expansions=author_id"),
+        )
+
+        assert limiter.hook(response) is response
+
+        with pytest.raises(RateLimited):
+            await limiter.acquire("/2/tweets/:id", timeout=10)
+        await asyncio.wait_for(limiter.acquire("/2/tweets", timeout=10), 0.1)
+        assert limiter.stats()["/2/tweets/:id"]["remaining"] == 0
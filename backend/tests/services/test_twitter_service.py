@@ -0,0 +1,339 @@
+import pytest
+import asyncio
+import time
+import requests
+import tweepy
+
+from app.services.tweet_cache import TweetCache
+from app.services.twitter_rate_limiter import RateLimited, TwitterRateLimiter
+from app.services.twitter_service import TwitterService, TwitterUnavailable
+from app.services.twitter_user_cache import TwitterUserCache
+
+pytestmark = pytest.mark.asyncio
+
+MISSING_TWEET_ID = "404"
+
+
+def post_url(tweet_id: str = "123") -> str:
+    return f"https://x.com/influencer/status/{tweet_id}"
+
+
+POST_URL = post_url()
+
+
+class MockTwitterClient:
+    """Blocking stand-in for tweepy.Client recording when calls start."""
+
+    def __init__(self, latency: float = 0.0, authors=None, expand_authors=True):
+        self.latency = latency
+        # Tweet id -> author id, authors default to the influencer
+        self.authors = authors or {}
+        self.expand_authors = expand_authors
+        self.started = []
+        self.calls = []
+        self.user_calls = []
+        self.likes = 10
+
+    def get_tweets(self, ids, **kwargs):
+        self.started.append(time.monotonic())
+        self.calls.append((list(ids), kwargs))
+        time.sleep(self.latency)
+        tweets = [
+            tweepy.Tweet(
+                {
+                    "id": tweet_id,
+                    "text": "The vault",
+                    "author_id": self.authors.get(tweet_id, "42"),
+                    "public_metrics": {"like_count": self.likes},
+                }
+            )
+            for tweet_id in ids
+            if tweet_id != MISSING_TWEET_ID
+        ]
+        errors = [
+            {"resource_id": tweet_id, "detail": "Could not find tweet"}
+            for tweet_id in ids
+            if tweet_id == MISSING_TWEET_ID
+        ]
+        users = [self.user("42")] if self.expand_authors else []
+        return tweepy.Response(tweets or None, {"users": users}, errors, {})
+
+    def get_users(self, ids=None, usernames=None, **kwargs):
+        self.user_calls.append((ids, usernames))
+        users = [self.user(user_id) for user_id in ids or []]
+        users += [
+            self.user("42")
+            for username in usernames or []
+            if username.lower() == "influencer"
+        ]
+        errors = [
+            {"value": username, "title": "Not Found Error"}
+            for username in usernames or []
+            if username.lower() != "influencer"
+        ]
+        return tweepy.Response(users or None, {}, errors, {})
+
+    def user(self, user_id):
+        username = "influencer" if user_id == "42" else f"user{user_id}"
+        return tweepy.User({"id": user_id, "name": username, "username": username})
+
+
+def error_response(status_code: int, headers=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b"{}"
+    return response
+
+
+class FailingTwitterClient(MockTwitterClient):
+    """Client whose tweet lookups fail with `error`."""
+
+    def __init__(self, error: Exception):
+        super().__init__()
+        self.error = error
+
+    def get_tweets(self, ids, **kwargs):
+        self.calls.append((list(ids), kwargs))
+        raise self.error
+
+
+@pytest.fixture
+def service():
+    service = TwitterService(
+        max_workers=2,
+        cache=TweetCache(max_entries=10, content_ttl=3600, metrics_ttl=60),
+        users=TwitterUserCache(
+            max_entries=10, ttl_seconds=3600, negative_ttl=60, persist=False
+        ),
+    )
+    yield service
+    service.close()
+
+
+class TestTwitterService:
+    """Tests for the async Twitter access layer."""
+
+    async def test_lookup_does_not_block_event_loop(self, service):
+        """Test that a slow tweet lookup leaves the event loop free."""
+        service.client = MockTwitterClient(latency=0.2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        post_info = await service.fetch_post(POST_URL)
+        task.cancel()
+
+        assert post_info["author_handle"] == "influencer"
+        assert post_info["public_metrics"] == {"like_count": 10}
+        assert ticks >= 10
+
+    async def test_calls_wait_for_the_next_window(self, service):
+        """Test that calls beyond the quota start once the window resets."""
+        service.client = MockTwitterClient()
+        service.rate_limiter = TwitterRateLimiter(default_limit=2, window=0.1)
+
+        for tweet_id in ("1", "2", "3"):
+            await service.fetch_post(post_url(tweet_id))
+
+        started = service.client.started
+        assert len(started) == 3
+        assert started[1] - started[0] < 0.05
+        assert started[2] - started[0] >= 0.09
+
+    async def test_long_waits_fail_fast(self, service):
+        """Test that a call fails with a retry-after hint past the maximum wait."""
+        service.client = MockTwitterClient()
+        service.rate_limiter = TwitterRateLimiter(default_limit=1, window=60)
+        service.max_wait = 1
+
+        await service.fetch_post(POST_URL)
+        with pytest.raises(RateLimited) as error:
+            await service.fetch_post(POST_URL, refresh_metrics=True)
+
+        assert error.value.endpoint == "/2/tweets"
+        assert 59 <= error.value.retry_after <= 60
+        assert len(service.client.started) == 1
+
+    async def test_get_post_metrics(self, service):
+        """Test that post metrics are read through the async path."""
+        service.client = MockTwitterClient()
+
+        metrics = await service.get_post_metrics(POST_URL)
+
+        assert metrics["like_count"] == 10
+        assert metrics["retweet_count"] == 0
+
+    async def test_cached_post_skips_lookup(self, service):
+        """Test that a repeat lookup within the metrics TTL makes no call."""
+        service.client = MockTwitterClient()
+
+        first = await service.fetch_post(POST_URL)
+        second = await service.fetch_post(POST_URL)
+
+        assert second == first
+        assert len(service.client.calls) == 1
+
+    async def test_refresh_fetches_only_metrics(self, service):
+        """Test that a forced refresh spends one metrics call on a cached post."""
+        service.client = MockTwitterClient()
+        await service.fetch_post(POST_URL)
+        service.client.likes = 99
+
+        post_info = await service.fetch_post(POST_URL, refresh_metrics=True)
+
+        assert post_info["author_handle"] == "influencer"
+        assert post_info["public_metrics"] == {"like_count": 99}
+        assert service.client.calls[1] == (
+            ["123"],
+            {"tweet_fields": ["public_metrics"]},
+        )
+
+    async def test_concurrent_lookups_share_one_call(self, service):
+        """Test that lookups in the same window go out as one get_tweets call."""
+        service.client = MockTwitterClient()
+        tweet_ids = ["1", "2", MISSING_TWEET_ID, "1"]
+
+        results = await asyncio.gather(
+            *(service.fetch_post(post_url(tweet_id)) for tweet_id in tweet_ids)
+        )
+
+        assert service.client.calls == [
+            (
+                ["1", "2", MISSING_TWEET_ID],
+                {
+                    "tweet_fields": ["created_at", "public_metrics", "text"],
+                    "expansions": ["author_id"],
+                },
+            )
+        ]
+        assert [result and result["tweet_id"] for result in results] == [
+            "1",
+            "2",
+            None,
+            "1",
+        ]
+        assert service.post_batcher.stats()["calls"] == 1
+
+    async def test_handle_validation_uses_cache(self, service):
+        """Test that handles are checked with one get_users call, then from cache."""
+        service.client = MockTwitterClient()
+
+        results = await asyncio.gather(
+            service.check_handle("@Influencer"),
+            service.check_handle("nobody"),
+            service.check_handle("influencer"),
+        )
+        again = [
+            await service.check_handle("INFLUENCER"),
+            await service.check_handle("@nobody"),
+            await service.check_handle("not a handle"),
+        ]
+
+        assert results == [True, False, True]
+        assert again == [True, False, False]
+        assert service.client.user_calls == [(None, ["influencer", "nobody"])]
+
+    async def test_missing_authors_resolved_in_bulk(self, service):
+        """Test that authors left out of the expansion share one get_users call."""
+        service.client = MockTwitterClient(
+            authors={"1": "41", "3": "40"}, expand_authors=False
+        )
+
+        results = await asyncio.gather(
+            *(service.fetch_post(post_url(tweet_id)) for tweet_id in ("1", "2", "3"))
+        )
+
+        assert [result["author_handle"] for result in results] == [
+            "user41",
+            "influencer",
+            "user40",
+        ]
+        assert len(service.client.user_calls) == 1
+        assert sorted(service.client.user_calls[0][0]) == ["40", "41", "42"]
+        # The authors are cached, so the handle check makes no call
+        assert await service.check_handle("user41")
+        assert len(service.client.user_calls) == 1
+
+    async def test_rate_limited_batch_raises_for_every_caller(self, service):
+        """Test that a 429 is not mistaken for missing tweets by coalesced callers."""
+        reset_at = time.time() + 30
+        service.client = FailingTwitterClient(
+            tweepy.TooManyRequests(
+                error_response(429, {"x-rate-limit-reset": str(reset_at)})
+            )
+        )
+
+        results = await asyncio.gather(
+            *(service.fetch_post(post_url(tweet_id)) for tweet_id in ("1", "2")),
+            return_exceptions=True,
+        )
+
+        assert len(service.client.calls) == 1
+        assert all(isinstance(result, RateLimited) for result in results)
+        assert 25 <= results[0].retry_after <= 30
+
+    async def test_server_error_raises_unavailable(self, service):
+        """Test that 5xx and network errors surface instead of returning None."""
+        service.client = FailingTwitterClient(
+            tweepy.TwitterServerError(error_response(503))
+        )
+        with pytest.raises(TwitterUnavailable):
+            await service.fetch_post(POST_URL)
+
+        service.client = FailingTwitterClient(requests.ConnectionError("reset"))
+        with pytest.raises(TwitterUnavailable):
+            await service.fetch_post(POST_URL)
+
+    async def test_metrics_lookup_raises_on_failures(self, service):
+        """Test that tweet metrics report rate limits and outages, not no tweets."""
+        service.client = FailingTwitterClient(
+            tweepy.TooManyRequests(error_response(429))
+        )
+        with pytest.raises(RateLimited):
+            await service.fetch_tweet_metrics(["1"])
+
+        service.client = FailingTwitterClient(
+            tweepy.TwitterServerError(error_response(503))
+        )
+        with pytest.raises(TwitterUnavailable):
+            await service.fetch_tweet_metrics(["1"])
+
+    async def test_handle_check_raises_when_rate_limited(self, service):
+        """Test that a throttled handle check raises and caches nothing."""
+        reset_at = time.time() + 30
+        error = tweepy.TooManyRequests(
+            error_response(429, {"x-rate-limit-reset": str(reset_at)})
+        )
+
+        class ThrottledClient(MockTwitterClient):
+            def get_users(self, ids=None, usernames=None, **kwargs):
+                self.user_calls.append((ids, usernames))
+                raise error
+
+        service.client = ThrottledClient()
+        with pytest.raises(RateLimited):
+            await service.check_handle("influencer")
+
+        service.client = MockTwitterClient()
+        assert await service.check_handle("influencer")
+
+    async def test_unanswered_handle_is_not_cached_as_missing(self, service):
+        """Test that a handle the API neither found nor rejected is retried."""
+
+        class SilentClient(MockTwitterClient):
+            def get_users(self, ids=None, usernames=None, **kwargs):
+                self.user_calls.append((ids, usernames))
+                return tweepy.Response(None, {}, [], {})
+
+        service.client = SilentClient()
+        with pytest.raises(TwitterUnavailable):
+            await service.check_handle("influencer")
+
+        service.client = MockTwitterClient()
+        assert await service.check_handle("influencer")
@@ -0,0 +1,135 @@
+import pytest
+
+from app.services.twitter_user_cache import TwitterUserCache
+
+# Import the module for patching
+import app.services.twitter_user_cache as twitter_user_cache
+
+pytestmark = pytest.mark.asyncio
+
+INFLUENCER = {"id": "42", "username": "Influencer"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MockUserStore:
+    """In-memory stand-in for the twitter_users collection functions."""
+
+    def __init__(self):
+        self.users = {}
+        self.reads = []
+
+    async def get_twitter_users(self, ids=None, usernames=None, max_age=None):
+        self.reads.append((ids, usernames))
+        usernames = [username.lower() for username in usernames or []]
+        return [
+            dict(user)
+            for user in self.users.values()
+            if user["id"] in (ids or []) or user["username"].lower() in usernames
+        ]
+
+    async def upsert_twitter_users(self, users):
+        for user in users:
+            self.users[user["id"]] = dict(user)
+        return len(users)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MockUserStore()
+    monkeypatch.setattr(
+        twitter_user_cache, "get_twitter_users", store.get_twitter_users
+    )
+    monkeypatch.setattr(
+        twitter_user_cache, "upsert_twitter_users", store.upsert_twitter_users
+    )
+    return store
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_cache(clock, max_entries=10):
+    return TwitterUserCache(
+        max_entries=max_entries, ttl_seconds=3600, negative_ttl=60, clock=clock
+    )
+
+
+class TestTwitterUserCache:
+    """Tests for the id <-> username cache."""
+
+    async def test_put_resolves_both_ways(self, store, clock):
+        """Test that a stored user is found by id and by any spelling of its handle."""
+        cache = make_cache(clock)
+
+        await cache.put([INFLUENCER])
+
+        assert await cache.get_usernames(["42", "7"]) == {"42": "Influencer"}
+        assert await cache.get_ids(["@influencer", " INFLUENCER "]) == {
+            "influencer": "42"
+        }
+        assert store.users == {"42": INFLUENCER}
+
+    async def test_memory_miss_reads_mongo(self, store, clock):
+        """Test that a fresh process resolves users another one stored."""
+        await make_cache(clock).put([INFLUENCER])
+        cache = make_cache(clock)
+
+        assert await cache.get_ids(["influencer"]) == {"influencer": "42"}
+        assert await cache.get_usernames(["42"]) == {"42": "Influencer"}
+
+        # The second lookup was answered from memory
+        assert store.reads == [(None, ["influencer"])]
+        assert cache.stats()["db_hits"] == 1
+        assert cache.stats()["memory_hits"] == 1
+
+    async def test_entries_expire(self, store, clock):
+        """Test that entries past the TTL are looked up again."""
+        cache = make_cache(clock)
+        cache.persist = False
+        await cache.put([INFLUENCER])
+
+        clock.now += 3601
+
+        assert await cache.get_usernames(["42"]) == {}
+
+    async def test_missing_handles_are_remembered_briefly(self, store, clock):
+        """Test that a nonexistent handle is rejected from memory until negative_ttl."""
+        cache = make_cache(clock)
+        cache.put_missing(["@Nobody"])
+
+        assert await cache.get_ids(["nobody"]) == {"nobody": None}
+
+        clock.now += 61
+
+        assert await cache.get_ids(["nobody"]) == {}
+
+    async def test_rename_frees_the_old_handle(self, store, clock):
+        """Test that a renamed account no longer answers for its old handle."""
+        cache = make_cache(clock)
+        cache.persist = False
+        await cache.put([INFLUENCER])
+
+        await cache.put([{"id": "42", "username": "vault"}])
+
+        assert await cache.get_ids(["influencer", "vault"]) == {"vault": "42"}
+        assert await cache.get_usernames(["42"]) == {"42": "vault"}
+
+    async def test_memory_is_bounded(self, store, clock):
+        """Test that the least recently used users are evicted from memory."""
+        cache = make_cache(clock, max_entries=2)
+        cache.persist = False
+
+        await cache.put(
+            [{"id": str(index), "username": f"u{index}"} for index in range(3)]
+        )
+
+        assert await cache.get_usernames(["0", "1", "2"]) == {"1": "u1", "2": "u2"}
@@ -12,6 +12,43 @@ import { PublicKey, LAMPORTS_PER_SOL } from "@solana/web3.js";
 import { useMemo, useState } from "react";
 import { toast } from "react-hot-toast";
 
+const CLAIM_API_URL = "https://attention-vault.ashwinshome.co.uk/api/claim";
+// Claims are verified and paid by a background worker, poll for the outcome
+const CLAIM_POLL_INTERVAL_MS = 2000;
+const CLAIM_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+type ClaimResult = {
+  success: boolean;
+  message: string;
+  reason?: string | null;
+};
+
+type ClaimJob = {
+  job_id: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  attempts: number;
+  result?: ClaimResult | null;
+  error?: string | null;
+};
+
+async function waitForClaim(jobId: string): Promise<ClaimJob> {
+  const deadline = Date.now() + CLAIM_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, CLAIM_POLL_INTERVAL_MS));
+    const response = await fetch(`${CLAIM_API_URL}/${jobId}`, {
+      headers: { accept: "application/json" },
+    });
+    if (!response.ok) {
+      continue;
+    }
+    const job: ClaimJob = await response.json();
+    if (job.status === "succeeded" || job.status === "failed") {
+      return job;
+    }
+  }
+  throw new Error("Timed out waiting for the claim");
+}
+
 function ProgressBar({ current, total }: { current: number; total: number }) {
   const percentage = (current / total) * 100;
   return (
@@ -68,17 +105,14 @@ function ContractCard({ contract }: { contract: PublicKey }) {
     console.log("Submitting claim request:", requestBody);
 
     try {
-      const response = await fetch(
-        "https://attention-vault.ashwinshome.co.uk/api/claim",
-        {
-          method: "POST",
-          headers: {
-            accept: "application/json",
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify(requestBody),
-        }
-      );
+      const response = await fetch(CLAIM_API_URL, {
+        method: "POST",
+        headers: {
+          accept: "application/json",
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify(requestBody),
+      });
 
       const responseData = await response.json();
       console.log("Claim response:", {
@@ -86,13 +120,26 @@ function ContractCard({ contract }: { contract: PublicKey }) {
         data: responseData,
       });
 
-      if (responseData.success) {
-        toast.success(`✓ ${responseData.message || "Success"}`);
+      if (!response.ok || !responseData.job_id) {
+        toast.error(`${responseData.detail || "Failed to submit claim"}`);
+        return;
+      }
+
+      const toastId = toast.loading("Verifying post and paying tranches...");
+      let job: ClaimJob;
+      try {
+        job = await waitForClaim(responseData.job_id);
+      } finally {
+        toast.dismiss(toastId);
+      }
+      console.log("Claim job:", job);
+
+      if (job.result?.success) {
+        toast.success(`✓ ${job.result.message || "Success"}`);
         setPostUrl("");
+        contractQuery.refetch();
       } else {
-        toast.error(
-          `${responseData.message || responseData.detail || "Error occurred"}`
-        );
+        toast.error(`${job.result?.message || job.error || "Error occurred"}`);
       }
     } catch (error) {
       console.error("Error submitting claim:", error);